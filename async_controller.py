@@ -0,0 +1,207 @@
+from typing import Optional, Any, Dict, List
+from datetime import datetime
+from model import Incident, IncidentStatus, Phase, Status, TrafficLight
+from view import DashboardView, IncidentView, ReportView
+from async_repository import AsyncRepository
+from repository import Page
+from controller import (
+    IncidentController, TrafficController, ReportController,
+    IncidentData, Request, Report
+)
+
+# ==================== Асинхронные контроллеры ====================
+#
+# Each async controller extends its synchronous counterpart: the sync methods
+# keep working on the wrapped repository, while the a*-methods await the
+# repository through AsyncRepository and then update the view the same way.
+
+class AsyncIncidentController(IncidentController):
+    """Incident controller with awaitable handlers"""
+
+    def __init__(self, incident_repo: AsyncRepository[Incident], incident_view: IncidentView):
+        super().__init__(incident_repo.repository, incident_view)
+        self.asyncIncidentRepo = incident_repo
+
+    async def acreateIncident(self, data: IncidentData) -> Incident:
+        """Create a new incident"""
+        incident = self._buildIncident(data)
+        await self.asyncIncidentRepo.aadd(incident.incidentId, incident)
+
+        # Update view
+        self.incidentView.displayAlert(f"New incident created: {incident.incidentId}")
+        self.incidentView.incidentList.append(incident.incidentId)
+        self.incidentView.update()
+
+        return incident
+
+    async def alistIncidents(self, limit: int = 50, after_id: Optional[str] = None) -> Page[Incident]:
+        """Show one page of incidents ordered by ID"""
+        page = await self.asyncIncidentRepo.apage(limit, after_id)
+
+        # Update view
+        self.incidentView.displayPage([incident.incidentId for incident in page.items],
+                                      page.next_after_id)
+        self.incidentView.update()
+
+        return page
+
+    async def averifyIncident(self, incident_id: str) -> bool:
+        """Verify an incident"""
+        print(f"Verifying incident: {incident_id}")
+
+        incident = await self.asyncIncidentRepo.amodify(
+            incident_id, lambda incident: incident.updateStatus(IncidentStatus.CONFIRMED)
+        )
+        if incident:
+            # Update view
+            self.incidentView.displayAlert(f"Incident {incident_id} verified")
+            self.incidentView.update()
+            return True
+
+        self.incidentView.displayAlert(f"Incident {incident_id} not found")
+        return False
+
+    async def acloseIncident(self, incident_id: str) -> bool:
+        """Close an incident"""
+        print(f"Closing incident: {incident_id}")
+
+        incident = await self.asyncIncidentRepo.amodify(
+            incident_id, lambda incident: incident.updateStatus(IncidentStatus.RESOLVED)
+        )
+        if incident:
+            # Update view
+            if incident_id in self.incidentView.incidentList:
+                self.incidentView.incidentList.remove(incident_id)
+            self.incidentView.displayAlert(f"Incident {incident_id} closed")
+            self.incidentView.update()
+            return True
+
+        self.incidentView.displayAlert(f"Incident {incident_id} not found")
+        return False
+
+    async def ahandleRequest(self, req: Request) -> Optional[Any]:
+        """Handle HTTP request for incidents"""
+        print(f"Handling incident request: {req.method} {req.path}")
+
+        if req.method == "POST" and req.path == "/incidents":
+            return await self.acreateIncident(self._parseIncidentData(req))
+
+        elif req.method == "GET" and req.path == "/incidents":
+            limit = int(req.data.get("limit", 50))
+            return await self.alistIncidents(limit, req.data.get("after_id"))
+
+        elif req.method == "PUT" and "/incidents/" in req.path:
+            incident_id = req.path.split("/")[-1]
+
+            if req.data.get("action") == "verify":
+                return await self.averifyIncident(incident_id)
+            elif req.data.get("action") == "close":
+                return await self.acloseIncident(incident_id)
+
+        return None
+
+class AsyncTrafficController(TrafficController):
+    """Traffic controller with awaitable handlers"""
+
+    def __init__(self, light_repo: AsyncRepository[TrafficLight], dashboard_view: DashboardView):
+        super().__init__(light_repo.repository, dashboard_view)
+        self.asyncLightRepo = light_repo
+
+    async def asetGreenWave(self, route_id: str, lights: List[str]) -> bool:
+        """Set green wave for a route"""
+        print(f"Setting green wave for route: {route_id}")
+
+        found = await self.asyncLightRepo.agetMany(lights)
+        route_lights = [found[light_id] for light_id in lights if light_id in found]
+        return self._applyGreenWave(route_id, route_lights)
+
+    async def aoptimizePhases(self, junction_id: str) -> Dict[str, Any]:
+        """Optimize traffic light phases for a junction"""
+        print(f"Optimizing phases for junction: {junction_id}")
+
+        junction_lights = await self.asyncLightRepo.aquery("findByIntersection", junction_id)
+        if not junction_lights:
+            return {"error": f"No lights found for junction {junction_id}"}
+
+        results = {}
+        for light in junction_lights:
+            if light.getStatusUp() == Status.OPERATIONAL:
+                light = await self.asyncLightRepo.amodify(light.lightId, self._setGreenPhase)
+                if light:
+                    results[light.lightId] = {
+                        "new_phase": light.currentPhase.value,
+                        "duration": light.phaseDuration
+                    }
+
+        print(f"✅ Phases optimized for {len(results)} lights at junction {junction_id}")
+        return results
+
+    async def amanualSwitch(self, light_id: str, phase: Phase, duration: int) -> bool:
+        """Manually switch a traffic light phase"""
+        print(f"Manually switching light {light_id} to phase {phase.value}")
+
+        light = await self.asyncLightRepo.amodify(
+            light_id, lambda light: light.setPhaseUpdate(phase, duration)
+        )
+        if light:
+            # Update dashboard
+            self.dashboardView.showTrafficJamLocation(light.location)
+            self.dashboardView.update()
+
+            print(f"✅ Light {light_id} switched to {phase.value}")
+            return True
+
+        print(f"⚠️ Failed to switch light {light_id}")
+        return False
+
+    async def ahandleRequest(self, req: Request) -> Optional[Any]:
+        """Handle HTTP request for traffic control"""
+        print(f"Handling traffic request: {req.method} {req.path}")
+
+        if req.method == "POST" and req.path == "/traffic/greenwave":
+            route_id = req.data.get("route_id", "")
+            lights = req.data.get("lights", [])
+            return await self.asetGreenWave(route_id, lights)
+
+        elif req.method == "POST" and req.path == "/traffic/optimize":
+            junction_id = req.data.get("junction_id", "")
+            return await self.aoptimizePhases(junction_id)
+
+        elif req.method == "PUT" and "/traffic/lights/" in req.path:
+            light_id = req.path.split("/")[-1]
+            phase_str = req.data.get("phase", "red")
+            phase = Phase(phase_str.upper())
+            duration = int(req.data.get("duration", 30))
+            return await self.amanualSwitch(light_id, phase, duration)
+
+        return None
+
+class AsyncReportController(ReportController):
+    """Report controller with awaitable handlers"""
+
+    def __init__(self, incident_repo: AsyncRepository[Incident], report_view: ReportView):
+        super().__init__(incident_repo.repository, report_view)
+        self.asyncIncidentRepo = incident_repo
+
+    async def agenerateMonthlyReport(self, month: int, year: int) -> Report:
+        """Generate monthly traffic report"""
+        print(f"Generating monthly report for {month}/{year}")
+
+        start_date, end_date = self._monthRange(month, year)
+        # The snapshot is opened, queried and closed in the executor thread
+        total_incidents, avg_congestion = await self.asyncIncidentRepo.acall(
+            self._summarizePeriod, start_date, end_date
+        )
+        return self._buildMonthlyReport(month, year, start_date, end_date,
+                                        total_incidents, avg_congestion)
+
+    async def ahandleRequest(self, req: Request) -> Optional[Any]:
+        """Handle HTTP request for reports"""
+        if req.method == "GET" and req.path == "/reports/monthly":
+            print(f"Handling report request: {req.method} {req.path}")
+            month = int(req.data.get("month", datetime.now().month))
+            year = int(req.data.get("year", datetime.now().year))
+            return await self.agenerateMonthlyReport(month, year)
+
+        # Export does not touch the repository
+        return self.handleRequest(req)
@@ -0,0 +1,92 @@
+from typing import Any, Callable, Dict, Generic, Iterable, List, Optional
+from concurrent.futures import Executor
+import asyncio
+import functools
+from repository import Repository, Page, T
+from concurrent_repository import ConcurrentRepository
+
+# ==================== Асинхронный репозиторий ====================
+
+class AsyncRepository(Generic[T]):
+    """Асинхронный интерфейс к любому репозиторию
+
+    Вызовы выполняются в пуле потоков, поэтому медленный backend (SQLite,
+    журнал на диске) не блокирует цикл событий. Репозиторий оборачивается
+    в ConcurrentRepository, так как к нему обращаются несколько потоков.
+    Для репозиториев в памяти можно передать offload=False: вызовы будут
+    выполняться прямо в цикле событий без переключения потоков.
+    """
+
+    def __init__(self, repository: Repository[T], executor: Optional[Executor] = None,
+                 offload: bool = True):
+        if offload and not isinstance(repository, ConcurrentRepository):
+            repository = ConcurrentRepository(repository)
+        self.repository = repository
+        self._executor = executor
+        self._offload = offload
+
+    async def _run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        if not self._offload:
+            return fn(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    async def aget(self, id: str) -> Optional[T]:
+        """Получить объект по ID"""
+        return await self._run(self.repository.getById, id)
+
+    async def agetAll(self) -> List[T]:
+        """Получить все объекты"""
+        return await self._run(self.repository.getAll)
+
+    async def apage(self, limit: int = 50, after_id: Optional[str] = None) -> Page[T]:
+        """Получить страницу объектов после курсора after_id"""
+        return await self._run(self.repository.page, limit, after_id)
+
+    async def agetMany(self, ids: Iterable[str]) -> Dict[str, T]:
+        """Получить несколько объектов по ID"""
+        return await self._run(self.repository.getMany, list(ids))
+
+    async def aadd(self, id: str, obj: T) -> None:
+        """Добавить объект"""
+        await self._run(self.repository.add, id, obj)
+
+    async def aupdate(self, id: str, obj: T) -> None:
+        """Обновить объект"""
+        await self._run(self.repository.update, id, obj)
+
+    async def adelete(self, id: str) -> None:
+        """Удалить объект по ID"""
+        await self._run(self.repository.delete, id)
+
+    async def aaddMany(self, items: Dict[str, T]) -> None:
+        """Добавить несколько объектов"""
+        await self._run(self.repository.addMany, items)
+
+    async def aupdateMany(self, items: Dict[str, T]) -> None:
+        """Обновить несколько объектов"""
+        await self._run(self.repository.updateMany, items)
+
+    async def adeleteMany(self, ids: Iterable[str]) -> None:
+        """Удалить несколько объектов"""
+        await self._run(self.repository.deleteMany, list(ids))
+
+    async def amodify(self, id: str, mutator: Callable[[T], None]) -> Optional[T]:
+        """Атомарно получить, изменить и сохранить объект"""
+        return await self._run(self.repository.modify, id, mutator)
+
+    async def acount(self) -> int:
+        """Получить количество объектов"""
+        return await self._run(self.repository.count)
+
+    async def aexists(self, id: str) -> bool:
+        """Проверить существование объекта"""
+        return await self._run(self.repository.exists, id)
+
+    async def aquery(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        """Вызвать метод-запрос конкретного репозитория, например aquery("findActive")"""
+        return await self._run(getattr(self.repository, method), *args, **kwargs)
+
+    async def acall(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Выполнить fn(*args, **kwargs) там же, где вызовы репозитория (для нескольких чтений подряд)"""
+        return await self._run(fn, *args, **kwargs)
@@ -0,0 +1,478 @@
+"""Performance benchmarks for the repository layer.
+
+Usage: python benchmark.py [name ...]   (runs every benchmark when no name is given)
+"""
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from model import Incident, IncidentType, GeoPoint
+from repository import IncidentRepository
+from log_repository import LogIncidentRepository
+
+# ==================== Helpers ====================
+
+def _random_point(rng: random.Random) -> GeoPoint:
+    """Random point in a ~0.5° box around New York"""
+    return GeoPoint(40.5 + rng.random() * 0.5, -74.25 + rng.random() * 0.5)
+
+def _make_incidents(n: int, seed: int = 42) -> List[Incident]:
+    rng = random.Random(seed)
+    types = list(IncidentType)
+    return [
+        Incident(
+            incidentId=f"BENCH{i:07d}",
+            type=rng.choice(types),
+            location=_random_point(rng),
+            severity=rng.randint(1, 5),
+            timestamp=datetime.now()
+        )
+        for i in range(n)
+    ]
+
+def _timed(fn: Callable[[], object], repeat: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return time.perf_counter() - start
+
+# ==================== Benchmarks ====================
+
+def bench_find_by_location(n: int = 200_000, queries: int = 200) -> None:
+    """Grid-indexed findByLocation vs. the original linear distance scan"""
+    repo = IncidentRepository()
+    for incident in _make_incidents(n):
+        repo.add(incident.incidentId, incident)
+
+    rng = random.Random(7)
+    centers = [_random_point(rng) for _ in range(queries)]
+    radius = 1000.0  # meters
+
+    def linear_scan() -> None:
+        for center in centers:
+            [incident for incident in repo.getAll()
+             if incident.location.distance_to(center) <= radius]
+
+    def indexed() -> None:
+        for center in centers:
+            repo.findByLocation(center, radius)
+
+    for center in centers[:10]:
+        expected = {i.incidentId for i in repo.getAll() if i.location.distance_to(center) <= radius}
+        assert {i.incidentId for i in repo.findByLocation(center, radius)} == expected
+
+    linear = _timed(linear_scan)
+    grid = _timed(indexed)
+    print(f"findByLocation, {repo.count()} incidents, {queries} queries, radius={radius}")
+    print(f"  linear scan: {linear * 1000 / queries:8.3f} ms/query")
+    print(f"  grid index:  {grid * 1000 / queries:8.3f} ms/query  ({linear / grid:.0f}x)")
+
+def bench_log_restart(n: int = 500_000, tail: int = 10_000) -> None:
+    """Restart time of the log-structured repository: snapshot load + log tail replay"""
+    directory = tempfile.mkdtemp(prefix="omis_log_")
+    try:
+        repo = LogIncidentRepository(directory, snapshot_every=n + tail + 1)
+        incidents = _make_incidents(n + tail)
+        for incident in incidents[:n]:
+            repo.add(incident.incidentId, incident)
+        snapshot_time = _timed(repo.snapshot)
+        for incident in incidents[n:]:
+            repo.add(incident.incidentId, incident)
+        repo.close()
+
+        start = time.perf_counter()
+        restored = LogIncidentRepository(directory)
+        restart = time.perf_counter() - start
+        assert restored.count() == n + tail
+        restored.close()
+
+        print(f"log restart, {n} incidents in snapshot + {tail} in log tail")
+        print(f"  snapshot write: {snapshot_time:8.2f} s")
+        print(f"  restart:        {restart:8.2f} s")
+    finally:
+        shutil.rmtree(directory)
+
+def bench_bulk_add(n: int = 200_000) -> None:
+    """Row-by-row add() vs. addMany() for the in-memory and columnar incident stores"""
+    from columnar_repository import ColumnarIncidentRepository
+
+    incidents = {incident.incidentId: incident for incident in _make_incidents(n)}
+    print(f"bulk load, {n} incidents")
+    for repo_class in (IncidentRepository, ColumnarIncidentRepository):
+        single = repo_class()
+        row_by_row = _timed(lambda: [single.add(id, obj) for id, obj in incidents.items()])
+        bulk = repo_class()
+        batched = _timed(lambda: bulk.addMany(incidents))
+        assert single.count() == bulk.count()
+        print(f"  {repo_class.__name__:28s} add: {row_by_row:6.2f} s   addMany: {batched:6.2f} s")
+
+def bench_concurrent_stress(threads: int = 8, ops_per_thread: int = 2_000, rows: int = 200) -> None:
+    """Multi-threaded read/modify stress test: unlocked get+update vs. ConcurrentRepository.modify"""
+    from concurrent_repository import ConcurrentRepository
+    from sqlite_repository import SQLiteIncidentRepository
+
+    def run(repo, atomic: bool) -> float:
+        incidents = _make_incidents(rows)
+        for incident in incidents:
+            incident.severity = 0
+        repo.addMany({incident.incidentId: incident for incident in incidents})
+
+        def bump(incident: Incident) -> None:
+            incident.severity += 1
+
+        def worker(seed: int) -> None:
+            rng = random.Random(seed)
+            for _ in range(ops_per_thread):
+                id = f"BENCH{rng.randrange(rows):07d}"
+                if rng.random() < 0.8:
+                    repo.getById(id)
+                elif atomic:
+                    repo.modify(id, bump)
+                else:
+                    incident = repo.getById(id)
+                    bump(incident)
+                    repo.update(id, incident)
+
+        expected = 0
+        for seed in range(threads):
+            rng = random.Random(seed)
+            for _ in range(ops_per_thread):
+                rng.randrange(rows)
+                expected += rng.random() >= 0.8
+
+        workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        total = sum(incident.severity for incident in repo.getAll())
+        print(f"  {'modify (locked)' if atomic else 'get+update':16s} "
+              f"{threads * ops_per_thread / elapsed:10.0f} ops/s   "
+              f"increments kept: {total}/{expected}")
+        return elapsed
+
+    print(f"concurrent stress, SQLite backend, {threads} threads x {ops_per_thread} ops, 20% writes")
+    run(SQLiteIncidentRepository(), atomic=False)
+    run(ConcurrentRepository(SQLiteIncidentRepository()), atomic=True)
+
+def bench_sharded_writes(n: int = 200_000, batch: int = 5_000, shards: int = 4) -> None:
+    """Batched write throughput: one in-memory repository vs. geographic shards in worker processes"""
+    from sharded_repository import ShardedIncidentRepository
+
+    incidents = _make_incidents(n)
+    batches = [{incident.incidentId: incident for incident in incidents[i:i + batch]}
+               for i in range(0, n, batch)]
+    print(f"sharded writes, {n} incidents in batches of {batch}")
+    single = IncidentRepository(sample_data=False)
+    elapsed = _timed(lambda: [single.addMany(items) for items in batches])
+    print(f"  {'single process':16s} {n / elapsed:10.0f} writes/s")
+
+    sharded = ShardedIncidentRepository(shards=shards)
+    try:
+        elapsed = _timed(lambda: [sharded.addMany(items) for items in batches])
+        assert sharded.count() == n
+        center, radius = incidents[0].location, 2000.0
+        expected = {i.incidentId for i in single.findByLocation(center, radius)}
+        assert {i.incidentId for i in sharded.findByLocation(center, radius)} == expected
+        print(f"  {f'{shards} shards':16s} {n / elapsed:10.0f} writes/s")
+    finally:
+        sharded.close()
+
+def bench_cached_reads(n: int = 50_000, hot: int = 1_000, reads: int = 100_000) -> None:
+    """Repeated getById on a hot set: SQLite directly vs. behind an LRU CachedRepository"""
+    from cached_repository import CachedRepository
+    from sqlite_repository import SQLiteIncidentRepository
+
+    directory = tempfile.mkdtemp(prefix="omis_cache_")
+    try:
+        base = SQLiteIncidentRepository(f"{directory}/traffic.db")
+        base.addMany({incident.incidentId: incident for incident in _make_incidents(n)})
+        cached = CachedRepository(base, capacity=hot * 2)
+        rng = random.Random(3)
+        ids = [f"BENCH{rng.randrange(hot):07d}" for _ in range(reads)]
+
+        direct = _timed(lambda: [base.getById(id) for id in ids])
+        through_cache = _timed(lambda: [cached.getById(id) for id in ids])
+        print(f"cached reads, {reads} getById over {hot} hot of {n} incidents")
+        print(f"  sqlite:    {reads / direct:10.0f} reads/s")
+        print(f"  LRU cache: {reads / through_cache:10.0f} reads/s  "
+              f"(hit ratio {cached.stats.hit_ratio:.1%})")
+        cached.close()
+    finally:
+        shutil.rmtree(directory)
+
+def bench_cold_tier(n: int = 200_000) -> None:
+    """Memory held by closed incidents: in-memory repository vs. the compressed cold tier"""
+    import gc
+    import tracemalloc
+    from datetime import timedelta
+    from model import IncidentStatus
+    from tiered_repository import TieredIncidentRepository
+
+    def load(repo_factory):
+        incidents = _make_incidents(n)
+        for incident in incidents:
+            incident.status = IncidentStatus.RESOLVED
+        gc.collect()
+        tracemalloc.start()
+        repo = repo_factory()
+        repo.addMany({incident.incidentId: incident for incident in incidents})
+        del incidents
+        if isinstance(repo, TieredIncidentRepository):
+            repo.migrateCold(datetime.max)
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return repo, size
+
+    start, end = datetime.now() - timedelta(days=1), datetime.now() + timedelta(days=1)
+    print(f"cold tier, {n} resolved incidents")
+    for name, factory in (("hot (IncidentRepository)", lambda: IncidentRepository(sample_data=False)),
+                          ("cold (TieredIncidentRepository)",
+                           lambda: TieredIncidentRepository(sample_data=False))):
+        repo, size = load(factory)
+        elapsed = _timed(lambda: repo.summarizeRange(start, end))
+        print(f"  {name:32s} {size / n:7.0f} bytes/incident   summarizeRange: {elapsed * 1000:7.1f} ms")
+
+def bench_nearest(n: int = 200_000, queries: int = 200, k: int = 10) -> None:
+    """KD-tree nearest() vs. a linear distance scan with heapq.nsmallest"""
+    import heapq
+
+    repo = IncidentRepository(sample_data=False)
+    repo.addMany({incident.incidentId: incident for incident in _make_incidents(n)})
+    rng = random.Random(11)
+    centers = [_random_point(rng) for _ in range(queries)]
+
+    def linear_scan() -> None:
+        for center in centers:
+            heapq.nsmallest(k, repo.iterAll(), key=lambda incident: incident.location.distance_to(center))
+
+    def indexed() -> None:
+        for center in centers:
+            repo.nearest(center, k)
+
+    for center in centers[:10]:
+        expected = heapq.nsmallest(k, repo.iterAll(), key=lambda incident: incident.location.distance_to(center))
+        assert [i.incidentId for i in repo.nearest(center, k)] == [i.incidentId for i in expected]
+
+    linear = _timed(linear_scan)
+    tree = _timed(indexed)
+    print(f"nearest, {repo.count()} incidents, {queries} queries, k={k}")
+    print(f"  linear scan: {linear * 1000 / queries:8.3f} ms/query")
+    print(f"  KD-tree:     {tree * 1000 / queries:8.3f} ms/query  ({linear / tree:.0f}x)")
+
+def bench_distances(n: int = 200_000, m: int = 1_000) -> None:
+    """Per-pair GeoPoint.distance_to vs. vectorised point-to-many and many-to-many distances"""
+    import geo
+
+    rng = random.Random(3)
+    points = [_random_point(rng) for _ in range(n)]
+    origin = _random_point(rng)
+    lats, lons = geo.coordinates(points)
+
+    expected = [point.distance_to(origin) for point in points[:1000]]
+    assert all(abs(a - b) < 1e-6 for a, b in zip(expected, geo.distances(origin, lats[:1000], lons[:1000])))
+
+    per_pair = _timed(lambda: [point.distance_to(origin) for point in points])
+    vectorised = _timed(lambda: geo.distances(origin, lats, lons))
+    matrix = _timed(lambda: geo.distance_matrix(points[:m], points[:m]))
+    print(f"distances, {n} points")
+    print(f"  distance_to loop:      {per_pair * 1000:8.1f} ms")
+    print(f"  geo.distances:         {vectorised * 1000:8.1f} ms  ({per_pair / vectorised:.0f}x)")
+    print(f"  geo.distance_matrix:   {matrix * 1000:8.1f} ms for {m}x{m}")
+
+def bench_model_memory(n: int = 200_000) -> None:
+    """Bytes per model object: __dict__-based layout (as before __slots__) vs. the slotted classes"""
+    import gc
+    import tracemalloc
+    from model import SensorData, TrafficData, TrafficLight
+
+    def with_dict(cls: type) -> type:
+        # Same constructor, attributes stored in a per-instance __dict__
+        return type(cls.__name__, (), {"__init__": cls.__init__})
+
+    now = datetime.now()
+    point = GeoPoint(40.7128, -74.0060)
+    makers = {
+        "GeoPoint": (GeoPoint, lambda cls, i: cls(40.7 + i * 1e-6, -74.0)),
+        "SensorData": (SensorData, lambda cls, i: cls(float(i), now, f"S{i % 1000:04d}")),
+        "TrafficData": (TrafficData, lambda cls, i: cls(12.5, 48.0, 2)),
+        "Incident": (Incident, lambda cls, i: cls(f"INC{i:07d}", IncidentType.ACCIDENT, point, 3, now)),
+        "TrafficLight": (TrafficLight, lambda cls, i: cls(f"TL{i:07d}", point, f"J{i % 1000:04d}")),
+    }
+
+    def bytes_per_object(cls: type, make: Callable[[type, int], object]) -> float:
+        gc.collect()
+        tracemalloc.start()
+        objects = [make(cls, i) for i in range(n)]
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del objects
+        return size / n
+
+    print(f"model memory, {n} objects each (including the list slot and unique ID strings)")
+    for name, (cls, make) in makers.items():
+        before = bytes_per_object(with_dict(cls), make)
+        after = bytes_per_object(cls, make)
+        print(f"  {name:12s} __dict__: {before:6.0f} B   __slots__: {after:6.0f} B   ({before / after:.1f}x)")
+
+def bench_sensor_store(sensors: int = 1_000, readings: int = 1_000, window: int = 60) -> None:
+    """Sensor history: SensorData objects in per-sensor lists vs. SensorDataStore ring buffers"""
+    from datetime import timedelta
+    from model import SensorData
+    from timeseries import SensorDataStore
+
+    start = datetime(2024, 1, 1)
+    ids = [f"S{i:05d}" for i in range(sensors)]
+    ticks = [start + timedelta(seconds=t) for t in range(readings)]
+    rng = random.Random(5)
+    values = [rng.random() * 100 for _ in range(readings)]
+    lo, hi = ticks[readings // 2], ticks[readings // 2 + window]
+
+    history: Dict[str, List[SensorData]] = {}
+    store = SensorDataStore(capacity=readings)
+    store.appendColumns(ids, [start - timedelta(seconds=1)] * sensors, [0.0] * sensors)
+
+    def append_objects() -> None:
+        for t, value in zip(ticks, values):
+            for sensor_id in ids:
+                history.setdefault(sensor_id, []).append(SensorData(value, t, sensor_id))
+
+    def append_store() -> None:
+        for t, value in zip(ticks, values):
+            for sensor_id in ids:
+                store.series(sensor_id).append(t, value)
+
+    def range_objects() -> None:
+        for sensor_id in ids:
+            sum(r.value for r in history[sensor_id] if lo <= r.timestamp <= hi)
+
+    def range_store() -> None:
+        for sensor_id in ids:
+            store.between(sensor_id, lo, hi)[1].sum()
+
+    def last_objects() -> None:
+        for sensor_id in ids:
+            sum(r.value for r in history[sensor_id][-window:])
+
+    def last_store() -> None:
+        for sensor_id in ids:
+            store.last(sensor_id, window)[1].sum()
+
+    n = sensors * readings
+    print(f"sensor store, {sensors} sensors x {readings} readings, window={window}")
+    for name, objects, ring in (("append", append_objects, append_store),
+                                ("time range", range_objects, range_store),
+                                ("last N", last_objects, last_store)):
+        a, b = _timed(objects), _timed(ring)
+        unit = f"{a * 1e9 / n:7.0f} / {b * 1e9 / n:7.0f} ns per reading" if name == "append" else \
+               f"{a * 1e6 / sensors:7.1f} / {b * 1e6 / sensors:7.1f} us per sensor"
+        print(f"  {name:10s} objects / ring buffer: {unit}  ({a / b:.1f}x)")
+    assert abs(store.between(ids[0], lo, hi)[1].sum()
+               - sum(r.value for r in history[ids[0]] if lo <= r.timestamp <= hi)) < 1e-6
+
+def bench_sensor_poller(sensors: int = 2_000, latency: float = 0.002, hung: int = 20,
+                        timeout: float = 0.5) -> None:
+    """One poll cycle over slow sensors: sequential readData() vs. SensorPoller with a thread pool"""
+    from model import Sensor, SensorType
+    from sensor_poller import SensorPoller
+    from timeseries import SensorDataStore
+
+    class _SlowSensor(Sensor):
+        def __init__(self, i: int, delay: float):
+            super().__init__(f"S{i:05d}", GeoPoint(40.7, -74.0), SensorType.SPEED)
+            self.delay = delay
+
+        def readData(self):
+            time.sleep(self.delay)
+            return super().readData()
+
+    fleet = [_SlowSensor(i, latency) for i in range(sensors)]
+    hanging = [_SlowSensor(sensors + i, timeout * 4) for i in range(hung)]
+
+    start = time.perf_counter()
+    readings = [sensor.readData() for sensor in fleet]
+    sequential = time.perf_counter() - start
+
+    poller = SensorPoller(fleet + hanging, timeout=timeout, store=SensorDataStore(capacity=16))
+    try:
+        batch = poller.poll()
+    finally:
+        poller.close()
+    print(f"sensor poller, {sensors} sensors x {latency * 1e3:.0f} ms + {hung} hung, timeout={timeout}s")
+    print(f"  sequential (healthy only): {sequential:7.3f} s  ({len(readings)} readings)")
+    print(f"  SensorPoller             : {batch.latency:7.3f} s  ({len(batch)} readings, "
+          f"{len(batch.missed)} missed)  ({sequential / batch.latency:.1f}x)")
+    assert len(batch) == sensors and len(batch.missed) == hung
+
+def bench_rollups(sensors: int = 5, days: int = 30, period: int = 10) -> None:
+    """Month-long aggregates: raw SensorData scan and ring-buffer sums vs. RollupStore"""
+    from datetime import timedelta
+    from model import SensorData
+    from rollups import RollupStore
+    from timeseries import SensorDataStore
+
+    start = datetime(2024, 1, 1)
+    ids = [f"S{i:05d}" for i in range(sensors)]
+    readings = days * 86400 // period
+    ticks = [start + timedelta(seconds=t * period) for t in range(readings)]
+    rng = random.Random(9)
+    values = [rng.random() * 100 for _ in range(readings)]
+    lo, hi = start + timedelta(hours=5, minutes=15), start + timedelta(days=days - 1, minutes=41)
+
+    history = {sensor_id: [SensorData(value, t, sensor_id) for t, value in zip(ticks, values)]
+               for sensor_id in ids}
+    raw = SensorDataStore(capacity=readings)
+    rollups = RollupStore()
+    for sensor_id in ids:
+        raw.appendMany(history[sensor_id])
+    ingest = _timed(lambda: [rollups.appendMany(history[sensor_id]) for sensor_id in ids])
+
+    def scan_objects() -> None:
+        for sensor_id in ids:
+            sum(r.value for r in history[sensor_id] if lo <= r.timestamp < hi)
+
+    def scan_raw() -> None:
+        for sensor_id in ids:
+            raw.between(sensor_id, lo, hi - timedelta(microseconds=1))[1].sum()
+
+    def read_rollups() -> None:
+        for sensor_id in ids:
+            rollups.aggregate(sensor_id, lo, hi)
+
+    print(f"rollups, {sensors} sensors x {days} days at {period} s, {readings} readings per sensor")
+    print(f"  ingest: {ingest * 1e9 / (sensors * readings):7.0f} ns per reading")
+    c = _timed(read_rollups, repeat=20) / 20
+    for name, fn, repeat in (("SensorData scan", scan_objects, 1), ("ring buffer sum", scan_raw, 20)):
+        a = _timed(fn, repeat=repeat) / repeat
+        print(f"  {name:16s} / rollups: {a * 1e6 / sensors:9.1f} / {c * 1e6 / sensors:7.1f} us per query  ({a / c:.0f}x)")
+    expected = sum(r.value for r in history[ids[0]] if lo <= r.timestamp < hi)
+    assert abs(rollups.aggregate(ids[0], lo, hi).sum - expected) < 1e-6 * abs(expected)
+
+BENCHMARKS: Dict[str, Callable[[], None]] = {
+    "find_by_location": bench_find_by_location,
+    "log_restart": bench_log_restart,
+    "bulk_add": bench_bulk_add,
+    "concurrent_stress": bench_concurrent_stress,
+    "sharded_writes": bench_sharded_writes,
+    "cached_reads": bench_cached_reads,
+    "cold_tier": bench_cold_tier,
+    "nearest": bench_nearest,
+    "distances": bench_distances,
+    "model_memory": bench_model_memory,
+    "sensor_store": bench_sensor_store,
+    "sensor_poller": bench_sensor_poller,
+    "rollups": bench_rollups,
+}
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        BENCHMARKS[name]()
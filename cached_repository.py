@@ -0,0 +1,254 @@
+from typing import Any, Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Set
+from collections import OrderedDict
+from dataclasses import dataclass
+import threading
+from repository import Repository, RepositorySnapshot, ChangeEvent, Page, T
+
+# ==================== Кэширующий репозиторий ====================
+
+@dataclass
+class CacheStats:
+    """Счетчики кэша"""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    flushes: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+class CachedRepository(Repository[T]):
+    """LRU-кэш объектов перед медленным репозиторием (SQLite, журнал на диске)
+
+    getById/getMany сначала ищут объект в кэше на capacity объектов, при
+    промахе читают его из репозитория и запоминают; давно не запрошенные
+    объекты вытесняются. Записи по умолчанию сразу уходят в репозиторий
+    (write-through). При write_back=True записи копятся в памяти и
+    сбрасываются одним пакетом addMany/deleteMany, когда накопится
+    flush_every изменений, при вызове flush() или close(), а также перед
+    любым запросом, который выполняет сам репозиторий (getAll, page, find*...).
+
+    Выданные объекты общие с кэшем: изменять их нужно через update() или
+    modify(). LRU-список, ожидающие записи и счетчики защищены собственной
+    блокировкой, поэтому параллельные чтения (в том числе под блокировкой
+    чтения ConcurrentRepository, с вытеснением и сбросом) безопасны. Для
+    записей из нескольких потоков кэш нужно обернуть в ConcurrentRepository.
+    """
+
+    def __init__(self, repository: Repository[T], capacity: int = 10_000,
+                 write_back: bool = False, flush_every: int = 1_000):
+        super().__init__()
+        self.repository = repository
+        self.stats = CacheStats()
+        self._capacity = capacity
+        self._write_back = write_back
+        self._flush_every = flush_every
+        self._cache: "OrderedDict[str, T]" = OrderedDict()
+        self._dirty: Dict[str, T] = {}
+        self._deleted: Set[str] = set()
+        # Чтение с попаданием меняет порядок LRU, поэтому блокировка нужна и читателям
+        self._lock = threading.RLock()
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.repository, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+
+        def flushed(*args: Any, **kwargs: Any) -> Any:
+            self.flush()
+            return attr(*args, **kwargs)
+        return flushed
+
+    # ---------- Кэш ----------
+
+    def _remember(self, id: str, obj: T) -> None:
+        with self._lock:
+            self._cache[id] = obj
+            self._cache.move_to_end(id)
+            if len(self._cache) > self._capacity:
+                self._cache.popitem(last=False)
+                self.stats.evictions += 1
+
+    def _lookup(self, id: str) -> Optional[T]:
+        """Объект из кэша или из ожидающих записей (None при промахе)"""
+        with self._lock:
+            obj = self._cache.get(id)
+            if obj is not None:
+                self._cache.move_to_end(id)
+                return obj
+            obj = self._dirty.get(id)
+            if obj is not None:
+                self._remember(id, obj)
+            return obj
+
+    def flush(self) -> None:
+        """Записать накопленные изменения в репозиторий"""
+        with self._lock:
+            if not self._dirty and not self._deleted:
+                return
+            if self._deleted:
+                self.repository.deleteMany(self._deleted)
+            if self._dirty:
+                self.repository.addMany(self._dirty)
+            self._deleted = set()
+            self._dirty = {}
+            self.stats.flushes += 1
+
+    def invalidate(self, id: Optional[str] = None) -> None:
+        """Забыть объект (или весь кэш), например после записи в репозиторий в обход кэша"""
+        with self._lock:
+            if id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(id, None)
+
+    def close(self) -> None:
+        """Сбросить изменения и закрыть репозиторий, если он это поддерживает"""
+        self.flush()
+        close = getattr(self.repository, "close", None)
+        if close is not None:
+            close()
+
+    def _stage(self) -> None:
+        if len(self._dirty) + len(self._deleted) >= self._flush_every:
+            self.flush()
+
+    # ---------- Чтение ----------
+
+    def getById(self, id: str) -> Optional[T]:
+        with self._lock:
+            obj = self._lookup(id)
+            if obj is not None or id in self._deleted:
+                self.stats.hits += 1
+                return obj
+            self.stats.misses += 1
+        obj = self.repository.getById(id)
+        if obj is not None:
+            self._remember(id, obj)
+        return obj
+
+    def getMany(self, ids: Iterable[str]) -> Dict[str, T]:
+        found: Dict[str, T] = {}
+        missing: List[str] = []
+        with self._lock:
+            for id in ids:
+                obj = self._lookup(id)
+                if obj is not None:
+                    found[id] = obj
+                elif id not in self._deleted:
+                    missing.append(id)
+            self.stats.hits += len(found)
+            self.stats.misses += len(missing)
+        if missing:
+            for id, obj in self.repository.getMany(missing).items():
+                self._remember(id, obj)
+                found[id] = obj
+        return found
+
+    def getAll(self) -> List[T]:
+        self.flush()
+        return self.repository.getAll()
+
+    def iterAll(self) -> Iterator[T]:
+        self.flush()
+        return self.repository.iterAll()
+
+    def page(self, limit: int = 50, after_id: Optional[str] = None) -> Page[T]:
+        self.flush()
+        return self.repository.page(limit, after_id)
+
+    def count(self) -> int:
+        self.flush()
+        return self.repository.count()
+
+    def readSnapshot(self, guard: Optional[Callable[[], ContextManager[Any]]] = None) -> RepositorySnapshot[T]:
+        self.flush()
+        return self.repository.readSnapshot(guard)
+
+    def exists(self, id: str) -> bool:
+        with self._lock:
+            if id in self._cache or id in self._dirty:
+                return True
+            if id in self._deleted:
+                return False
+        return self.repository.exists(id)
+
+    def subscribe(self, callback: Callable[[ChangeEvent[T]], None]) -> None:
+        """Подписаться на события репозитория (при write_back - в момент сброса)"""
+        self.repository.subscribe(callback)
+
+    def unsubscribe(self, callback: Callable[[ChangeEvent[T]], None]) -> None:
+        self.repository.unsubscribe(callback)
+
+    # ---------- Запись ----------
+
+    def add(self, id: str, obj: T) -> None:
+        if self._write_back:
+            with self._lock:
+                self._deleted.discard(id)
+                self._dirty[id] = obj
+                self._stage()
+        else:
+            self.repository.add(id, obj)
+        self._remember(id, obj)
+
+    def update(self, id: str, obj: T) -> None:
+        if not self.exists(id):
+            return
+        self.add(id, obj)
+
+    def delete(self, id: str) -> None:
+        if self._write_back:
+            with self._lock:
+                self._cache.pop(id, None)
+                self._dirty.pop(id, None)
+                self._deleted.add(id)
+                self._stage()
+        else:
+            self.invalidate(id)
+            self.repository.delete(id)
+
+    def addMany(self, items: Dict[str, T]) -> None:
+        if self._write_back:
+            with self._lock:
+                self._deleted.difference_update(items)
+                self._dirty.update(items)
+                self._stage()
+        else:
+            self.repository.addMany(items)
+        with self._lock:
+            for id, obj in items.items():
+                self._remember(id, obj)
+
+    def updateMany(self, items: Dict[str, T]) -> None:
+        self.addMany({id: obj for id, obj in items.items() if self.exists(id)})
+
+    def deleteMany(self, ids: Iterable[str]) -> None:
+        ids = list(ids)
+        if self._write_back:
+            with self._lock:
+                for id in ids:
+                    self._cache.pop(id, None)
+                    self._dirty.pop(id, None)
+                self._deleted.update(ids)
+                self._stage()
+        else:
+            with self._lock:
+                for id in ids:
+                    self._cache.pop(id, None)
+            self.repository.deleteMany(ids)
+
+    def modify(self, id: str, mutator: Callable[[T], None]) -> Optional[T]:
+        """Изменить объект через репозиторий: он решает, нужна ли копия для снимков и событий
+
+        Накопленные записи сначала сбрасываются, затем кэш получает сохраненную версию.
+        """
+        self.flush()
+        obj = self.repository.modify(id, mutator)
+        if obj is None:
+            self.invalidate(id)
+        else:
+            self._remember(id, obj)
+        return obj
@@ -0,0 +1,312 @@
+from typing import Any, Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Tuple
+from datetime import datetime
+import numpy as np
+import geo
+from model import Incident, IncidentType, IncidentStatus, GeoPoint
+from repository import (
+    Repository, RepositorySnapshot, IncidentRepository, ChangeEvent, ChangeType, Page
+)
+
+# ==================== Колоночное хранилище инцидентов ====================
+
+_TYPES: List[IncidentType] = list(IncidentType)
+_STATUSES: List[IncidentStatus] = list(IncidentStatus)
+_TYPE_CODES: Dict[IncidentType, int] = {t: code for code, t in enumerate(_TYPES)}
+_STATUS_CODES: Dict[IncidentStatus, int] = {s: code for code, s in enumerate(_STATUSES)}
+
+class _RowObserver:
+    """Наблюдатель выданного объекта, привязанный к поколению его строки"""
+
+    __slots__ = ("repository", "generation")
+
+    def __init__(self, repository: "ColumnarIncidentRepository", generation: int):
+        self.repository = repository
+        self.generation = generation
+
+    def __call__(self, incident: Incident) -> None:
+        self.repository._on_incident_changed(incident, self)
+
+class ColumnarIncidentRepository(Repository[Incident]):
+    """Инциденты в колонках NumPy: x, y, severity, тип, статус, время
+
+    Строка занимает ~27 байт в массивах вместо полноценных объектов Incident.
+    Объекты Incident создаются только при выдаче из репозитория; изменение
+    статуса через Incident.updateStatus сразу записывается обратно в колонки.
+    Каждая запись через add/addMany получает новое поколение строки: объекты,
+    выданные до удаления или замены инцидента, отписываются при первом
+    изменении и больше не пишут в колонки.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        super().__init__()
+        self._size = 0
+        self._ids: List[str] = []
+        self._row_of: Dict[str, int] = {}
+        self._x = np.empty(capacity, dtype=np.float64)
+        self._y = np.empty(capacity, dtype=np.float64)
+        self._severity = np.empty(capacity, dtype=np.int8)
+        self._type = np.empty(capacity, dtype=np.int8)
+        self._status = np.empty(capacity, dtype=np.int8)
+        self._timestamp = np.empty(capacity, dtype="datetime64[us]")
+        self._generation = np.empty(capacity, dtype=np.int64)
+        self._next_generation = 0
+        IncidentRepository._initialize_sample_incidents(self)
+
+    # ---------- Колонки ----------
+
+    def _columns(self) -> Tuple[np.ndarray, ...]:
+        return (self._x, self._y, self._severity, self._type, self._status, self._timestamp,
+                self._generation)
+
+    def _grow(self, min_capacity: int) -> None:
+        capacity = max(min_capacity, 2 * len(self._x))
+        for name in ("_x", "_y", "_severity", "_type", "_status", "_timestamp", "_generation"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def _write_row(self, row: int, obj: Incident) -> None:
+        self._x[row] = obj.location.x
+        self._y[row] = obj.location.y
+        self._severity[row] = obj.severity
+        self._type[row] = _TYPE_CODES[obj.type]
+        self._status[row] = _STATUS_CODES[obj.status]
+        self._timestamp[row] = np.datetime64(obj.timestamp, "us")
+
+    def _renew(self, rows: np.ndarray) -> None:
+        """Выдать строкам новые поколения: прежние объекты этих строк отсоединяются"""
+        start = self._next_generation
+        self._next_generation += len(rows)
+        self._generation[rows] = np.arange(start, self._next_generation)
+
+    def _write_rows(self, items: Dict[str, Incident]) -> None:
+        """Записать пакет объектов в уже выделенные строки одним присваиванием на колонку"""
+        if not items:
+            return
+        rows = np.fromiter((self._row_of[id] for id in items), dtype=np.int64, count=len(items))
+        objs = list(items.values())
+        self._x[rows] = [obj.location.x for obj in objs]
+        self._y[rows] = [obj.location.y for obj in objs]
+        self._severity[rows] = [obj.severity for obj in objs]
+        self._type[rows] = [_TYPE_CODES[obj.type] for obj in objs]
+        self._status[rows] = [_STATUS_CODES[obj.status] for obj in objs]
+        self._timestamp[rows] = np.array([obj.timestamp for obj in objs], dtype="datetime64[us]")
+
+    def _materialize(self, row: int) -> Incident:
+        """Создать объект Incident из строки"""
+        incident = Incident(
+            incidentId=self._ids[row],
+            type=_TYPES[self._type[row]],
+            location=GeoPoint(float(self._x[row]), float(self._y[row])),
+            severity=int(self._severity[row]),
+            timestamp=self._timestamp[row].item()
+        )
+        incident.status = _STATUSES[self._status[row]]
+        incident.subscribe(_RowObserver(self, int(self._generation[row])))
+        return incident
+
+    def _iter_rows(self, rows: np.ndarray) -> Iterator[Incident]:
+        for row in rows:
+            yield self._materialize(int(row))
+
+    def _on_incident_changed(self, incident: Incident, observer: "_RowObserver") -> None:
+        """Записать новый статус выданного объекта обратно в колонку
+
+        Объект, строка которого с тех пор удалена или заменена, отписывается.
+        """
+        row = self._row_of.get(incident.incidentId)
+        if row is None or self._generation[row] != observer.generation:
+            incident.unsubscribe(observer)
+            return
+        self._status[row] = _STATUS_CODES[incident.status]
+        if self._subscribers:
+            self._publish(ChangeEvent(ChangeType.UPDATED, incident.incidentId, None, incident))
+
+    # ---------- Repository API ----------
+
+    def getById(self, id: str) -> Optional[Incident]:
+        row = self._row_of.get(id)
+        return self._materialize(row) if row is not None else None
+
+    def getAll(self) -> List[Incident]:
+        return list(self.iterAll())
+
+    def iterAll(self) -> Iterator[Incident]:
+        for row in range(self._size):
+            yield self._materialize(row)
+
+    def page(self, limit: int = 50, after_id: Optional[str] = None) -> Page[Incident]:
+        self._checkPageLimit(limit)
+        ids = self._id_index.after(after_id, limit + 1)
+        return Page([self._materialize(self._row_of[id]) for id in ids[:limit]],
+                    ids[limit - 1] if len(ids) > limit else None)
+
+    def add(self, id: str, obj: Incident) -> None:
+        before = self.getMany((id,)) if self._subscribers else None
+        row = self._row_of.get(id)
+        if row is None:
+            if self._size == len(self._x):
+                self._grow(self._size + 1)
+            row = self._size
+            self._size += 1
+            self._ids.append(id)
+            self._row_of[id] = row
+            self._id_index.insert(id, id)
+        self._renew(np.array([row]))
+        self._write_row(row, obj)
+        if before is not None:
+            self._publishWrites({id: obj}, before)
+
+    def update(self, id: str, obj: Incident) -> None:
+        row = self._row_of.get(id)
+        if row is not None:
+            before = {id: self._materialize(row)} if self._subscribers else None
+            self._write_row(row, obj)
+            if before is not None:
+                self._publishWrites({id: obj}, before)
+
+    def delete(self, id: str) -> None:
+        before = self.getMany((id,)) if self._subscribers else None
+        row = self._row_of.pop(id, None)
+        if row is None:
+            return
+        self._id_index.remove(id)
+        # Последняя строка переносится на место удаленной
+        last = self._size - 1
+        if row != last:
+            for column in self._columns():
+                column[row] = column[last]
+            moved_id = self._ids[last]
+            self._ids[row] = moved_id
+            self._row_of[moved_id] = row
+        self._ids.pop()
+        self._size = last
+        if before:
+            self._publishDeletes(before)
+
+    def getMany(self, ids: Iterable[str]) -> Dict[str, Incident]:
+        return {id: self._materialize(self._row_of[id]) for id in ids if id in self._row_of}
+
+    def addMany(self, items: Dict[str, Incident]) -> None:
+        before = self.getMany(items) if self._subscribers else None
+        new_ids = [id for id in items if id not in self._row_of]
+        if self._size + len(new_ids) > len(self._x):
+            self._grow(self._size + len(new_ids))
+        for id in new_ids:
+            self._row_of[id] = self._size
+            self._ids.append(id)
+            self._size += 1
+        self._id_index.insertMany([(id, id) for id in new_ids])
+        self._renew(np.fromiter((self._row_of[id] for id in items), dtype=np.int64, count=len(items)))
+        self._write_rows(items)
+        if before is not None:
+            self._publishWrites(items, before)
+
+    def updateMany(self, items: Dict[str, Incident]) -> None:
+        existing = {id: obj for id, obj in items.items() if id in self._row_of}
+        before = self.getMany(existing) if self._subscribers else None
+        self._write_rows(existing)
+        if before is not None:
+            self._publishWrites(existing, before)
+
+    def deleteMany(self, ids: Iterable[str]) -> None:
+        dropped = {id for id in ids if id in self._row_of}
+        if len(dropped) * 8 < self._size:
+            for id in dropped:
+                self.delete(id)
+            return
+        # Много удалений: одно сжатие колонок вместо переноса строк по одной
+        before = self.getMany(dropped) if self._subscribers else None
+        keep = np.ones(self._size, dtype=bool)
+        keep[[self._row_of[id] for id in dropped]] = False
+        kept_size = int(np.count_nonzero(keep))
+        for column in self._columns():
+            column[:kept_size] = column[:self._size][keep]
+        self._ids = [id for id in self._ids if id not in dropped]
+        self._id_index.removeMany(dropped)
+        self._row_of = {id: row for row, id in enumerate(self._ids)}
+        self._size = kept_size
+        if before is not None:
+            self._publishDeletes(before)
+
+    def count(self) -> int:
+        return self._size
+
+    def exists(self, id: str) -> bool:
+        return id in self._row_of
+
+    def readSnapshot(self, guard: Optional[Callable[[], ContextManager[Any]]] = None) -> RepositorySnapshot[Incident]:
+        raise NotImplementedError("Columnar repository does not support snapshots")
+
+    # ---------- Запросы IncidentRepository ----------
+
+    def findActive(self) -> List[Incident]:
+        """Найти активные инциденты"""
+        return list(self.iterActive())
+
+    def iterActive(self) -> Iterator[Incident]:
+        """Перебрать активные инциденты"""
+        codes = [_STATUS_CODES[status] for status in IncidentRepository.ACTIVE_STATUSES]
+        return self._iter_rows(np.flatnonzero(np.isin(self._status[:self._size], codes)))
+
+    def findByLocation(self, location: GeoPoint, radius: float = 1000.0) -> List[Incident]:
+        """Найти инциденты не дальше radius метров от указанной локации"""
+        return list(self.iterByLocation(location, radius))
+
+    def findByType(self, incident_type: IncidentType) -> List[Incident]:
+        """Найти инциденты по типу"""
+        return list(self.iterByType(incident_type))
+
+    def findInRange(self, start: datetime, end: datetime) -> List[Incident]:
+        """Найти инциденты с отметкой времени в диапазоне [start, end]"""
+        return list(self.iterInRange(start, end))
+
+    def iterByLocation(self, location: GeoPoint, radius: float = 1000.0) -> Iterator[Incident]:
+        """Перебрать инциденты не дальше radius метров от указанной локации"""
+        lat_min, lon_min, lat_max, lon_max = geo.bounding_box(location, radius)
+        x, y = self._x[:self._size], self._y[:self._size]
+        rows = np.flatnonzero((x >= lat_min) & (x <= lat_max) & (y >= lon_min) & (y <= lon_max))
+        rows = rows[geo.distances(location, x[rows], y[rows]) <= radius]
+        return self._iter_rows(rows)
+
+    def nearest(self, location: GeoPoint, k: int = 1, active_only: bool = False) -> List[Incident]:
+        """k ближайших к location инцидентов в порядке возрастания расстояния"""
+        rows = np.arange(self._size)
+        if active_only:
+            codes = [_STATUS_CODES[status] for status in IncidentRepository.ACTIVE_STATUSES]
+            rows = rows[np.isin(self._status[:self._size], codes)]
+        if k <= 0 or len(rows) == 0:
+            return []
+        meters = geo.distances(location, self._x[rows], self._y[rows])
+        if k < len(rows):
+            top = np.argpartition(meters, k - 1)[:k]
+            rows, meters = rows[top], meters[top]
+        return list(self._iter_rows(rows[np.argsort(meters, kind="stable")]))
+
+    def iterByType(self, incident_type: IncidentType) -> Iterator[Incident]:
+        """Перебрать инциденты по типу"""
+        return self._iter_rows(
+            np.flatnonzero(self._type[:self._size] == _TYPE_CODES[incident_type])
+        )
+
+    def iterInRange(self, start: datetime, end: datetime) -> Iterator[Incident]:
+        """Перебрать инциденты в диапазоне [start, end] в порядке времени"""
+        rows = np.flatnonzero(self._range_mask(start, end))
+        return self._iter_rows(rows[np.argsort(self._timestamp[rows], kind="stable")])
+
+    def countByStatus(self, status: IncidentStatus) -> int:
+        """Количество инцидентов с указанным статусом"""
+        return int(np.count_nonzero(self._status[:self._size] == _STATUS_CODES[status]))
+
+    def summarizeRange(self, start: datetime, end: datetime) -> Tuple[int, float]:
+        """Количество инцидентов и средняя тяжесть за период"""
+        mask = self._range_mask(start, end)
+        total = int(np.count_nonzero(mask))
+        if total == 0:
+            return 0, 0.0
+        return total, float(self._severity[:self._size][mask].mean())
+
+    def _range_mask(self, start: datetime, end: datetime) -> np.ndarray:
+        timestamps = self._timestamp[:self._size]
+        return (timestamps >= np.datetime64(start, "us")) & (timestamps <= np.datetime64(end, "us"))
@@ -0,0 +1,187 @@
+from typing import Any, Callable, ContextManager, Dict, Iterable, Iterator, List, Optional
+from contextlib import AbstractContextManager, contextmanager
+import threading
+from repository import Repository, RepositorySnapshot, ChangeEvent, Page, T
+
+# ==================== Блокировка чтения/записи ====================
+
+class ReadWriteLock:
+    """Блокировка чтения/записи с приоритетом писателей
+
+    Читатели работают параллельно, писатель получает исключительный доступ.
+    Ожидающий писатель не пропускает новых читателей вперед себя.
+    Поток, держащий блокировку записи, может повторно брать и запись,
+    и чтение; повторное чтение под чтением не поддерживается.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer: Optional[int] = None  # ident потока-писателя
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """Захватить блокировку на чтение"""
+        if self._writer == threading.get_ident():
+            yield
+            return
+        with self._cond:
+            while self._writer is not None or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """Захватить блокировку на запись"""
+        me = threading.get_ident()
+        if self._writer == me:
+            yield
+            return
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer is not None or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = me
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = None
+                self._cond.notify_all()
+
+# ==================== Потокобезопасный репозиторий ====================
+
+# Префиксы методов конкретных репозиториев, которые только читают данные
+_READ_PREFIXES = ("get", "find", "iter", "page", "count", "summarize", "exists", "nearest")
+
+class ConcurrentRepository(Repository[T]):
+    """Потокобезопасная обертка над любым репозиторием
+
+    Чтения (getById, getAll, find*, count*...) выполняются параллельно под
+    блокировкой чтения, записи - под блокировкой записи. modify() выполняет
+    чтение, изменение и сохранение объекта как одну атомарную операцию.
+    Методы конкретного репозитория, которых нет в Repository, доступны
+    через обертку: find*/get*/count* - как чтения, остальные - как записи.
+    Итераторы iter* материализуются под блокировкой чтения. Методы, которые
+    возвращают контекстный менеджер, через обертку не пробрасываются:
+    блокировка снялась бы до входа в блок. Транзакции - через batch().
+
+    Объекты, выданные наружу, не защищены: изменять их нужно через modify().
+    """
+
+    def __init__(self, repository: Repository[T]):
+        super().__init__()
+        self.repository = repository
+        self._lock = ReadWriteLock()
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.repository, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+        lock = self._lock.read if name.startswith(_READ_PREFIXES) else self._lock.write
+
+        def locked(*args: Any, **kwargs: Any) -> Any:
+            with lock():
+                result = attr(*args, **kwargs)
+                if isinstance(result, AbstractContextManager):
+                    raise TypeError(f"{name}() returns a context manager and cannot be "
+                                    f"called through ConcurrentRepository")
+                return iter(list(result)) if name.startswith("iter") else result
+        return locked
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Транзакция репозитория (SQLiteRepository.batch) под блокировкой записи на весь блок
+
+        Внутри блока этот же поток может читать и писать через обертку.
+        """
+        with self._lock.write():
+            with self.repository.batch():
+                yield
+
+    # ---------- Чтение ----------
+
+    def getById(self, id: str) -> Optional[T]:
+        with self._lock.read():
+            return self.repository.getById(id)
+
+    def getAll(self) -> List[T]:
+        with self._lock.read():
+            return self.repository.getAll()
+
+    def iterAll(self) -> Iterator[T]:
+        with self._lock.read():
+            return iter(self.repository.getAll())
+
+    def page(self, limit: int = 50, after_id: Optional[str] = None) -> Page[T]:
+        with self._lock.read():
+            return self.repository.page(limit, after_id)
+
+    def getMany(self, ids: Iterable[str]) -> Dict[str, T]:
+        with self._lock.read():
+            return self.repository.getMany(ids)
+
+    def count(self) -> int:
+        with self._lock.read():
+            return self.repository.count()
+
+    def exists(self, id: str) -> bool:
+        with self._lock.read():
+            return self.repository.exists(id)
+
+    def subscribe(self, callback: Callable[[ChangeEvent[T]], None]) -> None:
+        """Подписаться на события: callback вызывается под блокировкой записи"""
+        with self._lock.write():
+            self.repository.subscribe(callback)
+
+    def unsubscribe(self, callback: Callable[[ChangeEvent[T]], None]) -> None:
+        with self._lock.write():
+            self.repository.unsubscribe(callback)
+
+    def readSnapshot(self, guard: Optional[Callable[[], ContextManager[Any]]] = None) -> RepositorySnapshot[T]:
+        """Открыть снимок: запросы к нему берут блокировку чтения только на сбор версий"""
+        with self._lock.write():
+            return self.repository.readSnapshot(guard or self._lock.read)
+
+    # ---------- Запись ----------
+
+    def add(self, id: str, obj: T) -> None:
+        with self._lock.write():
+            self.repository.add(id, obj)
+
+    def update(self, id: str, obj: T) -> None:
+        with self._lock.write():
+            self.repository.update(id, obj)
+
+    def delete(self, id: str) -> None:
+        with self._lock.write():
+            self.repository.delete(id)
+
+    def addMany(self, items: Dict[str, T]) -> None:
+        with self._lock.write():
+            self.repository.addMany(items)
+
+    def updateMany(self, items: Dict[str, T]) -> None:
+        with self._lock.write():
+            self.repository.updateMany(items)
+
+    def deleteMany(self, ids: Iterable[str]) -> None:
+        with self._lock.write():
+            self.repository.deleteMany(ids)
+
+    def modify(self, id: str, mutator: Callable[[T], None]) -> Optional[T]:
+        """Атомарно получить, изменить и сохранить объект
+
+        mutator не должен обращаться к этому же репозиторию.
+        """
+        with self._lock.write():
+            return self.repository.modify(id, mutator)
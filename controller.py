@@ -1,13 +1,14 @@
-from typing import Optional, Any, Dict, List
+from typing import Optional, Any, Dict, Iterator, List, Tuple
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from model import (
     Incident, IncidentType, IncidentStatus, Phase, Status,
-    GeoPoint, TrafficData, TrafficLight, DateRange
+    GeoPoint, TrafficData, TrafficLight, DateRange, GreenwaveStrategy
 )
 from view import DashboardView, IncidentView, ReportView, ControlPanelView, IView
 from repository import (
     IncidentRepository, TrafficLightRepository, 
-    UserRepository, RepositoryFactory
+    UserRepository, RepositoryFactory, Page
 )
 from datetime import datetime, timedelta
 
@@ -63,20 +64,11 @@ class IncidentController(AbstractController):
     
     def createIncident(self, data: IncidentData) -> Incident:
         """Create a new incident"""
-        print(f"Creating incident with ID: {data.incident_id}")
-        
-        incident = Incident(
-            incidentId=data.incident_id,
-            type=data.type,
-            location=data.location,
-            severity=data.severity,
-            timestamp=datetime.now()
-        )
-        
+        incident = self._buildIncident(data)
         self.incidentRepo.add(incident.incidentId, incident)
         
         # Update view
-        self.incidentView.displayAlert(f"New incident created: {data.incident_id}")
+        self.incidentView.displayAlert(f"New incident created: {incident.incidentId}")
         self.incidentView.incidentList.append(incident.incidentId)
         self.incidentView.update()
         
@@ -86,11 +78,10 @@ class IncidentController(AbstractController):
         """Verify an incident"""
         print(f"Verifying incident: {incident_id}")
         
-        incident = self.incidentRepo.getById(incident_id)
+        incident = self.incidentRepo.modify(
+            incident_id, lambda incident: incident.updateStatus(IncidentStatus.CONFIRMED)
+        )
         if incident:
-            incident.updateStatus(IncidentStatus.CONFIRMED)
-            self.incidentRepo.update(incident_id, incident)
-            
             # Update view
             self.incidentView.displayAlert(f"Incident {incident_id} verified")
             self.incidentView.update()
@@ -103,11 +94,10 @@ class IncidentController(AbstractController):
         """Close an incident"""
         print(f"Closing incident: {incident_id}")
         
-        incident = self.incidentRepo.getById(incident_id)
+        incident = self.incidentRepo.modify(
+            incident_id, lambda incident: incident.updateStatus(IncidentStatus.RESOLVED)
+        )
         if incident:
-            incident.updateStatus(IncidentStatus.RESOLVED)
-            self.incidentRepo.update(incident_id, incident)
-            
             # Update view
             if incident_id in self.incidentView.incidentList:
                 self.incidentView.incidentList.remove(incident_id)
@@ -118,22 +108,53 @@ class IncidentController(AbstractController):
         self.incidentView.displayAlert(f"Incident {incident_id} not found")
         return False
     
+    def listIncidents(self, limit: int = 50, after_id: Optional[str] = None) -> Page[Incident]:
+        """Show one page of incidents ordered by ID"""
+        page = self.incidentRepo.page(limit, after_id)
+        
+        # Update view
+        self.incidentView.displayPage([incident.incidentId for incident in page.items],
+                                      page.next_after_id)
+        self.incidentView.update()
+        
+        return page
+    
+    def _buildIncident(self, data: IncidentData) -> Incident:
+        """Create the Incident object for new incident data"""
+        print(f"Creating incident with ID: {data.incident_id}")
+        
+        return Incident(
+            incidentId=data.incident_id,
+            type=data.type,
+            location=data.location,
+            severity=data.severity,
+            timestamp=datetime.now()
+        )
+    
+    def _parseIncidentData(self, req: Request) -> IncidentData:
+        """Build IncidentData from a POST /incidents request"""
+        return IncidentData(
+            incident_id=req.data.get("id", f"INC_{datetime.now().timestamp():.0f}"),
+            type=IncidentType(req.data.get("type", "other")),
+            location=GeoPoint(
+                x=float(req.data.get("location_x", 0.0)),
+                y=float(req.data.get("location_y", 0.0))
+            ),
+            severity=int(req.data.get("severity", 1)),
+            description=req.data.get("description", "")
+        )
+    
     def handleRequest(self, req: Request) -> Optional[Any]:
         """Handle HTTP request for incidents"""
         print(f"Handling incident request: {req.method} {req.path}")
         
         if req.method == "POST" and req.path == "/incidents":
-            incident_data = IncidentData(
-                incident_id=req.data.get("id", f"INC_{datetime.now().timestamp():.0f}"),
-                type=IncidentType(req.data.get("type", "other")),
-                location=GeoPoint(
-                    x=float(req.data.get("location_x", 0.0)),
-                    y=float(req.data.get("location_y", 0.0))
-                ),
-                severity=int(req.data.get("severity", 1)),
-                description=req.data.get("description", "")
-            )
-            return self.createIncident(incident_data)
+            return self.createIncident(self._parseIncidentData(req))
+        
+        elif req.method == "GET" and req.path == "/incidents":
+            # page() rejects limits below 1 with ValueError
+            limit = int(req.data.get("limit", 50))
+            return self.listIncidents(limit, req.data.get("after_id"))
         
         elif req.method == "PUT" and "/incidents/" in req.path:
             incident_id = req.path.split("/")[-1]
@@ -154,6 +175,8 @@ class IncidentController(AbstractController):
 class TrafficController(AbstractController):
     """Controller for managing traffic lights"""
     
+    GREEN_WAVE_SPEED = 50  # km/h
+    
     def __init__(self, light_repo: TrafficLightRepository, dashboard_view: DashboardView):
         self.lightRepo = light_repo
         self.dashboardView = dashboard_view
@@ -168,16 +191,24 @@ class TrafficController(AbstractController):
             if light:
                 route_lights.append(light)
         
+        return self._applyGreenWave(route_id, route_lights)
+    
+    def _applyGreenWave(self, route_id: str, route_lights: List[TrafficLight]) -> bool:
+        """Show the green wave for the lights found on the route"""
         if not route_lights:
             print(f"⚠️ No valid lights found for route {route_id}")
             return False
         
+        strategy = GreenwaveStrategy(route_id, route_lights, self.GREEN_WAVE_SPEED)
+        offsets = strategy.offsets()
+        
         # Update dashboard
         route_points = [light.location for light in route_lights]
         self.dashboardView.highlightRoute(route_points)
         self.dashboardView.update()
         
-        print(f"✅ Green wave set for {len(route_lights)} traffic lights")
+        print(f"✅ Green wave set for {len(route_lights)} traffic lights: "
+              f"{strategy.routeLength():.0f} m, last light +{offsets[-1]:.0f} s")
         return True
     
     def optimizePhases(self, junction_id: str) -> Dict[str, Any]:
@@ -191,31 +222,33 @@ class TrafficController(AbstractController):
         
         results = {}
         for light in junction_lights:
-            current_status = light.getStatusUp()
-            if current_status == Status.OPERATIONAL:
-                hour = datetime.now().hour
-                if 7 <= hour <= 9 or 16 <= hour <= 18:
-                    light.setPhaseUpdate(Phase.GREEN, 45)
-                else:
-                    light.setPhaseUpdate(Phase.GREEN, 30)
-                
-                results[light.lightId] = {
-                    "new_phase": light.currentPhase.value,
-                    "duration": light.phaseDuration
-                }
+            if light.getStatusUp() == Status.OPERATIONAL:
+                light = self.lightRepo.modify(light.lightId, self._setGreenPhase)
+                if light:
+                    results[light.lightId] = {
+                        "new_phase": light.currentPhase.value,
+                        "duration": light.phaseDuration
+                    }
         
         print(f"✅ Phases optimized for {len(results)} lights at junction {junction_id}")
         return results
     
+    def _setGreenPhase(self, light: TrafficLight) -> None:
+        """Switch a light to green for the current traffic period"""
+        hour = datetime.now().hour
+        if 7 <= hour <= 9 or 16 <= hour <= 18:
+            light.setPhaseUpdate(Phase.GREEN, 45)
+        else:
+            light.setPhaseUpdate(Phase.GREEN, 30)
+    
     def manualSwitch(self, light_id: str, phase: Phase, duration: int) -> bool:
         """Manually switch a traffic light phase"""
         print(f"Manually switching light {light_id} to phase {phase.value}")
         
-        light = self.lightRepo.getById(light_id)
+        light = self.lightRepo.modify(
+            light_id, lambda light: light.setPhaseUpdate(phase, duration)
+        )
         if light:
-            light.setPhaseUpdate(phase, duration)
-            self.lightRepo.update(light_id, light)
-            
             # Update dashboard
             self.dashboardView.showTrafficJamLocation(light.location)
             self.dashboardView.update()
@@ -265,29 +298,44 @@ class ReportController(AbstractController):
         """Generate monthly traffic report"""
         print(f"Generating monthly report for {month}/{year}")
         
-        # Calculate date range
+        start_date, end_date = self._monthRange(month, year)
+        
+        # Calculate statistics for the period
+        total_incidents, avg_congestion = self._summarizePeriod(start_date, end_date)
+        
+        return self._buildMonthlyReport(month, year, start_date, end_date,
+                                        total_incidents, avg_congestion)
+    
+    def _summarizePeriod(self, start_date: datetime, end_date: datetime) -> Tuple[int, float]:
+        """Incident count and average severity for the period, read from one snapshot"""
+        with self._incidentView() as incidents:
+            return incidents.summarizeRange(start_date, end_date)
+    
+    @contextmanager
+    def _incidentView(self) -> Iterator[Any]:
+        """Point-in-time snapshot of incidents, or the live repository if snapshots are unsupported"""
+        try:
+            snapshot = self.incidentRepo.readSnapshot()
+        except NotImplementedError:
+            yield self.incidentRepo
+            return
+        try:
+            yield snapshot
+        finally:
+            snapshot.close()
+    
+    def _monthRange(self, month: int, year: int) -> Tuple[datetime, datetime]:
+        """First and last day of the month"""
         start_date = datetime(year, month, 1)
         if month == 12:
             end_date = datetime(year + 1, 1, 1) - timedelta(days=1)
         else:
             end_date = datetime(year, month + 1, 1) - timedelta(days=1)
-        
-        date_range = DateRange(start_date, end_date)
-        
-        # Get incidents for the period
-        all_incidents = self.incidentRepo.getAll()
-        period_incidents = [
-            incident for incident in all_incidents
-            if start_date <= incident.timestamp <= end_date
-        ]
-        
-        # Calculate statistics
-        total_incidents = len(period_incidents)
-        if period_incidents:
-            avg_congestion = sum(incident.severity for incident in period_incidents) / total_incidents
-        else:
-            avg_congestion = 0
-        
+        return start_date, end_date
+    
+    def _buildMonthlyReport(self, month: int, year: int, start_date: datetime, end_date: datetime,
+                            total_incidents: int, avg_congestion: float) -> Report:
+        """Create the report from period statistics and update the view"""
         # Create report
         report_id = f"REPORT_{year}_{month:02d}"
         report_content = f"Monthly Traffic Report\nPeriod: {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}\nTotal Incidents: {total_incidents}\nAverage Severity: {avg_congestion:.1f}/5"
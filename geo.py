@@ -0,0 +1,121 @@
+from typing import TYPE_CHECKING, Iterable, Sequence, Tuple, Union
+import math
+import numpy as np
+
+if TYPE_CHECKING:
+    from model import GeoPoint
+
+# ==================== Геодезические расстояния ====================
+
+# Координаты GeoPoint: x - широта, y - долгота, в градусах. Все расстояния в метрах.
+
+EARTH_RADIUS_M = 6_371_008.8
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+
+ArrayLike = Union[float, np.ndarray]
+
+def haversine(lat1: ArrayLike, lon1: ArrayLike, lat2: ArrayLike, lon2: ArrayLike) -> ArrayLike:
+    """Расстояние по большому кругу; аргументы - числа или массивы NumPy с broadcasting"""
+    lat1, lon1, lat2, lon2 = (np.radians(value) for value in (lat1, lon1, lat2, lon2))
+    h = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+
+def distance(a: "GeoPoint", b: "GeoPoint") -> float:
+    """Расстояние между двумя точками (без NumPy: для одиночных пар это быстрее)"""
+    lat1, lat2 = math.radians(a.x), math.radians(b.x)
+    h = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin(math.radians(b.y - a.y) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(min(h, 1.0)))
+
+def coordinates(points: Iterable["GeoPoint"]) -> Tuple[np.ndarray, np.ndarray]:
+    """Массивы широт и долгот точек"""
+    points = list(points)
+    lats = np.fromiter((point.x for point in points), dtype=np.float64, count=len(points))
+    lons = np.fromiter((point.y for point in points), dtype=np.float64, count=len(points))
+    return lats, lons
+
+def distances(origin: "GeoPoint", lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Расстояния от origin до точек с координатами (lats, lons)"""
+    return haversine(origin.x, origin.y, lats, lons)
+
+def distance_matrix(a: Sequence["GeoPoint"], b: Sequence["GeoPoint"]) -> np.ndarray:
+    """Матрица расстояний len(a) x len(b)"""
+    lats_a, lons_a = coordinates(a)
+    lats_b, lons_b = coordinates(b)
+    return haversine(lats_a[:, None], lons_a[:, None], lats_b[None, :], lons_b[None, :])
+
+def path_lengths(points: Sequence["GeoPoint"]) -> np.ndarray:
+    """Длины отрезков ломаной: от points[i] до points[i + 1]"""
+    lats, lons = coordinates(points)
+    return haversine(lats[:-1], lons[:-1], lats[1:], lons[1:])
+
+# ==================== Области и оценки ====================
+
+def bounding_box(center: "GeoPoint", radius: float) -> Tuple[float, float, float, float]:
+    """Прямоугольник (lat_min, lon_min, lat_max, lon_max), содержащий круг радиуса radius"""
+    dlat = math.degrees(radius / EARTH_RADIUS_M)
+    lat_min, lat_max = center.x - dlat, center.x + dlat
+    if lat_min <= -90 or lat_max >= 90:
+        return max(lat_min, -90.0), -180.0, min(lat_max, 90.0), 180.0
+    # Наибольшее расхождение по долготе - на широте, где круг касается меридиана
+    ratio = math.sin(radius / EARTH_RADIUS_M) / math.cos(math.radians(center.x))
+    if ratio >= 1:
+        return lat_min, -180.0, lat_max, 180.0
+    dlon = math.degrees(math.asin(ratio))
+    return lat_min, center.y - dlon, lat_max, center.y + dlon
+
+def min_distance_to_box(point: "GeoPoint", lat_min: float, lon_min: float,
+                        lat_max: float, lon_max: float) -> float:
+    """Нижняя оценка расстояния от point до любой точки прямоугольника
+
+    Следует из формулы гаверсинуса: hav(d) >= hav(dlat) + cos^2(max |lat|) * hav(dlon),
+    где dlat и dlon - зазоры между точкой и прямоугольником.
+    """
+    gap_lat = math.radians(max(lat_min - point.x, 0.0, point.x - lat_max))
+    gap_lon = math.radians(max(lon_min - point.y, 0.0, point.y - lon_max))
+    if gap_lat == 0.0 and gap_lon == 0.0:
+        return 0.0
+    widest = math.radians(max(abs(point.x), abs(lat_min), abs(lat_max)))
+    h = math.sin(gap_lat / 2) ** 2 + math.cos(widest) ** 2 * math.sin(min(gap_lon, math.pi) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(min(h, 1.0)))
+
+# ==================== Единичные векторы ====================
+
+def unit_vectors(lats: np.ndarray, lons: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Точки сферы как единичные векторы (x, y, z)
+
+    Длина хорды между векторами монотонна по расстоянию по большому кругу,
+    поэтому поиск ближайших по хорде дает тот же порядок, что и haversine.
+    """
+    lats, lons = np.radians(lats), np.radians(lons)
+    cos_lat = np.cos(lats)
+    return cos_lat * np.cos(lons), cos_lat * np.sin(lons), np.sin(lats)
+
+def chord_to_distance(chord: ArrayLike) -> ArrayLike:
+    """Расстояние по большому кругу для хорды между единичными векторами"""
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.minimum(np.asarray(chord) / 2, 1.0))
+
+# ==================== Локальная проекция ====================
+
+class LocalProjection:
+    """Равнопромежуточная проекция на метрическую плоскость вокруг origin
+
+    Для областей размером с город погрешность расстояний - доли процента;
+    после проекции расстояния считаются как на плоскости.
+    """
+
+    def __init__(self, origin: "GeoPoint"):
+        self.origin = origin
+        self._kx = METERS_PER_DEGREE
+        self._ky = METERS_PER_DEGREE * math.cos(math.radians(origin.x))
+
+    def project(self, lats: ArrayLike, lons: ArrayLike) -> Tuple[ArrayLike, ArrayLike]:
+        """Координаты в метрах (к северу, к востоку) относительно origin"""
+        return ((np.asarray(lats) - self.origin.x) * self._kx,
+                (np.asarray(lons) - self.origin.y) * self._ky)
+
+    def unproject(self, north: ArrayLike, east: ArrayLike) -> Tuple[ArrayLike, ArrayLike]:
+        """Обратное преобразование в широты и долготы"""
+        return (self.origin.x + np.asarray(north) / self._kx,
+                self.origin.y + np.asarray(east) / self._ky)
@@ -0,0 +1,342 @@
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+from bisect import bisect_left, bisect_right
+import heapq
+import math
+import threading
+import numpy as np
+import geo
+from model import GeoPoint
+
+# ==================== Пространственный индекс ====================
+
+class SpatialGridIndex:
+    """Равномерная сетка для поиска точек в радиусе
+
+    Ячейки задаются в градусах (cell_size), радиус запроса - в метрах.
+    """
+
+    def __init__(self, cell_size: float = 0.01):
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], Dict[str, GeoPoint]] = {}
+        self._cell_of: Dict[str, Tuple[int, int]] = {}
+
+    def _cell(self, point: GeoPoint) -> Tuple[int, int]:
+        """Получить координаты ячейки для точки"""
+        return (math.floor(point.x / self.cell_size),
+                math.floor(point.y / self.cell_size))
+
+    def insert(self, id: str, point: GeoPoint) -> None:
+        """Добавить или переместить точку"""
+        self.remove(id)
+        cell = self._cell(point)
+        self._cells.setdefault(cell, {})[id] = point
+        self._cell_of[id] = cell
+
+    def remove(self, id: str) -> None:
+        """Удалить точку по ID"""
+        cell = self._cell_of.pop(id, None)
+        if cell is None:
+            return
+        bucket = self._cells[cell]
+        del bucket[id]
+        if not bucket:
+            del self._cells[cell]
+
+    def query(self, center: GeoPoint, radius: float) -> List[str]:
+        """Найти ID точек на расстоянии не больше radius метров от center"""
+        lat_min, lon_min, lat_max, lon_max = geo.bounding_box(center, radius)
+        min_x, min_y = self._cell(GeoPoint(lat_min, lon_min))
+        max_x, max_y = self._cell(GeoPoint(lat_max, lon_max))
+
+        # Для очень больших радиусов дешевле пройти по занятым ячейкам
+        if (max_x - min_x + 1) * (max_y - min_y + 1) > len(self._cells):
+            buckets = [bucket for (cx, cy), bucket in self._cells.items()
+                       if min_x <= cx <= max_x and min_y <= cy <= max_y]
+        else:
+            buckets = []
+            for cx in range(min_x, max_x + 1):
+                for cy in range(min_y, max_y + 1):
+                    bucket = self._cells.get((cx, cy))
+                    if bucket:
+                        buckets.append(bucket)
+
+        candidates = [(id, point) for bucket in buckets for id, point in bucket.items()]
+        lats, lons = geo.coordinates(point for _, point in candidates)
+        within = geo.distances(center, lats, lons) <= radius
+        return [id for (id, _), inside in zip(candidates, within) if inside]
+
+    def __len__(self) -> int:
+        return len(self._cell_of)
+
+# ==================== Индекс по значению ====================
+
+class HashIndex:
+    """Индекс по значению атрибута: ключ -> упорядоченное множество ID"""
+
+    def __init__(self):
+        self._buckets: Dict[Hashable, Dict[str, None]] = {}
+        self._key_of: Dict[str, Hashable] = {}
+
+    def insert(self, id: str, key: Hashable) -> None:
+        """Добавить ID под ключом (или перенести под новый ключ)"""
+        if id in self._key_of:
+            if self._key_of[id] == key:
+                return
+            self.remove(id)
+        self._buckets.setdefault(key, {})[id] = None
+        self._key_of[id] = key
+
+    def remove(self, id: str) -> None:
+        """Удалить ID из индекса"""
+        if id not in self._key_of:
+            return
+        key = self._key_of.pop(id)
+        bucket = self._buckets[key]
+        del bucket[id]
+        if not bucket:
+            del self._buckets[key]
+
+    def get(self, key: Hashable) -> List[str]:
+        """Получить ID с указанным ключом"""
+        return list(self._buckets.get(key, ()))
+
+    def count(self, key: Hashable) -> int:
+        """Количество ID с указанным ключом"""
+        return len(self._buckets.get(key, ()))
+
+    def __len__(self) -> int:
+        return len(self._key_of)
+
+# ==================== Упорядоченный индекс ====================
+
+class SortedIndex:
+    """Индекс, упорядоченный по ключу, для запросов по диапазону"""
+
+    # Начиная с этого размера пакет вливается пересортировкой, а не вставками
+    _BULK_THRESHOLD = 64
+
+    def __init__(self):
+        self._keys: List[Any] = []
+        self._ids: List[str] = []
+        self._key_of: Dict[str, Any] = {}
+
+    def insert(self, id: str, key: Any) -> None:
+        """Добавить ID с ключом (или переставить при смене ключа)"""
+        if id in self._key_of:
+            if self._key_of[id] == key:
+                return
+            self.remove(id)
+        pos = bisect_right(self._keys, key)
+        self._keys.insert(pos, key)
+        self._ids.insert(pos, id)
+        self._key_of[id] = key
+
+    def remove(self, id: str) -> None:
+        """Удалить ID из индекса"""
+        if id not in self._key_of:
+            return
+        key = self._key_of.pop(id)
+        lo = bisect_left(self._keys, key)
+        hi = bisect_right(self._keys, key)
+        pos = self._ids.index(id, lo, hi)
+        del self._keys[pos]
+        del self._ids[pos]
+
+    def insertMany(self, items: Iterable[Tuple[str, Any]]) -> None:
+        """Добавить пары (ID, ключ) одним слиянием вместо вставки по одной"""
+        items = list(items)
+        moved = [id for id, key in items if id in self._key_of and self._key_of[id] != key]
+        self.removeMany(moved)
+        added = []
+        for id, key in items:
+            if id not in self._key_of:
+                self._key_of[id] = key
+                added.append((key, id))
+        if len(added) <= self._BULK_THRESHOLD:
+            for key, id in added:
+                pos = bisect_right(self._keys, key)
+                self._keys.insert(pos, key)
+                self._ids.insert(pos, id)
+            return
+        added.sort(key=lambda entry: entry[0])
+        if not self._keys or not added[0][0] < self._keys[-1]:
+            # Ключи пакета не меньше уже имеющихся: достаточно дописать в конец
+            self._keys.extend(key for key, _ in added)
+            self._ids.extend(id for _, id in added)
+            return
+        merged = list(zip(self._keys, self._ids))
+        merged.extend(added)
+        merged.sort(key=lambda entry: entry[0])
+        self._keys = [key for key, _ in merged]
+        self._ids = [id for _, id in merged]
+
+    def removeMany(self, ids: Iterable[str]) -> None:
+        """Удалить несколько ID за один проход"""
+        dropped = {id for id in ids if id in self._key_of}
+        if len(dropped) <= self._BULK_THRESHOLD:
+            for id in dropped:
+                self.remove(id)
+            return
+        for id in dropped:
+            del self._key_of[id]
+        kept = [(key, id) for key, id in zip(self._keys, self._ids) if id not in dropped]
+        self._keys = [key for key, _ in kept]
+        self._ids = [id for _, id in kept]
+
+    def after(self, key: Optional[Any], limit: int) -> List[str]:
+        """Первые limit ID с ключом строго больше key (с начала, если key=None)"""
+        pos = 0 if key is None else bisect_right(self._keys, key)
+        return self._ids[pos:pos + limit]
+
+    def range(self, start: Any, end: Any) -> List[str]:
+        """ID с ключами в диапазоне [start, end] в порядке возрастания ключа"""
+        lo = bisect_left(self._keys, start)
+        hi = bisect_right(self._keys, end)
+        return self._ids[lo:hi]
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+# ==================== KD-дерево ====================
+
+def _unit_vectors(points: Iterable[GeoPoint]) -> np.ndarray:
+    """Массив 3 x n единичных векторов точек"""
+    return np.array(geo.unit_vectors(*geo.coordinates(points))).reshape(3, -1)
+
+class _KDState:
+    """Неизменяемое дерево вместе с накопленными после его построения изменениями"""
+
+    def __init__(self, ids: List[str], coords: np.ndarray, splits: np.ndarray):
+        self.ids = ids
+        self.coords = coords
+        self.splits = splits  # splits[mid] - разделяющее значение узла с серединой mid
+        self.in_tree = set(ids)
+        self.removed: set = set()
+        self.pending: Dict[str, GeoPoint] = {}
+        self.pending_arrays: Optional[Tuple[List[str], np.ndarray]] = None
+
+class KDTreeIndex:
+    """KD-дерево для поиска k ближайших точек по расстоянию на сфере
+
+    Точки хранятся единичными векторами в трехмерном пространстве: порядок
+    по длине хорды совпадает с порядком по расстоянию по большому кругу.
+    Дерево строится пакетно по массивам NumPy: узлы делят диапазон точек
+    пополам по медиане, в листьях лежит до _LEAF_SIZE точек. Вставки
+    копятся в буфере, который просматривается перебором, удаленные точки
+    дерева пропускаются при поиске. Когда буфер и удаления вместе
+    превышают долю дерева, оно перестраивается при следующем запросе.
+    Перестроенное дерево подменяется целиком, поэтому параллельные
+    запросы (при отсутствии параллельных записей) безопасны.
+    """
+
+    _LEAF_SIZE = 32
+    _MIN_REBUILD = 256
+
+    def __init__(self):
+        self._state = _KDState([], np.empty((3, 0)), np.empty(0))
+        self._rebuild_lock = threading.Lock()
+
+    def insert(self, id: str, point: GeoPoint) -> None:
+        """Добавить или переместить точку"""
+        state = self._state
+        if id in state.in_tree:
+            state.removed.add(id)
+        state.pending[id] = point
+        state.pending_arrays = None
+
+    def remove(self, id: str) -> None:
+        """Удалить точку по ID"""
+        state = self._state
+        if id in state.in_tree:
+            state.removed.add(id)
+        if state.pending.pop(id, None) is not None:
+            state.pending_arrays = None
+
+    def __len__(self) -> int:
+        state = self._state
+        return len(state.in_tree) - len(state.removed) + len(state.pending)
+
+    def rebuild(self) -> None:
+        """Перестроить дерево по всем текущим точкам"""
+        with self._rebuild_lock:
+            state = self._state
+            if not state.removed and not state.pending:
+                return
+            alive = [i for i, id in enumerate(state.ids) if id not in state.removed]
+            ids = [state.ids[i] for i in alive] + list(state.pending)
+            coords = np.concatenate([state.coords[:, alive], _unit_vectors(state.pending.values())], axis=1)
+            order = np.arange(len(ids))
+            splits = np.empty(len(ids))
+            stack = [(0, len(ids), 0)]
+            while stack:
+                lo, hi, axis = stack.pop()
+                if hi - lo <= self._LEAF_SIZE:
+                    continue
+                mid = (lo + hi) // 2
+                segment = order[lo:hi]
+                order[lo:hi] = segment[np.argpartition(coords[axis][segment], mid - lo)]
+                splits[mid] = coords[axis][order[mid]]
+                stack.append((lo, mid, (axis + 1) % 3))
+                stack.append((mid, hi, (axis + 1) % 3))
+            self._state = _KDState([ids[i] for i in order], coords[:, order], splits)
+
+    def nearest(self, point: GeoPoint, k: int = 1,
+                accept: Optional[Callable[[str], bool]] = None) -> List[Tuple[float, str]]:
+        """k ближайших к point точек как пары (расстояние в метрах, ID) по возрастанию расстояния
+
+        accept(ID) отбрасывает неподходящие точки прямо во время поиска.
+        """
+        if k <= 0:
+            return []
+        state = self._state
+        if len(state.pending) + len(state.removed) > max(self._MIN_REBUILD, len(state.ids) // 8):
+            self.rebuild()
+            state = self._state
+        lat, lon = math.radians(point.x), math.radians(point.y)
+        qx, qy, qz = math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat)
+        query = (qx, qy, qz)
+        tree_ids, tree_coords, splits, removed = state.ids, state.coords, state.splits, state.removed
+        best: List[Tuple[float, str]] = []  # max-куча по квадрату хорды: (-d2, ID)
+
+        def consider(coords: np.ndarray, ids: List[str], offset: int, skip: set) -> None:
+            dx = coords[0] - qx
+            dy = coords[1] - qy
+            dz = coords[2] - qz
+            d2 = dx * dx + dy * dy + dz * dz
+            bound = -best[0][0] if len(best) == k else math.inf
+            candidates = np.flatnonzero(d2 < bound)
+            for j in candidates[np.argsort(d2[candidates], kind="stable")]:
+                id = ids[offset + j]
+                if id in skip or (accept is not None and not accept(id)):
+                    continue
+                distance2 = float(d2[j])
+                if len(best) < k:
+                    heapq.heappush(best, (-distance2, id))
+                elif distance2 < -best[0][0]:
+                    heapq.heapreplace(best, (-distance2, id))
+                else:
+                    break
+
+        def search(lo: int, hi: int, axis: int) -> None:
+            if hi - lo <= self._LEAF_SIZE:
+                consider(tree_coords[:, lo:hi], tree_ids, lo, removed)
+                return
+            mid = (lo + hi) // 2
+            diff = query[axis] - splits[mid]
+            near, far = ((lo, mid), (mid, hi)) if diff < 0 else ((mid, hi), (lo, mid))
+            search(near[0], near[1], (axis + 1) % 3)
+            if len(best) < k or diff * diff < -best[0][0]:
+                search(far[0], far[1], (axis + 1) % 3)
+
+        if tree_ids:
+            search(0, len(tree_ids), 0)
+        if state.pending:
+            arrays = state.pending_arrays
+            if arrays is None:
+                arrays = (list(state.pending), _unit_vectors(state.pending.values()))
+                state.pending_arrays = arrays
+            ids, coords = arrays
+            consider(coords, ids, 0, frozenset())
+        return [(float(geo.chord_to_distance(math.sqrt(-d2))), id) for d2, id in sorted(best, reverse=True)]
@@ -0,0 +1,227 @@
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+import gc
+import mmap
+import os
+import pickle
+import struct
+import zlib
+from repository import UserRepository, IncidentRepository, TrafficLightRepository, T
+
+# ==================== Формат файлов ====================
+
+# Запись журнала: операция, длина ID, длина данных, CRC32(ID + данные)
+_RECORD_HEADER = struct.Struct("<BIII")
+_OP_PUT = 1
+_OP_DELETE = 2
+
+_SNAPSHOT_MAGIC = b"OMISSNAP1\n"
+
+# ==================== Журналируемый репозиторий ====================
+
+class LogPersistenceMixin:
+    """Хранение репозитория в append-only журнале со снимками
+
+    Каждая запись add/update/delete дописывается в журнал до изменения памяти.
+    Каждые snapshot_every записей состояние целиком сохраняется в снимок, а
+    журнал обнуляется. При запуске снимок читается через mmap, после чего
+    проигрывается только хвост журнала.
+
+    Изменения объекта на месте (например, Incident.updateStatus) попадают
+    на диск при следующем update().
+    """
+
+    SNAPSHOT_FILE = "snapshot.bin"
+    LOG_FILE = "wal.log"
+
+    def __init__(self, directory: str, snapshot_every: int = 100_000,
+                 fsync: bool = False, **kwargs: Any):
+        self._log_file = None
+        super().__init__(**kwargs)
+        os.makedirs(directory, exist_ok=True)
+        self._snapshot_path = os.path.join(directory, self.SNAPSHOT_FILE)
+        self._log_path = os.path.join(directory, self.LOG_FILE)
+        self._snapshot_every = snapshot_every
+        self._fsync = fsync
+        self._log_records = 0
+        self._recover()
+        self._log_file = open(self._log_path, "ab")
+
+    # ---------- Repository API ----------
+
+    def add(self, id: str, obj: T) -> None:
+        self._append(_OP_PUT, id, obj)
+        super().add(id, obj)
+        self._maybe_snapshot()
+
+    def update(self, id: str, obj: T) -> None:
+        if id in self._storage:
+            self._append(_OP_PUT, id, obj)
+            super().update(id, obj)
+            self._maybe_snapshot()
+
+    def delete(self, id: str) -> None:
+        if id in self._storage:
+            self._append(_OP_DELETE, id, None)
+            super().delete(id)
+            self._maybe_snapshot()
+
+    def addMany(self, items: Dict[str, T]) -> None:
+        self._appendMany([(_OP_PUT, id, obj) for id, obj in items.items()])
+        super().addMany(items)
+        self._maybe_snapshot()
+
+    def updateMany(self, items: Dict[str, T]) -> None:
+        existing = {id: obj for id, obj in items.items() if id in self._storage}
+        self._appendMany([(_OP_PUT, id, obj) for id, obj in existing.items()])
+        super().updateMany(existing)
+        self._maybe_snapshot()
+
+    def deleteMany(self, ids: Iterable[str]) -> None:
+        existing = [id for id in ids if id in self._storage]
+        self._appendMany([(_OP_DELETE, id, None) for id in existing])
+        super().deleteMany(existing)
+        self._maybe_snapshot()
+
+    # ---------- Журнал ----------
+
+    def _append(self, op: int, id: str, obj: Optional[T]) -> None:
+        self._appendMany([(op, id, obj)])
+
+    def _appendMany(self, records: Iterable[Tuple[int, str, Any]]) -> None:
+        """Дописать пакет записей одной операцией записи"""
+        if self._log_file is None:
+            return
+        data = [_encode_record(op, id, obj) for op, id, obj in records]
+        if not data:
+            return
+        self._log_file.write(b"".join(data))
+        self._log_file.flush()
+        if self._fsync:
+            os.fsync(self._log_file.fileno())
+        self._log_records += len(data)
+
+    def _maybe_snapshot(self) -> None:
+        if self._log_records >= self._snapshot_every:
+            self.snapshot()
+
+    def snapshot(self) -> None:
+        """Записать снимок текущего состояния и обнулить журнал"""
+        tmp_path = self._snapshot_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_SNAPSHOT_MAGIC)
+            pickle.dump(list(self._storage.items()), f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._snapshot_path)
+
+        # Сбой между заменой снимка и обнулением журнала безопасен:
+        # записи журнала идемпотентны и будут проиграны повторно
+        if self._log_file is not None:
+            self._log_file.close()
+        self._log_file = open(self._log_path, "wb")
+        self._log_records = 0
+
+    def close(self) -> None:
+        """Закрыть журнал"""
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
+
+    # ---------- Восстановление ----------
+
+    def _recover(self) -> None:
+        """Загрузить снимок и проиграть хвост журнала"""
+        # Загрузка создает миллионы объектов без циклов: сборщик мусора
+        # на это время отключается, иначе он многократно обходит всю кучу
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            self._replay()
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    def _replay(self) -> None:
+        super().addMany(dict(_load_snapshot(self._snapshot_path)))
+
+        if not os.path.exists(self._log_path):
+            return
+        # Подряд идущие записи PUT применяются одним пакетом
+        valid_end = 0
+        pending: Dict[str, Any] = {}
+        for op, id, obj, end in _read_log(self._log_path):
+            if op == _OP_PUT:
+                pending.pop(id, None)
+                pending[id] = obj
+            else:
+                super().addMany(pending)
+                pending = {}
+                super().delete(id)
+            valid_end = end
+            self._log_records += 1
+        super().addMany(pending)
+
+        # Отрезать недописанную запись, оставшуюся после сбоя
+        if valid_end < os.path.getsize(self._log_path):
+            with open(self._log_path, "r+b") as f:
+                f.truncate(valid_end)
+
+def _encode_record(op: int, id: str, obj: Any) -> bytes:
+    id_bytes = id.encode("utf-8")
+    payload = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL) if op == _OP_PUT else b""
+    crc = zlib.crc32(payload, zlib.crc32(id_bytes))
+    return _RECORD_HEADER.pack(op, len(id_bytes), len(payload), crc) + id_bytes + payload
+
+def _read_log(path: str) -> Iterator[Tuple[int, str, Any, int]]:
+    """Прочитать записи журнала: (операция, ID, объект, смещение конца записи)"""
+    with open(path, "rb") as f:
+        data = f.read()
+    offset = 0
+    while offset + _RECORD_HEADER.size <= len(data):
+        op, id_len, payload_len, crc = _RECORD_HEADER.unpack_from(data, offset)
+        start = offset + _RECORD_HEADER.size
+        end = start + id_len + payload_len
+        if end > len(data):
+            return
+        id_bytes = data[start:start + id_len]
+        payload = data[start + id_len:end]
+        if zlib.crc32(payload, zlib.crc32(id_bytes)) != crc:
+            return
+        obj = pickle.loads(payload) if op == _OP_PUT else None
+        yield op, id_bytes.decode("utf-8"), obj, end
+        offset = end
+
+def _load_snapshot(path: str) -> Iterator[Tuple[str, Any]]:
+    """Загрузить снимок через mmap, не копируя файл в память"""
+    if not os.path.exists(path) or os.path.getsize(path) <= len(_SNAPSHOT_MAGIC):
+        return iter(())
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:len(_SNAPSHOT_MAGIC)] != _SNAPSHOT_MAGIC:
+                raise ValueError(f"Not a repository snapshot: {path}")
+            with memoryview(mm) as view:
+                items = pickle.loads(view[len(_SNAPSHOT_MAGIC):])
+    return iter(items)
+
+# ==================== Конкретные репозитории ====================
+
+class LogUserRepository(LogPersistenceMixin, UserRepository):
+    """Пользователи с журналом и снимками на диске"""
+
+    def _initialize_sample_users(self) -> None:
+        """Состояние восстанавливается с диска"""
+        pass
+
+class LogIncidentRepository(LogPersistenceMixin, IncidentRepository):
+    """Инциденты с журналом и снимками на диске"""
+
+    def _initialize_sample_incidents(self) -> None:
+        """Состояние восстанавливается с диска"""
+        pass
+
+class LogTrafficLightRepository(LogPersistenceMixin, TrafficLightRepository):
+    """Светофоры с журналом и снимками на диске"""
+
+    def _initialize_sample_lights(self) -> None:
+        """Состояние восстанавливается с диска"""
+        pass
@@ -1,7 +1,11 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable
 from datetime import datetime, timedelta
 from enum import Enum
 from dataclasses import dataclass
+from functools import lru_cache
+from itertools import accumulate
+import sys
+import geo
 
 # ==================== Enums ====================
 
@@ -38,15 +42,47 @@ class SensorType(Enum):
 
 # ==================== Helper Classes ====================
 
-@dataclass
-class GeoPoint:
-    """Represents a geographic point"""
+class Slotted:
+    """Base for compact model classes that keep their attributes in __slots__
+
+    Pickled state stays a plain {attribute: value} dict, as it was before the
+    classes got __slots__, so previously saved objects still load. Attributes
+    listed in _TRANSIENT are not pickled; unknown attributes are skipped on load.
+    """
+    __slots__ = ()
+    _TRANSIENT: tuple = ()
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        state = {}
+        for name in _persistent_slots(type(self)):
+            try:
+                state[name] = getattr(self, name)
+            except AttributeError:
+                pass
+        return state
+    
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        names = _persistent_slots(type(self))
+        for name, value in state.items():
+            if name in names:
+                object.__setattr__(self, name, value)
+
+@lru_cache(maxsize=None)
+def _persistent_slots(cls: type) -> Dict[str, None]:
+    """Slots of cls and its bases that are pickled, in declaration order"""
+    return {name: None for klass in reversed(cls.__mro__) for name in getattr(klass, '__slots__', ())
+            if name not in cls._TRANSIENT}
+
+@dataclass(frozen=True)
+class GeoPoint(Slotted):
+    """Represents a geographic point: x - latitude, y - longitude (degrees)"""
+    __slots__ = ('x', 'y')
     x: float
     y: float
     
     def distance_to(self, other: 'GeoPoint') -> float:
-        """Calculate distance to another point"""
-        return ((self.x - other.x) ** 2 + (self.y - other.y) ** 2) ** 0.5
+        """Great-circle distance to another point in meters (x - latitude, y - longitude)"""
+        return geo.distance(self, other)
 
 @dataclass
 class DateRange:
@@ -54,12 +90,40 @@ class DateRange:
     start_date: datetime
     end_date: datetime
 
-class SensorData:
+class Observable(Slotted):
+    """Base class for model objects that notify subscribers after a state change
+
+    Subclasses declare an '_observers' slot; it is created on first subscribe().
+    """
+    __slots__ = ()
+    # Subscribers belong to the process that registered them
+    _TRANSIENT = ('_observers',)
+    
+    def subscribe(self, callback: Callable[[Any], None]) -> None:
+        """Call callback(self) after every state change"""
+        try:
+            self._observers.append(callback)
+        except AttributeError:
+            self._observers = [callback]
+    
+    def unsubscribe(self, callback: Callable[[Any], None]) -> None:
+        """Stop notifying callback"""
+        observers = getattr(self, '_observers', [])
+        if callback in observers:
+            observers.remove(callback)
+    
+    def _notify(self) -> None:
+        for callback in list(getattr(self, '_observers', ())):
+            callback(self)
+
+class SensorData(Slotted):
     """Data collected by sensor"""
+    __slots__ = ('value', 'timestamp', 'sensor_id')
+    
     def __init__(self, value: float, timestamp: datetime, sensor_id: str):
         self.value = value
         self.timestamp = timestamp
-        self.sensor_id = sensor_id
+        self.sensor_id = sys.intern(sensor_id)
 
 # ==================== Main Model Classes ====================
 
@@ -87,7 +151,9 @@ class Camera:
         """Perform license plate recognition and return result"""
         return f"PLATE_{datetime.now().timestamp():.0f}"
 
-class TrafficData:
+class TrafficData(Slotted):
+    __slots__ = ('flowRate', 'averageSpeed', 'congestionLevel')
+    
     def __init__(self, flowRate: float, averageSpeed: float, congestionLevel: int):
         self.flowRate = flowRate
         self.averageSpeed = averageSpeed
@@ -128,10 +194,12 @@ class AnalysisReport:
         print(f"Report generated: {filename}")
         return filename
 
-class Incident:
+class Incident(Observable):
+    __slots__ = ('incidentId', 'type', 'location', 'severity', 'timestamp', 'status', '_observers')
+    
     def __init__(self, incidentId: str, type: IncidentType, location: GeoPoint, 
                  severity: int, timestamp: datetime):
-        self.incidentId = incidentId
+        self.incidentId = sys.intern(incidentId)
         self.type = type
         self.location = location
         self.severity = severity
@@ -142,20 +210,29 @@ class Incident:
         """Update incident status"""
         self.status = status
         print(f"Incident {self.incidentId} status updated to: {status.value}")
+        self._notify()
 
-class TrafficLight:
-    def __init__(self, lightId: str, location: GeoPoint):
+class TrafficLight(Observable):
+    __slots__ = ('lightId', 'location', 'intersectionId', 'question_component',
+                 'currentPhase', 'phaseDuration', 'isOnline', 'confine', '_observers')
+    
+    def __init__(self, lightId: str, location: GeoPoint, intersectionId: str = "",
+                 question_component: str = "controller"):
         """
         Args:
             lightId: Идентификатор включения/активации светофора
             question_component: Компонент вопросов/управления
             location: Местоположение светофора
+            intersectionId: Идентификатор перекрестка, к которому относится светофор
         """
-        self.lightId: str = lightId 
+        self.lightId: str = sys.intern(lightId)
         self.location: GeoPoint = location
+        self.intersectionId: str = sys.intern(intersectionId)
+        self.question_component: str = sys.intern(question_component)
         self.currentPhase: Phase = Phase.RED
         self.phaseDuration: int = 0
         self.isOnline: bool = False
+        self.confine: bool = False
     
     def setPhaseUpdate(self, phase: Phase, duration: int) -> None:
         """
@@ -170,9 +247,10 @@ class TrafficLight:
             return
         
         self.currentPhase = phase
-        self.baseDataPosition = duration
+        self.phaseDuration = duration
         
         print(f"✅ Traffic light {self.lightId} phase updated to {phase.value} for {duration} seconds")
+        self._notify()
     
     def getStatusUp(self) -> Status:
         """
@@ -200,6 +278,7 @@ class TrafficLight:
         self.confine = confine
         status = "CONFINED" if confine else "RELEASED"
         print(f"🔒 Traffic light {self.lightId} {status}")
+        self._notify()
 
 class GreenwaveStrategy:
     def __init__(self, strategyId: str, route: List[TrafficLight], targetSpeed: int):
@@ -208,6 +287,20 @@ class GreenwaveStrategy:
         self.targetSpeed = targetSpeed
         self.isActive = False
     
+    def routeLength(self) -> float:
+        """Length of the route through all lights, in meters"""
+        if len(self.route) < 2:
+            return 0.0
+        return float(geo.path_lengths([light.location for light in self.route]).sum())
+    
+    def offsets(self) -> List[float]:
+        """Green start of each light relative to the first one, in seconds at targetSpeed"""
+        if len(self.route) < 2:
+            return [0.0] * len(self.route)
+        speed = self.targetSpeed / 3.6  # km/h -> m/s
+        lengths = geo.path_lengths([light.location for light in self.route])
+        return [travelled / speed for travelled in accumulate(lengths.tolist(), initial=0.0)]
+    
     def activate(self) -> None:
         """Activate the greenwave strategy"""
         if self.isActive:
@@ -216,7 +309,7 @@ class GreenwaveStrategy:
         
         self.isActive = True
         print(f"✅ Greenwave strategy {self.strategyId} activated")
-        print(f"   Route: {len(self.route)} traffic lights")
+        print(f"   Route: {len(self.route)} traffic lights, {self.routeLength():.0f} m")
         print(f"   Target speed: {self.targetSpeed} km/h")
     
     def deactivate(self) -> None:
@@ -1,20 +1,138 @@
-from typing import Dict, List, Optional, TypeVar, Generic, Any
+from typing import Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar, Generic, Any
 from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from enum import Enum
 from model import (
     TrafficLight, User, Incident, GeoPoint, 
     IncidentType, IncidentStatus, Phase, Status
 )
-from datetime import datetime
+from index import SpatialGridIndex, HashIndex, SortedIndex, KDTreeIndex
+from datetime import datetime, timedelta
+import copy
+import json
+import os
+import threading
+import weakref
 
 T = TypeVar('T')
 
+@dataclass
+class Page(Generic[T]):
+    """Страница результатов с курсором для запроса следующей"""
+    items: List[T] = field(default_factory=list)
+    next_after_id: Optional[str] = None
+
+# ==================== События изменений ====================
+
+class ChangeType(Enum):
+    ADDED = "added"
+    UPDATED = "updated"
+    DELETED = "deleted"
+
+@dataclass(frozen=True)
+class ChangeEvent(Generic[T]):
+    """Изменение объекта в репозитории
+
+    before - версия до изменения (None для ADDED, а также для UPDATED, когда
+    объект изменил себя сам, например через Incident.updateStatus),
+    after - версия после изменения (None для DELETED).
+    """
+    type: ChangeType
+    id: str
+    before: Optional[T] = None
+    after: Optional[T] = None
+
+# ==================== Снимки ====================
+
+class RepositorySnapshot(Generic[T]):
+    """Срез репозитория на момент создания, только для чтения
+
+    Снимок не копирует данные: пока он открыт, репозиторий перед каждой
+    записью сохраняет в снимок прежнюю версию объекта (copy-on-write), а
+    modify() изменяет копию объекта вместо общего экземпляра. Чтение
+    снимка берет прежнюю версию, если объект менялся, и текущую - если нет,
+    поэтому длинный отчет видит согласованные данные и не держит писателей.
+
+    Изменения объекта на месте в обход репозитория (Incident.updateStatus
+    у выданного объекта) снимком не отслеживаются. Снимок нужно закрыть
+    через close() или with, иначе каждая запись продолжит копить версии.
+    """
+
+    def __init__(self, repository: "Repository[T]",
+                 guard: Optional[Callable[[], ContextManager[Any]]] = None):
+        self._repository = repository
+        self._guard = guard or nullcontext
+        # ID -> версия на момент снимка (None - объекта тогда не было)
+        self._versions: Dict[str, Optional[T]] = {}
+        self.taken_at = datetime.now()
+
+    def __enter__(self) -> "RepositorySnapshot[T]":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Закрыть снимок: репозиторий перестает сохранять для него версии"""
+        self._repository._snapshots.discard(self)
+        self._versions = {}
+
+    def _preserve(self, ids: Iterable[str], storage: Dict[str, T]) -> None:
+        for id in ids:
+            if id not in self._versions:
+                self._versions[id] = storage.get(id)
+
+    def _resolve(self, id: str) -> Optional[T]:
+        # Текущая версия читается раньше сохраненной: запись сначала
+        # сохраняет прежнюю версию и только потом меняет хранилище
+        obj = self._repository._storage.get(id)
+        return self._versions.get(id, obj)
+
+    def _collect(self, ids: Callable[[], Iterable[str]]) -> List[T]:
+        """Версии снимка для ID-кандидатов из текущих индексов и всех измененных объектов"""
+        with self._guard():
+            candidates = dict.fromkeys(ids())
+            candidates.update(dict.fromkeys(self._versions))
+            found = [self._resolve(id) for id in candidates]
+        return [obj for obj in found if obj is not None]
+
+    def getById(self, id: str) -> Optional[T]:
+        """Получить объект по ID"""
+        with self._guard():
+            return self._resolve(id)
+
+    def getAll(self) -> List[T]:
+        """Получить все объекты"""
+        return self._collect(lambda: list(self._repository._storage))
+
+    def iterAll(self) -> Iterator[T]:
+        """Перебрать все объекты"""
+        return iter(self.getAll())
+
+    def count(self) -> int:
+        """Получить количество объектов"""
+        with self._guard():
+            storage = self._repository._storage
+            return len(storage) + sum((obj is not None) - (id in storage)
+                                      for id, obj in self._versions.items())
+
+    def exists(self, id: str) -> bool:
+        """Проверить существование объекта"""
+        return self.getById(id) is not None
+
 # ==================== Базовый репозиторий ====================
 
 class Repository(Generic[T], ABC):
     """Абстрактный базовый класс репозитория"""
     
+    SNAPSHOT_CLASS = RepositorySnapshot
+    
     def __init__(self):
         self._storage: Dict[str, T] = {}
+        self._id_index = SortedIndex()
+        self._snapshots: "weakref.WeakSet[RepositorySnapshot[T]]" = weakref.WeakSet()
+        self._subscribers: List[Callable[[ChangeEvent[T]], None]] = []
     
     def getById(self, id: str) -> Optional[T]:
         """Получить объект по ID"""
@@ -24,36 +142,191 @@ class Repository(Generic[T], ABC):
         """Получить все объекты"""
         return list(self._storage.values())
     
+    def iterAll(self) -> Iterator[T]:
+        """Перебрать все объекты без копирования (без записей во время перебора)"""
+        return iter(self._storage.values())
+    
+    def page(self, limit: int = 50, after_id: Optional[str] = None) -> Page[T]:
+        """Получить limit объектов в порядке ID, начиная после курсора after_id"""
+        self._checkPageLimit(limit)
+        ids = self._id_index.after(after_id, limit + 1)
+        return Page([self._storage[id] for id in ids[:limit]],
+                    ids[limit - 1] if len(ids) > limit else None)
+    
     def add(self, id: str, obj: T) -> None:
         """Добавить объект"""
+        self._preserve((id,))
+        before = self.getMany((id,)) if self._subscribers else None
+        if id in self._storage:
+            self._unindex(id, self._storage[id])
+        else:
+            self._id_index.insert(id, id)
         self._storage[id] = obj
+        self._index(id, obj)
+        if before is not None:
+            self._publishWrites({id: obj}, before)
     
     def update(self, id: str, obj: T) -> None:
         """Обновить объект"""
         if id in self._storage:
+            self._preserve((id,))
+            before = self._storage[id]
+            self._unindex(id, before)
             self._storage[id] = obj
+            self._index(id, obj)
+            if self._subscribers:
+                self._publishWrites({id: obj}, {id: before})
     
     def delete(self, id: str) -> None:
         """Удалить объект по ID"""
         if id in self._storage:
+            self._preserve((id,))
+            before = self._storage.pop(id)
+            self._unindex(id, before)
+            self._id_index.remove(id)
+            if self._subscribers:
+                self._publishDeletes({id: before})
+    
+    def modify(self, id: str, mutator: Callable[[T], None]) -> Optional[T]:
+        """Получить объект, изменить его и сохранить (None, если объекта нет)"""
+        obj = self.getById(id)
+        if obj is None:
+            return None
+        if self._snapshots or self._subscribers:
+            # Снимки и события ссылаются на текущий экземпляр - меняется копия
+            obj = copy.copy(obj)
+        mutator(obj)
+        self.update(id, obj)
+        return obj
+    
+    def getMany(self, ids: Iterable[str]) -> Dict[str, T]:
+        """Получить несколько объектов по ID (отсутствующие пропускаются)"""
+        return {id: self._storage[id] for id in ids if id in self._storage}
+    
+    def addMany(self, items: Dict[str, T]) -> None:
+        """Добавить несколько объектов, обновив индексы одним пакетом"""
+        self._preserve(items)
+        before = self.getMany(items) if self._subscribers else None
+        replaced = {id: self._storage[id] for id in items if id in self._storage}
+        if replaced:
+            self._unindexMany(replaced)
+        self._id_index.insertMany([(id, id) for id in items if id not in replaced])
+        self._storage.update(items)
+        self._indexMany(items)
+        if before is not None:
+            self._publishWrites(items, before)
+    
+    def updateMany(self, items: Dict[str, T]) -> None:
+        """Обновить несколько существующих объектов"""
+        existing = {id: obj for id, obj in items.items() if id in self._storage}
+        self._preserve(existing)
+        before = {id: self._storage[id] for id in existing}
+        self._unindexMany(before)
+        self._storage.update(existing)
+        self._indexMany(existing)
+        if self._subscribers:
+            self._publishWrites(existing, before)
+    
+    def deleteMany(self, ids: Iterable[str]) -> None:
+        """Удалить несколько объектов по ID"""
+        removed = {id: self._storage[id] for id in ids if id in self._storage}
+        self._preserve(removed)
+        self._unindexMany(removed)
+        self._id_index.removeMany(removed)
+        for id in removed:
             del self._storage[id]
+        if self._subscribers:
+            self._publishDeletes(removed)
     
     def count(self) -> int:
         """Получить количество объектов"""
         return len(self._storage)
     
+    def readSnapshot(self, guard: Optional[Callable[[], ContextManager[Any]]] = None) -> RepositorySnapshot[T]:
+        """Открыть снимок для согласованного чтения (guard - блокировка коротких чтений)"""
+        snapshot = self.SNAPSHOT_CLASS(self, guard)
+        self._snapshots.add(snapshot)
+        return snapshot
+    
     def exists(self, id: str) -> bool:
         """Проверить существование объекта"""
         return id in self._storage
+    
+    def subscribe(self, callback: Callable[[ChangeEvent[T]], None]) -> None:
+        """Вызывать callback(событие) после каждого изменения объекта
+        
+        Исключение подписчика не мешает остальным получить событие: оно
+        пробрасывается вызвавшему запись после обхода всех подписчиков.
+        """
+        self._subscribers.append(callback)
+    
+    def unsubscribe(self, callback: Callable[[ChangeEvent[T]], None]) -> None:
+        """Перестать вызывать callback"""
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+    
+    def _publish(self, *events: ChangeEvent[T]) -> None:
+        error = None
+        subscribers = list(self._subscribers)
+        for event in events:
+            for callback in subscribers:
+                try:
+                    callback(event)
+                except Exception as e:
+                    error = error or e
+        if error is not None:
+            raise error
+    
+    def _publishWrites(self, items: Dict[str, T], before: Dict[str, T]) -> None:
+        """Опубликовать ADDED/UPDATED для записанных объектов (before - прежние версии)"""
+        self._publish(*(ChangeEvent(ChangeType.ADDED if before.get(id) is None else ChangeType.UPDATED,
+                                    id, before.get(id), obj)
+                        for id, obj in items.items()))
+    
+    def _publishDeletes(self, before: Dict[str, T]) -> None:
+        """Опубликовать DELETED для удаленных объектов"""
+        self._publish(*(ChangeEvent(ChangeType.DELETED, id, obj, None) for id, obj in before.items()))
+    
+    @staticmethod
+    def _checkPageLimit(limit: int) -> None:
+        """Размер страницы должен быть положительным: курсор - ID последнего объекта страницы"""
+        if limit < 1:
+            raise ValueError(f"Page limit must be at least 1, got {limit}")
+    
+    def _preserve(self, ids: Iterable[str]) -> None:
+        """Сохранить текущие версии объектов в открытые снимки перед записью"""
+        if not self._snapshots:
+            return
+        for snapshot in list(self._snapshots):
+            snapshot._preserve(ids, self._storage)
+    
+    def _index(self, id: str, obj: T) -> None:
+        """Добавить объект во вторичные индексы (переопределяется в наследниках)"""
+        pass
+    
+    def _unindex(self, id: str, obj: T) -> None:
+        """Удалить объект из вторичных индексов (переопределяется в наследниках)"""
+        pass
+    
+    def _indexMany(self, items: Dict[str, T]) -> None:
+        """Добавить пакет объектов во вторичные индексы"""
+        for id, obj in items.items():
+            self._index(id, obj)
+    
+    def _unindexMany(self, items: Dict[str, T]) -> None:
+        """Удалить пакет объектов из вторичных индексов"""
+        for id, obj in items.items():
+            self._unindex(id, obj)
 
 # ==================== UserRepository ====================
 
 class UserRepository(Repository[User]):
     """Репозиторий для управления пользователями"""
     
-    def __init__(self):
+    def __init__(self, sample_data: bool = True):
         super().__init__()
-        self._initialize_sample_users()
+        if sample_data:
+            self._initialize_sample_users()
     
     def _initialize_sample_users(self) -> None:
         """Инициализация тестовыми пользователями"""
@@ -76,12 +349,45 @@ class UserRepository(Repository[User]):
 
 # ==================== IncidentRepository ====================
 
+class IncidentSnapshot(RepositorySnapshot[Incident]):
+    """Снимок инцидентов с запросами для отчетов"""
+    
+    def findActive(self) -> List[Incident]:
+        """Найти активные инциденты"""
+        repository = self._repository
+        active = repository.ACTIVE_STATUSES
+        incidents = self._collect(lambda: [id for status in active
+                                           for id in repository._status_index.get(status)])
+        return [incident for incident in incidents if incident.status in active]
+    
+    def findInRange(self, start: datetime, end: datetime) -> List[Incident]:
+        """Найти инциденты в диапазоне [start, end] в порядке времени"""
+        incidents = self._collect(lambda: self._repository._time_index.range(start, end))
+        return sorted((incident for incident in incidents if start <= incident.timestamp <= end),
+                      key=lambda incident: incident.timestamp)
+    
+    def summarizeRange(self, start: datetime, end: datetime) -> Tuple[int, float]:
+        """Количество инцидентов и средняя тяжесть за период"""
+        incidents = self.findInRange(start, end)
+        total = len(incidents)
+        severity = sum(incident.severity for incident in incidents)
+        return total, (severity / total if total else 0.0)
+
 class IncidentRepository(Repository[Incident]):
     """Репозиторий для управления инцидентами"""
     
-    def __init__(self):
+    ACTIVE_STATUSES = (IncidentStatus.REPORTED, IncidentStatus.CONFIRMED)
+    SNAPSHOT_CLASS = IncidentSnapshot
+    
+    def __init__(self, grid_cell_size: float = 0.01, sample_data: bool = True):
         super().__init__()
-        self._initialize_sample_incidents()
+        self._location_index = SpatialGridIndex(grid_cell_size)
+        self._nearest_index = KDTreeIndex()
+        self._status_index = HashIndex()
+        self._type_index = HashIndex()
+        self._time_index = SortedIndex()
+        if sample_data:
+            self._initialize_sample_incidents()
     
     def _initialize_sample_incidents(self) -> None:
         """Инициализация тестовыми инцидентами"""
@@ -107,46 +413,121 @@ class IncidentRepository(Repository[Incident]):
     
     def findActive(self) -> List[Incident]:
         """Найти активные инциденты"""
-        return [incident for incident in self._storage.values() 
-                if incident.status in [IncidentStatus.REPORTED, IncidentStatus.CONFIRMED]]
-    
-    def findByLocation(self, location: GeoPoint, radius: float = 0.01) -> List[Incident]:
-        """Найти инциденты вблизи указанной локации"""
-        nearby_incidents = []
-        for incident in self._storage.values():
-            distance = incident.location.distance_to(location)
-            if distance <= radius:
-                nearby_incidents.append(incident)
-        return nearby_incidents
+        return list(self.iterActive())
+    
+    def findByLocation(self, location: GeoPoint, radius: float = 1000.0) -> List[Incident]:
+        """Найти инциденты не дальше radius метров от указанной локации"""
+        return list(self.iterByLocation(location, radius))
     
     def findByType(self, incident_type: IncidentType) -> List[Incident]:
         """Найти инциденты по типу"""
-        return [incident for incident in self._storage.values() 
-                if incident.type == incident_type]
+        return list(self.iterByType(incident_type))
+    
+    def findInRange(self, start: datetime, end: datetime) -> List[Incident]:
+        """Найти инциденты с отметкой времени в диапазоне [start, end]"""
+        return list(self.iterInRange(start, end))
+    
+    def nearest(self, location: GeoPoint, k: int = 1, active_only: bool = False) -> List[Incident]:
+        """k ближайших к location инцидентов в порядке возрастания расстояния"""
+        accept = None
+        if active_only:
+            accept = lambda id: self._storage[id].status in self.ACTIVE_STATUSES
+        return [self._storage[id] for _, id in self._nearest_index.nearest(location, k, accept)]
+    
+    def iterActive(self) -> Iterator[Incident]:
+        """Перебрать активные инциденты"""
+        for status in self.ACTIVE_STATUSES:
+            for id in self._status_index.get(status):
+                yield self._storage[id]
+    
+    def iterByLocation(self, location: GeoPoint, radius: float = 1000.0) -> Iterator[Incident]:
+        """Перебрать инциденты не дальше radius метров от указанной локации"""
+        for id in self._location_index.query(location, radius):
+            yield self._storage[id]
+    
+    def iterByType(self, incident_type: IncidentType) -> Iterator[Incident]:
+        """Перебрать инциденты по типу"""
+        for id in self._type_index.get(incident_type):
+            yield self._storage[id]
+    
+    def iterInRange(self, start: datetime, end: datetime) -> Iterator[Incident]:
+        """Перебрать инциденты в диапазоне [start, end] в порядке времени"""
+        for id in self._time_index.range(start, end):
+            yield self._storage[id]
+    
+    def countByStatus(self, status: IncidentStatus) -> int:
+        """Количество инцидентов с указанным статусом"""
+        return self._status_index.count(status)
+    
+    def summarizeRange(self, start: datetime, end: datetime) -> Tuple[int, float]:
+        """Количество инцидентов и средняя тяжесть за период"""
+        total, severity = 0, 0
+        for incident in self.iterInRange(start, end):
+            total += 1
+            severity += incident.severity
+        return total, (severity / total if total else 0.0)
+    
+    def _index(self, id: str, obj: Incident) -> None:
+        self._indexMany({id: obj})
+    
+    def _unindex(self, id: str, obj: Incident) -> None:
+        self._unindexMany({id: obj})
+    
+    def _indexMany(self, items: Dict[str, Incident]) -> None:
+        for id, obj in items.items():
+            self._location_index.insert(id, obj.location)
+            self._nearest_index.insert(id, obj.location)
+            self._status_index.insert(id, obj.status)
+            self._type_index.insert(id, obj.type)
+            obj.subscribe(self._on_incident_changed)
+        self._time_index.insertMany([(id, obj.timestamp) for id, obj in items.items()])
+    
+    def _unindexMany(self, items: Dict[str, Incident]) -> None:
+        for id, obj in items.items():
+            obj.unsubscribe(self._on_incident_changed)
+            self._location_index.remove(id)
+            self._nearest_index.remove(id)
+            self._status_index.remove(id)
+            self._type_index.remove(id)
+        self._time_index.removeMany(items)
+    
+    def _on_incident_changed(self, incident: Incident) -> None:
+        """Переиндексировать инцидент, измененный через Incident.updateStatus"""
+        if self._storage.get(incident.incidentId) is incident:
+            self._status_index.insert(incident.incidentId, incident.status)
+            if self._subscribers:
+                self._publish(ChangeEvent(ChangeType.UPDATED, incident.incidentId, None, incident))
 
 # ==================== TrafficLightRepository ====================
 
 class TrafficLightRepository(Repository[TrafficLight]):
     """Репозиторий для управления светофорами"""
     
-    def __init__(self):
+    def __init__(self, sample_data: bool = True):
         super().__init__()
-        self._initialize_sample_lights()
+        self._intersection_index = HashIndex()
+        self._status_index = HashIndex()
+        self._nearest_index = KDTreeIndex()
+        if sample_data:
+            self._initialize_sample_lights()
     
     def _initialize_sample_lights(self) -> None:
         """Инициализация тестовыми светофорами"""
         lights = [
             TrafficLight(
                 lightId="TL001",
-                location=GeoPoint(40.7128, -74.0060)
+                location=GeoPoint(40.7128, -74.0060),
+                intersectionId="J001"
             ),
             TrafficLight(
                 lightId="TL002", 
-                location=GeoPoint(40.7580, -73.9855)
+                location=GeoPoint(40.7580, -73.9855),
+                intersectionId="J002"
             ),
             TrafficLight(
                 lightId="TL003",
-                location=GeoPoint(40.7549, -73.9840)
+                location=GeoPoint(40.7549, -73.9840),
+                intersectionId="J002"
             ),
         ]
         
@@ -155,32 +536,239 @@ class TrafficLightRepository(Repository[TrafficLight]):
     
     def findByIntersection(self, intersection_id: str) -> List[TrafficLight]:
         """Найти светофоры на перекрестке"""
-        return [light for light_id, light in self._storage.items() 
-                if intersection_id in light_id]
+        return [self._storage[id] for id in self._intersection_index.get(intersection_id)]
     
     def getByStatus(self, status: Status) -> List[TrafficLight]:
         """Найти светофоры по статусу"""
-        return [light for light in self._storage.values() 
-                if light.getStatusUp() == status]
+        return [self._storage[id] for id in self._status_index.get(status)]
+    
+    def countByStatus(self, status: Status) -> int:
+        """Количество светофоров с указанным статусом"""
+        return self._status_index.count(status)
+    
+    def nearest(self, location: GeoPoint, k: int = 1) -> List[TrafficLight]:
+        """k ближайших к location светофоров в порядке возрастания расстояния"""
+        return [self._storage[id] for _, id in self._nearest_index.nearest(location, k)]
+    
+    def _index(self, id: str, obj: TrafficLight) -> None:
+        if obj.intersectionId:
+            self._intersection_index.insert(id, obj.intersectionId)
+        self._status_index.insert(id, obj.getStatusUp())
+        self._nearest_index.insert(id, obj.location)
+        obj.subscribe(self._on_light_changed)
+    
+    def _unindex(self, id: str, obj: TrafficLight) -> None:
+        obj.unsubscribe(self._on_light_changed)
+        self._intersection_index.remove(id)
+        self._status_index.remove(id)
+        self._nearest_index.remove(id)
+    
+    def _on_light_changed(self, light: TrafficLight) -> None:
+        """Переложить светофор в корзину нового статуса после setPhaseUpdate/setConfine"""
+        if self._storage.get(light.lightId) is light:
+            self._status_index.insert(light.lightId, light.getStatusUp())
+            if self._subscribers:
+                self._publish(ChangeEvent(ChangeType.UPDATED, light.lightId, None, light))
 
 # ==================== Repository Factory ====================
 
+# Создатель репозитория: (тип репозитория, параметры) -> репозиторий или None,
+# если backend не поддерживает этот тип
+BackendConstructor = Callable[[str, Dict[str, Any]], Optional[Repository]]
+
+def _create_memory(repo_type: str, options: Dict[str, Any]) -> Optional[Repository]:
+    classes = {
+        "user": UserRepository,
+        "incident": IncidentRepository,
+        "trafficlight": TrafficLightRepository,
+    }
+    return classes[repo_type]() if repo_type in classes else None
+
+def _create_sqlite(repo_type: str, options: Dict[str, Any]) -> Optional[Repository]:
+    from sqlite_repository import (
+        SQLiteUserRepository, SQLiteIncidentRepository, SQLiteTrafficLightRepository
+    )
+    classes = {
+        "user": SQLiteUserRepository,
+        "incident": SQLiteIncidentRepository,
+        "trafficlight": SQLiteTrafficLightRepository,
+    }
+    if repo_type not in classes:
+        return None
+    return classes[repo_type](options.get("path") or "traffic.db")
+
+def _create_columnar(repo_type: str, options: Dict[str, Any]) -> Optional[Repository]:
+    if repo_type != "incident":
+        return None
+    from columnar_repository import ColumnarIncidentRepository
+    return ColumnarIncidentRepository()
+
+def _create_log(repo_type: str, options: Dict[str, Any]) -> Optional[Repository]:
+    from log_repository import (
+        LogUserRepository, LogIncidentRepository, LogTrafficLightRepository
+    )
+    classes = {
+        "user": LogUserRepository,
+        "incident": LogIncidentRepository,
+        "trafficlight": LogTrafficLightRepository,
+    }
+    if repo_type not in classes:
+        return None
+    directory = os.path.join(options.get("path") or "traffic_log", repo_type)
+    return classes[repo_type](directory, snapshot_every=options.get("snapshot_every", 100_000))
+
+def _create_tiered(repo_type: str, options: Dict[str, Any]) -> Optional[Repository]:
+    if repo_type != "incident":
+        return None
+    from tiered_repository import TieredIncidentRepository
+    return TieredIncidentRepository(timedelta(seconds=options.get("cold_after", 3600)))
+
+def _create_sharded(repo_type: str, options: Dict[str, Any]) -> Optional[Repository]:
+    from sharded_repository import ShardedIncidentRepository, ShardedTrafficLightRepository
+    classes = {
+        "incident": ShardedIncidentRepository,
+        "trafficlight": ShardedTrafficLightRepository,
+    }
+    if repo_type not in classes:
+        return None
+    return classes[repo_type](options.get("shards"), options.get("tile_size", 0.05))
+
 class RepositoryFactory:
-    """Фабрика для создания репозиториев"""
+    """Фабрика для создания репозиториев
+    
+    Репозитории создаются лениво при первом запросе, по одному экземпляру
+    на набор параметров, и безопасно для одновременных вызовов из потоков.
+    Backend для каждого типа берется из конфигурации:
+    
+        {"default": {"backend": "memory"},
+         "incident": {"backend": "sqlite", "path": "traffic.db", "concurrent": true,
+                      "cache": 10000, "write_back": false}}
+    
+    cache - размер LRU-кэша (CachedRepository) перед backend'ом, write_back -
+    копить записи в кэше и сбрасывать их пакетами.
+    Конфигурацию можно передать в configure(), загрузить из JSON-файла
+    configure_from_file() или указать путь к файлу в переменной окружения
+    REPOSITORY_CONFIG. Новые backend'ы подключаются через register_backend().
+    """
+    
+    CONFIG_ENV = "REPOSITORY_CONFIG"
+    
+    _instances: Dict[Tuple[str, str], Repository] = {}
+    _backends: Dict[str, BackendConstructor] = {
+        "memory": _create_memory,
+        "sqlite": _create_sqlite,
+        "columnar": _create_columnar,
+        "log": _create_log,
+        "tiered": _create_tiered,
+        "sharded": _create_sharded,
+    }
+    _config: Optional[Dict[str, Dict[str, Any]]] = None
+    _lock = threading.RLock()
+    
+    @staticmethod
+    def register_backend(name: str, constructor: BackendConstructor) -> None:
+        """Зарегистрировать backend под именем name"""
+        with RepositoryFactory._lock:
+            RepositoryFactory._backends[name] = constructor
+    
+    @staticmethod
+    def configure(config: Dict[str, Dict[str, Any]]) -> None:
+        """Задать параметры репозиториев по типам (ключ "default" - для остальных)"""
+        with RepositoryFactory._lock:
+            RepositoryFactory._config = {repo_type: dict(options)
+                                         for repo_type, options in config.items()}
     
-    _instances: Dict[str, Repository] = {}
+    @staticmethod
+    def configure_from_file(path: str) -> None:
+        """Загрузить конфигурацию из JSON-файла"""
+        with open(path, encoding="utf-8") as f:
+            RepositoryFactory.configure(json.load(f))
+    
+    @staticmethod
+    def reset() -> None:
+        """Забыть созданные репозитории и конфигурацию"""
+        with RepositoryFactory._lock:
+            RepositoryFactory._instances.clear()
+            RepositoryFactory._config = None
     
     @staticmethod
-    def get_repository(repo_type: str) -> Optional[Repository]:
-        """Получить экземпляр репозитория по типу"""
-        if repo_type not in RepositoryFactory._instances:
-            if repo_type == "user":
-                RepositoryFactory._instances[repo_type] = UserRepository()
-            elif repo_type == "incident":
-                RepositoryFactory._instances[repo_type] = IncidentRepository()
-            elif repo_type == "trafficlight":
-                RepositoryFactory._instances[repo_type] = TrafficLightRepository()
+    def _options_for(repo_type: str) -> Dict[str, Any]:
+        if RepositoryFactory._config is None:
+            config_path = os.environ.get(RepositoryFactory.CONFIG_ENV)
+            if config_path:
+                RepositoryFactory.configure_from_file(config_path)
             else:
+                RepositoryFactory._config = {}
+        config = RepositoryFactory._config
+        return {**config.get("default", {}), **config.get(repo_type, {})}
+    
+    @staticmethod
+    def get_repository(repo_type: str, backend: Optional[str] = None,
+                       path: Optional[str] = None,
+                       concurrent: Optional[bool] = None) -> Optional[Repository]:
+        """Получить экземпляр репозитория по типу
+        
+        Args:
+            repo_type: "user", "incident" или "trafficlight"
+            backend: "memory", "sqlite", "log", "columnar" и "tiered" (только для
+                "incident", у "tiered" параметр cold_after в секундах),
+                "sharded" (параметры shards и tile_size, без "user")
+                или зарегистрированный; по умолчанию - из конфигурации или "memory"
+            path: файл базы для "sqlite" (traffic.db) или каталог для "log" (traffic_log)
+            concurrent: вернуть потокобезопасную обертку над репозиторием
+        
+        Явно переданные аргументы имеют приоритет над конфигурацией.
+        """
+        with RepositoryFactory._lock:
+            options = RepositoryFactory._options_for(repo_type)
+            if backend is not None:
+                options["backend"] = backend
+            if path is not None:
+                options["path"] = path
+            if concurrent is not None:
+                options["concurrent"] = concurrent
+            return RepositoryFactory._get_or_create(repo_type, options)
+    
+    @staticmethod
+    def _instance_key(repo_type: str, options: Dict[str, Any]) -> Tuple[str, str]:
+        """Ключ экземпляра по всем параметрам, с приведенными значениями по умолчанию"""
+        normalized = {**options,
+                      "backend": options.get("backend", "memory"),
+                      "path": options.get("path"),
+                      "concurrent": bool(options.get("concurrent", False)),
+                      "cache": int(options.get("cache", 0))}
+        if not normalized["cache"]:
+            # write_back относится только к кэшу
+            normalized.pop("write_back", None)
+        return repo_type, json.dumps(normalized, sort_keys=True, default=str)
+    
+    @staticmethod
+    def _get_or_create(repo_type: str, options: Dict[str, Any]) -> Optional[Repository]:
+        backend = options.get("backend", "memory")
+        is_concurrent = bool(options.get("concurrent", False))
+        cache_size = int(options.get("cache", 0))
+        key = RepositoryFactory._instance_key(repo_type, options)
+        if key in RepositoryFactory._instances:
+            return RepositoryFactory._instances[key]
+        
+        if is_concurrent:
+            repository = RepositoryFactory._get_or_create(repo_type, {**options, "concurrent": False})
+            if repository is None:
+                return None
+            from concurrent_repository import ConcurrentRepository
+            repository = ConcurrentRepository(repository)
+        elif cache_size:
+            repository = RepositoryFactory._get_or_create(repo_type, {**options, "cache": 0})
+            if repository is None:
+                return None
+            from cached_repository import CachedRepository
+            repository = CachedRepository(repository, cache_size,
+                                          write_back=bool(options.get("write_back", False)))
+        else:
+            constructor = RepositoryFactory._backends.get(backend)
+            repository = constructor(repo_type, options) if constructor else None
+            if repository is None:
                 return None
         
-        return RepositoryFactory._instances[repo_type]
\ No newline at end of file
+        RepositoryFactory._instances[key] = repository
+        return repository
@@ -0,0 +1,156 @@
+from typing import Callable, Dict, Generic, List, Optional, Sequence, Set, Tuple
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import heapq
+import logging
+import threading
+from model import Incident, IncidentStatus
+from repository import Repository, ChangeEvent, T
+
+logger = logging.getLogger(__name__)
+
+# ==================== Правила хранения ====================
+
+@dataclass
+class RetentionPolicy(Generic[T]):
+    """Удалять объекты, подходящие под matches, через max_age после timestamp_of(obj)"""
+    name: str
+    max_age: timedelta
+    matches: Callable[[T], bool] = lambda obj: True
+    timestamp_of: Callable[[T], datetime] = lambda obj: obj.timestamp
+
+def drop_false_alarms(max_age: timedelta = timedelta(days=7)) -> RetentionPolicy[Incident]:
+    """Удалять ложные срабатывания через max_age после регистрации"""
+    return RetentionPolicy("false alarms", max_age,
+                           lambda incident: incident.status == IncidentStatus.FALSE_ALARM)
+
+def drop_resolved(max_age: timedelta = timedelta(days=90)) -> RetentionPolicy[Incident]:
+    """Удалять решенные инциденты через max_age после регистрации"""
+    return RetentionPolicy("resolved", max_age,
+                           lambda incident: incident.status == IncidentStatus.RESOLVED)
+
+# ==================== Фоновая очистка ====================
+
+def _object_id(obj: object) -> str:
+    """ID модельного объекта по его атрибуту-идентификатору"""
+    for attr in ("incidentId", "lightId", "userId"):
+        if hasattr(obj, attr):
+            return getattr(obj, attr)
+    raise TypeError(f"Cannot determine ID of {type(obj).__name__}, pass id_of")
+
+class RetentionSweeper(Generic[T]):
+    """Фоновое удаление объектов по правилам хранения
+
+    Для каждого объекта и правила в куче лежит срок (timestamp + max_age).
+    Очистка снимает с кучи только наступившие сроки: подходящий под правило
+    объект удаляется, объект с отодвинутым сроком возвращается в кучу,
+    остальные перестают отслеживаться до следующей записи. Полный перебор
+    репозитория выполняется один раз, при создании; дальше куча пополняется
+    из событий изменений репозитория (subscribe); id_of извлекает ID объекта
+    для этого начального перебора.
+
+    Очистка удаляет объекты из отдельного потока, поэтому репозиторий,
+    в который параллельно пишут, нужно обернуть в ConcurrentRepository.
+    Ошибка очистки в фоновом потоке пишется в лог, и поток продолжает работу.
+    Репозиторий с холодным уровнем (migrateCold) при каждой очистке
+    переносит закрытые объекты, срок которых наступил, даже без записей.
+    """
+
+    def __init__(self, repository: Repository[T], policies: Sequence[RetentionPolicy[T]],
+                 interval: float = 60.0, clock: Callable[[], datetime] = datetime.now,
+                 id_of: Callable[[T], str] = _object_id):
+        self.repository = repository
+        self.policies = list(policies)
+        self.interval = interval
+        self.removed = 0
+        self._clock = clock
+        self._heap: List[Tuple[datetime, str, int]] = []
+        self._tracked: Set[Tuple[str, int]] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._track({id_of(obj): obj for obj in repository.iterAll()})
+        repository.subscribe(self._on_change)
+
+    def _on_change(self, event: ChangeEvent[T]) -> None:
+        if event.after is not None:
+            self._track({event.id: event.after})
+
+    def _track(self, items: Dict[str, T]) -> None:
+        with self._lock:
+            for id, obj in items.items():
+                for number, policy in enumerate(self.policies):
+                    if (id, number) not in self._tracked:
+                        self._tracked.add((id, number))
+                        heapq.heappush(self._heap, (policy.timestamp_of(obj) + policy.max_age, id, number))
+
+    def sweep(self, now: Optional[datetime] = None) -> int:
+        """Удалить объекты с наступившим сроком хранения, вернуть их количество"""
+        now = now or self._clock()
+        migrate = getattr(self.repository, "migrateCold", None)
+        if migrate is not None:
+            # Сроки переноса считаются по часам самого репозитория
+            migrate()
+        with self._lock:
+            due: List[Tuple[str, int]] = []
+            while self._heap and self._heap[0][0] <= now:
+                _, id, number = heapq.heappop(self._heap)
+                due.append((id, number))
+        expired: Set[str] = set()
+        found = self.repository.getMany({id for id, _ in due})
+        with self._lock:
+            for id, number in due:
+                obj = found.get(id)
+                policy = self.policies[number]
+                if obj is None:
+                    self._tracked.discard((id, number))
+                    continue
+                deadline = policy.timestamp_of(obj) + policy.max_age
+                if deadline > now:
+                    heapq.heappush(self._heap, (deadline, id, number))
+                elif policy.matches(obj):
+                    expired.add(id)
+                else:
+                    self._tracked.discard((id, number))
+            for id in expired:
+                for number in range(len(self.policies)):
+                    self._tracked.discard((id, number))
+        if expired:
+            try:
+                self.repository.deleteMany(expired)
+            except Exception:
+                # Удаление не прошло: сроки возвращаются в кучу до следующей очистки
+                self._track({id: found[id] for id in expired})
+                raise
+            self.removed += len(expired)
+        return len(expired)
+
+    def pending(self) -> int:
+        """Количество отслеживаемых сроков"""
+        with self._lock:
+            return len(self._heap)
+
+    # ---------- Фоновый поток ----------
+
+    def start(self) -> None:
+        """Запустить очистку каждые interval секунд"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="retention-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Остановить фоновую очистку и отписаться от репозитория"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.repository.unsubscribe(self._on_change)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception:
+                logger.exception("Retention sweep failed")
@@ -0,0 +1,385 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from dataclasses import dataclass
+from datetime import timedelta
+import math
+import threading
+import numpy as np
+from model import SensorData
+from timeseries import Timestamp, _as_micros
+
+# ==================== Агрегаты ====================
+
+# Уровни свертки от мелкого к крупному и срок хранения каждого (None - бессрочно)
+RESOLUTIONS: Tuple[timedelta, ...] = (timedelta(minutes=1), timedelta(minutes=15), timedelta(hours=1))
+DEFAULT_RETENTION: Tuple[Optional[timedelta], ...] = (timedelta(days=2), timedelta(days=60), None)
+
+_MICROS = timedelta(microseconds=1)
+
+@dataclass(frozen=True)
+class Aggregate:
+    """Сводка показаний за период"""
+    count: int = 0
+    sum: float = 0.0
+    min: float = math.nan
+    max: float = math.nan
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else math.nan
+
+@dataclass
+class Buckets:
+    """Агрегаты по интервалам шага step в колонках; starts - начала интервалов"""
+    step: timedelta
+    starts: np.ndarray
+    count: np.ndarray
+    sum: np.ndarray
+    min: np.ndarray
+    max: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def mean(self) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.sum / self.count
+
+# ==================== Уровень свертки ====================
+
+class _Level:
+    """Закрытые интервалы одного разрешения в растущих массивах плюс открытый интервал
+
+    Открытый интервал копит данные, пока не придет показание из следующего;
+    тогда он закрывается, дописывается в массивы и передается уровню крупнее.
+    Интервалы старше retention отбрасываются с головы массивов.
+    """
+
+    def __init__(self, resolution: int, retention: Optional[int]):
+        self.resolution = resolution
+        self.retention = retention
+        self.starts = np.empty(64, dtype=np.int64)
+        self.count = np.empty(64, dtype=np.int64)
+        self.sum = np.empty(64, dtype=np.float64)
+        self.min = np.empty(64, dtype=np.float64)
+        self.max = np.empty(64, dtype=np.float64)
+        self._views = self._makeViews()
+        self._head = 0   # первый хранимый закрытый интервал
+        self._size = 0   # конец закрытых интервалов
+        self.expired_before: Optional[int] = None  # данные раньше этого момента удалены
+        self.open_start: Optional[int] = None
+        self.open_count = 0
+        self.open_sum = 0.0
+        self.open_min = 0.0
+        self.open_max = 0.0
+
+    def add(self, start: int, count: int, total: float, low: float, high: float) -> Optional[tuple]:
+        """Учесть данные интервала start; вернуть закрытый при этом интервал или None"""
+        open_start = self.open_start
+        if start == open_start:
+            self.open_count += count
+            self.open_sum += total
+            if low < self.open_min:
+                self.open_min = low
+            if high > self.open_max:
+                self.open_max = high
+            return None
+        if open_start is not None and start < open_start:
+            raise ValueError("Readings must not precede the open rollup interval")
+        closed = None
+        if open_start is not None:
+            closed = (open_start, self.open_count, self.open_sum, self.open_min, self.open_max)
+            self._push(*closed)
+        self.open_start, self.open_count, self.open_sum, self.open_min, self.open_max = \
+            start, count, total, low, high
+        return closed
+
+    def _push(self, start: int, count: int, total: float, low: float, high: float) -> None:
+        if self._size == len(self.starts):
+            self._reserve()
+        i = self._size
+        starts, counts, sums, lows, highs = self._views
+        starts[i], counts[i], sums[i], lows[i], highs[i] = start, count, total, low, high
+        self._size = i + 1
+        if self.retention is not None:
+            horizon = start - self.retention
+            head = self._head
+            while starts[head] < horizon:
+                head += 1
+            if head != self._head:
+                self._head = head
+                self.expired_before = starts[head]
+
+    def _reserve(self) -> None:
+        """Освободить место: сдвинуть хранимые интервалы к началу или удвоить массивы"""
+        live = self._size - self._head
+        capacity = len(self.starts) if live <= len(self.starts) // 2 else 2 * len(self.starts)
+        for name in ("starts", "count", "sum", "min", "max"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:live] = old[self._head:self._size]
+            setattr(self, name, new)
+        self._head, self._size = 0, live
+        self._views = self._makeViews()
+
+    def _makeViews(self) -> tuple:
+        # Поэлементная запись через memoryview в разы дешевле, чем через индексацию ndarray
+        return tuple(memoryview(column) for column in (self.starts, self.count, self.sum, self.min, self.max))
+
+    def horizon(self) -> Optional[int]:
+        """Момент, до которого все интервалы уровня закрыты"""
+        return self.open_start
+
+    def closed(self, lo: int, hi: int) -> slice:
+        """Срез закрытых интервалов с началом в [lo, hi)"""
+        first, last = self.starts[self._head:self._size].searchsorted((lo, hi)).tolist()
+        return slice(self._head + first, self._head + last)
+
+    def covers(self, moment: int) -> bool:
+        """Хранит ли уровень данные начиная с moment"""
+        return self.expired_before is None or moment >= self.expired_before
+
+# ==================== Свертки одного датчика ====================
+
+class SensorRollup:
+    """Каскад сверток показаний одного датчика
+
+    Сырые показания копятся в открытом интервале мелкого уровня; закрытый
+    интервал каждого уровня сворачивается в открытый интервал следующего.
+    Показание стоит несколько сравнений и сложений, массивы растут
+    с амортизированным удвоением. Показания добавляются в порядке времени
+    (внутри открытой минуты - в любом порядке).
+    """
+
+    def __init__(self, resolutions: Sequence[timedelta] = RESOLUTIONS,
+                 retention: Sequence[Optional[timedelta]] = DEFAULT_RETENTION):
+        if len(resolutions) != len(retention):
+            raise ValueError("resolutions and retention must have the same length")
+        steps = [resolution // _MICROS for resolution in resolutions]
+        for fine, coarse in zip(steps, steps[1:]):
+            if coarse % fine:
+                raise ValueError("Each resolution must be a multiple of the previous one")
+        for step, coarser, keep in zip(steps, steps[1:] + [None], retention):
+            if keep is not None and coarser is not None and keep // _MICROS < 2 * coarser:
+                raise ValueError("Retention must span at least two intervals of the next resolution")
+        self.levels = [_Level(step, None if keep is None else keep // _MICROS)
+                       for step, keep in zip(steps, retention)]
+        self._lock = threading.Lock()
+
+    def append(self, timestamp: Timestamp, value: float) -> None:
+        """Учесть одно показание"""
+        self._appendMicros(_as_micros(timestamp), float(value))
+
+    def _appendMicros(self, micros: int, value: float) -> None:
+        first = self.levels[0]
+        start = micros - micros % first.resolution
+        with self._lock:
+            if start == first.open_start:
+                # Частый случай: показание в открытой минуте
+                first.open_count += 1
+                first.open_sum += value
+                if value < first.open_min:
+                    first.open_min = value
+                elif value > first.open_max:
+                    first.open_max = value
+                return
+            closed = first.add(start, 1, value, value, value)
+            for level in self.levels[1:]:
+                if closed is None:
+                    break
+                start, count, total, low, high = closed
+                closed = level.add(start - start % level.resolution, count, total, low, high)
+
+    # ---------- Чтение ----------
+
+    def aggregate(self, start: Timestamp, end: Timestamp) -> Aggregate:
+        """Сводка за [start, end)
+
+        Период покрывается самыми крупными интервалами, целиком лежащими в нем;
+        края добираются уровнями мельче. Границы округляются вниз до мелкого
+        уровня, а там, где мелкие данные уже удалены по сроку хранения, -
+        наружу до интервала уровня, который их еще хранит.
+        """
+        levels = self.levels
+        lo = _floor(_as_micros(start), levels[0].resolution)
+        hi = _floor(_as_micros(end), levels[0].resolution)
+        parts: List[Tuple[_Level, slice]] = []
+        with self._lock:
+            opened = self._cover(len(levels) - 1, lo, hi, parts)
+            count = sum(int(level.count[span].sum()) for level, span in parts)
+            total = sum(float(level.sum[span].sum()) for level, span in parts)
+            lows = [float(level.min[span].min()) for level, span in parts]
+            highs = [float(level.max[span].max()) for level, span in parts]
+            if opened:
+                first = levels[0]
+                count += first.open_count
+                total += first.open_sum
+                lows.append(first.open_min)
+                highs.append(first.open_max)
+        if not count:
+            return Aggregate()
+        return Aggregate(count=count, sum=total, min=min(lows), max=max(highs))
+
+    def _cover(self, i: int, lo: int, hi: int, parts: List[Tuple["_Level", slice]]) -> bool:
+        """Покрыть [lo, hi) уровнями <= i; вернуть True, если нужен открытый мелкий интервал"""
+        if lo >= hi:
+            return False
+        level = self.levels[i]
+        if i == 0:
+            _appendPart(parts, level, lo, hi)
+            return level.open_start is not None and lo <= level.open_start < hi
+        finer = self.levels[i - 1]
+        step = level.resolution
+        # Края, которых мелкий уровень уже не хранит, расширяются до интервала этого уровня
+        a = _floor(lo, step) if not finer.covers(lo) else -(-lo // step) * step
+        b = _floor(hi, step)
+        if not finer.covers(b) and b < hi:
+            b += step
+        horizon = level.horizon()
+        b = min(b, horizon) if horizon is not None else a
+        if a >= b:
+            return self._cover(i - 1, lo, hi, parts)
+        _appendPart(parts, level, a, b)
+        head = self._cover(i - 1, lo, a, parts)
+        tail = self._cover(i - 1, b, hi, parts)
+        return head or tail
+
+    def buckets(self, start: Timestamp, end: Timestamp, step: timedelta) -> Buckets:
+        """Агрегаты за [start, end) по интервалам step (кратен мелкому разрешению)
+
+        Читается самый крупный уровень, разрешение которого делит step; еще не
+        закрытый хвост периода добирается уровнями мельче. Интервалы старше
+        срока хранения выбранного уровня в результат не попадают.
+        """
+        step_us = step // _MICROS
+        levels = self.levels
+        if step_us <= 0 or step_us % levels[0].resolution:
+            raise ValueError("step must be a positive multiple of the finest resolution")
+        top = max(i for i, level in enumerate(levels) if step_us % level.resolution == 0)
+        lo = _floor(_as_micros(start), step_us)
+        hi = _floor(_as_micros(end), levels[0].resolution)
+        chunks = []
+        with self._lock:
+            for level in reversed(levels[:top + 1]):
+                if lo >= hi:
+                    break
+                horizon = level.horizon()
+                if horizon is None:
+                    continue
+                upto = hi if level is levels[0] else min(_floor(hi, level.resolution), horizon)
+                span = level.closed(lo, upto)
+                chunks.append(tuple(column[span].copy() for column in
+                                    (level.starts, level.count, level.sum, level.min, level.max)))
+                if level is levels[0] and lo <= level.open_start < hi:
+                    chunks.append((np.array([level.open_start]), np.array([level.open_count]),
+                                   np.array([level.open_sum]), np.array([level.open_min]),
+                                   np.array([level.open_max])))
+                lo = max(lo, upto)
+        return _regroup(chunks, step, step_us)
+
+def _appendPart(parts: List[Tuple[_Level, slice]], level: _Level, lo: int, hi: int) -> None:
+    span = level.closed(lo, hi)
+    if span.stop > span.start:
+        parts.append((level, span))
+
+def _floor(micros: int, resolution: int) -> int:
+    """Начало интервала разрешения resolution, содержащего момент micros"""
+    return micros - micros % resolution
+
+def _regroup(chunks: List[tuple], step: timedelta, step_us: int) -> Buckets:
+    """Свести интервалы (в порядке времени) к интервалам шага step_us"""
+    if not chunks:
+        starts, count, total, low, high = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64),
+                                           *(np.empty(0, dtype=np.float64) for _ in range(3)))
+    else:
+        starts, count, total, low, high = (np.concatenate(columns) for columns in zip(*chunks))
+    keys = starts - starts % step_us
+    boundaries = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.empty(0, dtype=np.intp)
+    if len(boundaries):
+        count = np.add.reduceat(count, boundaries)
+        total = np.add.reduceat(total, boundaries)
+        low = np.minimum.reduceat(low, boundaries)
+        high = np.maximum.reduceat(high, boundaries)
+    return Buckets(step=step, starts=keys[boundaries].view("datetime64[us]"),
+                   count=count, sum=total, min=low, max=high)
+
+# ==================== Хранилище сверток ====================
+
+class RollupStore:
+    """Свертки показаний по датчикам: 1 минута, 15 минут и 1 час
+
+    Принимает те же показания, что и SensorDataStore (по одному, списком
+    или колонками пакета опроса), например:
+    poller.start(on_batch=lambda batch: rollups.appendColumns(batch.sensor_ids, batch.timestamps, batch.values)).
+    Запросы за месяцы читают часовые интервалы и не касаются сырых данных.
+    """
+
+    def __init__(self, resolutions: Sequence[timedelta] = RESOLUTIONS,
+                 retention: Sequence[Optional[timedelta]] = DEFAULT_RETENTION):
+        self.resolutions = tuple(resolutions)
+        self.retention = tuple(retention)
+        SensorRollup(self.resolutions, self.retention)  # проверка параметров
+        self._rollups: Dict[str, SensorRollup] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rollups)
+
+    def __contains__(self, sensor_id: str) -> bool:
+        return sensor_id in self._rollups
+
+    def sensorIds(self) -> List[str]:
+        """ID датчиков, по которым есть свертки"""
+        return list(self._rollups)
+
+    def rollup(self, sensor_id: str) -> Optional[SensorRollup]:
+        """Свертки датчика или None"""
+        return self._rollups.get(sensor_id)
+
+    def _rollupFor(self, sensor_id: str) -> SensorRollup:
+        rollup = self._rollups.get(sensor_id)
+        if rollup is None:
+            with self._lock:
+                rollup = self._rollups.get(sensor_id)
+                if rollup is None:
+                    rollup = self._rollups[sensor_id] = SensorRollup(self.resolutions, self.retention)
+        return rollup
+
+    # ---------- Запись ----------
+
+    def append(self, reading: SensorData) -> None:
+        """Учесть одно показание"""
+        self._rollupFor(reading.sensor_id).append(reading.timestamp, reading.value)
+
+    def appendMany(self, readings: Iterable[SensorData]) -> None:
+        """Учесть показания по порядку"""
+        for reading in readings:
+            self.append(reading)
+
+    def appendColumns(self, sensor_ids: Sequence[str], timestamps: np.ndarray, values: np.ndarray) -> None:
+        """Учесть пакет показаний в колонках: sensor_ids[i], timestamps[i], values[i]"""
+        micros = np.asarray(timestamps, dtype="datetime64[us]").astype(np.int64).tolist()
+        values = np.asarray(values, dtype=np.float64).tolist()
+        if not len(sensor_ids) == len(micros) == len(values):
+            raise ValueError("sensor_ids, timestamps and values must have the same length")
+        for sensor_id, at, value in zip(sensor_ids, micros, values):
+            self._rollupFor(sensor_id)._appendMicros(at, value)
+
+    # ---------- Чтение ----------
+
+    def aggregate(self, sensor_id: str, start: Timestamp, end: Timestamp) -> Aggregate:
+        """Сводка показаний датчика за [start, end)"""
+        rollup = self._rollups.get(sensor_id)
+        return rollup.aggregate(start, end) if rollup is not None else Aggregate()
+
+    def buckets(self, sensor_id: str, start: Timestamp, end: Timestamp,
+                step: timedelta = timedelta(hours=1)) -> Buckets:
+        """Агрегаты датчика за [start, end) по интервалам step"""
+        rollup = self._rollups.get(sensor_id)
+        if rollup is None:
+            return _regroup([], step, step // _MICROS)
+        return rollup.buckets(start, end, step)
+
+    def aggregateAll(self, start: Timestamp, end: Timestamp) -> Dict[str, Aggregate]:
+        """Сводки всех датчиков за [start, end)"""
+        return {sensor_id: rollup.aggregate(start, end) for sensor_id, rollup in list(self._rollups.items())}
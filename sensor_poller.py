@@ -0,0 +1,174 @@
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+import asyncio
+import logging
+import threading
+import time
+import numpy as np
+from model import Sensor
+from timeseries import SensorDataStore
+
+logger = logging.getLogger(__name__)
+
+# ==================== Результаты опроса ====================
+
+@dataclass
+class PollBatch:
+    """Показания одного цикла опроса в колонках
+
+    sensor_ids[i], timestamps[i] и values[i] - одно показание; missed - ID
+    датчиков, не ответивших за цикл (таймаут, ошибка чтения или еще не
+    завершенное чтение прошлого цикла).
+    """
+    started: datetime
+    sensor_ids: List[str]
+    timestamps: np.ndarray
+    values: np.ndarray
+    missed: List[str] = field(default_factory=list)
+    latency: float = 0.0  # секунды от начала опроса до сборки пакета
+
+    def __len__(self) -> int:
+        return len(self.sensor_ids)
+
+@dataclass
+class PollStats:
+    """Счетчики опросов"""
+    cycles: int = 0
+    readings: int = 0
+    missed: int = 0
+    last_latency: float = 0.0
+    max_latency: float = 0.0
+    total_latency: float = 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.cycles if self.cycles else 0.0
+
+    def record(self, batch: PollBatch) -> None:
+        self.cycles += 1
+        self.readings += len(batch)
+        self.missed += len(batch.missed)
+        self.last_latency = batch.latency
+        self.max_latency = max(self.max_latency, batch.latency)
+        self.total_latency += batch.latency
+
+# ==================== Опрос датчиков ====================
+
+class SensorPoller:
+    """Параллельный опрос датчиков пакетами
+
+    Sensor.readData всех датчиков запускаются в пуле из max_workers потоков
+    (чтение датчика - ожидание ввода-вывода, GIL при этом отпускается).
+    Цикл ждет ответов не дольше timeout секунд; не успевшие датчики
+    попадают в missed. Еще не начатые чтения отменяются, а зависшие
+    дочитываются в фоне: пока чтение прошлого цикла не завершилось,
+    датчик не опрашивается повторно и тоже считается пропущенным.
+
+    Пакет возвращается колонками NumPy и, если задан store, сразу
+    сохраняется в SensorDataStore. В фоновом опросе ошибка цикла (записи
+    в store или on_batch) пишется в лог, и опрос продолжается.
+    """
+
+    def __init__(self, sensors: Iterable[Sensor], timeout: float = 1.0, max_workers: int = 128,
+                 store: Optional[SensorDataStore] = None):
+        self.sensors = list(sensors)
+        self.timeout = timeout
+        self.store = store
+        self.stats = PollStats()
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="sensor-poll")
+        self._in_flight: Dict[str, Future] = {}
+        self._cycle_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _submit(self) -> Tuple[List[Tuple[str, Future]], List[str]]:
+        """Запустить чтения; вернуть (ID, future) и ID датчиков, занятых прошлым циклом"""
+        reads, busy = [], []
+        for sensor in self.sensors:
+            previous = self._in_flight.get(sensor.sensorId)
+            if previous is not None and not previous.done():
+                busy.append(sensor.sensorId)
+            else:
+                reads.append((sensor.sensorId, self._executor.submit(sensor.readData)))
+        return reads, busy
+
+    def _collect(self, started: datetime, clock_start: float,
+                 reads: List[Tuple[str, Future]], busy: List[str]) -> PollBatch:
+        """Собрать пакет из завершенных чтений, остальные отметить пропущенными"""
+        sensor_ids, timestamps, values = [], [], []
+        missed = list(busy)
+        in_flight = {sensor_id: self._in_flight[sensor_id] for sensor_id in busy}
+        for sensor_id, future in reads:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                reading = future.result()
+                sensor_ids.append(sensor_id)
+                timestamps.append(reading.timestamp)
+                values.append(reading.value)
+                continue
+            if not future.cancel():
+                in_flight[sensor_id] = future
+            missed.append(sensor_id)
+        self._in_flight = in_flight
+        batch = PollBatch(
+            started=started,
+            sensor_ids=sensor_ids,
+            timestamps=np.array(timestamps, dtype="datetime64[us]"),
+            values=np.array(values, dtype=np.float64),
+            missed=missed,
+            latency=time.perf_counter() - clock_start
+        )
+        self.stats.record(batch)
+        if self.store is not None:
+            self.store.appendColumns(batch.sensor_ids, batch.timestamps, batch.values)
+        return batch
+
+    def poll(self) -> PollBatch:
+        """Опросить все датчики, дождавшись ответов не дольше timeout"""
+        with self._cycle_lock:
+            started, clock_start = datetime.now(), time.perf_counter()
+            reads, busy = self._submit()
+            wait([future for _, future in reads], timeout=self.timeout)
+            return self._collect(started, clock_start, reads, busy)
+
+    async def apoll(self) -> PollBatch:
+        """Опросить все датчики, не блокируя цикл событий"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.poll)
+
+    # ---------- Фоновый опрос ----------
+
+    def start(self, interval: float = 1.0, on_batch: Optional[Callable[[PollBatch], None]] = None) -> None:
+        """Опрашивать датчики каждые interval секунд (циклы не накладываются)"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval, on_batch),
+                                        name="sensor-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Остановить фоновый опрос"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self) -> None:
+        """Остановить опрос и пул потоков, не дожидаясь зависших чтений"""
+        self.stop()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, interval: float, on_batch: Optional[Callable[[PollBatch], None]]) -> None:
+        deadline = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                batch = self.poll()
+                if on_batch is not None:
+                    on_batch(batch)
+            except Exception:
+                logger.exception("Sensor poll cycle failed")
+            # Ровный шаг: следующий цикл от начала текущего, пропущенные шаги не догоняются
+            deadline = max(deadline + interval, time.monotonic())
+            self._stop.wait(deadline - time.monotonic())
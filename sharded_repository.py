@@ -0,0 +1,388 @@
+from typing import Any, Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from contextlib import contextmanager
+from datetime import datetime
+from functools import partial
+import heapq
+import math
+import multiprocessing
+import os
+import threading
+import geo
+from model import Incident, IncidentType, IncidentStatus, TrafficLight, GeoPoint, Status
+from repository import (
+    Repository, RepositorySnapshot, IncidentRepository, TrafficLightRepository, Page, T
+)
+
+# ==================== Процесс шарда ====================
+
+def _serve_shard(conn: Any, factory: Callable[[], Repository]) -> None:
+    """Цикл процесса-шарда: выполнять (метод, args, kwargs) над своим репозиторием"""
+    repository = factory()
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        method, args, kwargs = request
+        try:
+            result = getattr(repository, method)(*args, **kwargs)
+            if isinstance(result, Iterator):
+                result = list(result)
+            conn.send((True, result))
+        except Exception as e:
+            conn.send((False, e))
+    conn.close()
+
+class _Shard:
+    """Процесс-шард и канал к нему"""
+
+    def __init__(self, context: Any, factory: Callable[[], Repository]):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_serve_shard, args=(child_conn, factory), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.lock = threading.Lock()
+
+    def send(self, method: str, *args: Any, **kwargs: Any) -> None:
+        self.conn.send((method, args, kwargs))
+
+    def receive(self) -> Any:
+        ok, result = self.conn.recv()
+        if not ok:
+            raise result
+        return result
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join()
+        self.conn.close()
+
+# ==================== Шардированный репозиторий ====================
+
+class ShardedRepository(Repository[T]):
+    """Репозиторий, распределенный по процессам по географическим тайлам
+
+    Плоскость разбита на квадратные тайлы со стороной tile_size; каждый тайл
+    закреплен за одним из shards процессов, в котором живет собственный
+    репозиторий из factory. Записи уходят в шард тайла объекта, пакетные
+    записи рассылаются всем шардам сразу и выполняются параллельно.
+    Запросы по области идут только в шарды тайлов, которые она задевает,
+    остальные запросы рассылаются всем шардам, а ответы объединяются.
+
+    Объекты передаются между процессами копиями: изменение выданного
+    объекта на месте не видно шарду, сохранять изменения нужно через
+    update() или modify().
+
+    Репозиторий можно использовать из нескольких потоков. Записи одного ID
+    выполняются по очереди (блокировки ID разбиты на полосы), записи разных
+    ID и обмен с разными шардами идут параллельно. Карта ID -> шард и индекс
+    ID меняются под короткой блокировкой маршрутизации, которая не держится
+    во время обмена с процессами.
+    """
+
+    ID_LOCK_STRIPES = 64
+
+    def __init__(self, factory: Callable[[], Repository[T]], shards: Optional[int] = None,
+                 tile_size: float = 0.05, mp_context: Optional[str] = None):
+        super().__init__()
+        context = multiprocessing.get_context(mp_context)
+        self._tile_size = tile_size
+        self._shards = [_Shard(context, factory) for _ in range(shards or os.cpu_count() or 1)]
+        self._shard_of: Dict[str, int] = {}
+        # Только чтение и изменение карты шардов и индекса ID, без обмена с процессами
+        self._routing_lock = threading.Lock()
+        # Реентерабельные: modify() и updateMany() вызывают запись того же ID
+        self._id_locks = [threading.RLock() for _ in range(self.ID_LOCK_STRIPES)]
+
+    # ---------- Маршрутизация ----------
+
+    def _tile_of(self, location: GeoPoint) -> Tuple[int, int]:
+        return (math.floor(location.x / self._tile_size), math.floor(location.y / self._tile_size))
+
+    def _shard_for_tile(self, tile: Tuple[int, int]) -> int:
+        tx, ty = tile
+        return ((tx * 73856093) ^ (ty * 19349663)) % len(self._shards)
+
+    def _shard_for(self, obj: T) -> int:
+        return self._shard_for_tile(self._tile_of(obj.location))
+
+    def _shards_near(self, location: GeoPoint, radius: float) -> List[int]:
+        """Шарды тайлов, которые задевает прямоугольник вокруг круга радиуса radius метров"""
+        lat_min, lon_min, lat_max, lon_max = geo.bounding_box(location, radius)
+        x0, y0 = self._tile_of(GeoPoint(lat_min, lon_min))
+        x1, y1 = self._tile_of(GeoPoint(lat_max, lon_max))
+        if (x1 - x0 + 1) * (y1 - y0 + 1) >= len(self._shards) * 4:
+            return list(range(len(self._shards)))
+        return sorted({self._shard_for_tile((tx, ty))
+                       for tx in range(x0, x1 + 1) for ty in range(y0, y1 + 1)})
+
+    def _route(self, id: str) -> Optional[int]:
+        with self._routing_lock:
+            return self._shard_of.get(id)
+
+    @contextmanager
+    def _locked(self, ids: Iterable[str]) -> Iterator[None]:
+        """Захватить блокировки полос ID в едином порядке: записи одного ID идут по очереди"""
+        stripes = sorted({hash(id) % len(self._id_locks) for id in ids})
+        for stripe in stripes:
+            self._id_locks[stripe].acquire()
+        try:
+            yield
+        finally:
+            for stripe in reversed(stripes):
+                self._id_locks[stripe].release()
+
+    def _call(self, shard: int, method: str, *args: Any, **kwargs: Any) -> Any:
+        target = self._shards[shard]
+        with target.lock:
+            target.send(method, *args, **kwargs)
+            return target.receive()
+
+    def _scatter(self, requests: Dict[int, Tuple[str, tuple]]) -> Dict[int, Any]:
+        """Отправить запросы шардам, затем собрать ответы: шарды работают параллельно"""
+        order = sorted(requests)
+        for shard in order:
+            self._shards[shard].lock.acquire()
+        try:
+            for shard in order:
+                method, args = requests[shard]
+                self._shards[shard].send(method, *args)
+            results, error = {}, None
+            for shard in order:
+                try:
+                    results[shard] = self._shards[shard].receive()
+                except Exception as e:
+                    error = error or e
+            if error is not None:
+                raise error
+            return results
+        finally:
+            for shard in order:
+                self._shards[shard].lock.release()
+
+    def _broadcast(self, method: str, *args: Any, shards: Optional[Sequence[int]] = None) -> List[Any]:
+        targets = range(len(self._shards)) if shards is None else shards
+        results = self._scatter({shard: (method, args) for shard in targets})
+        return [results[shard] for shard in sorted(results)]
+
+    def _gather(self, method: str, *args: Any, shards: Optional[Sequence[int]] = None) -> List[T]:
+        return [obj for part in self._broadcast(method, *args, shards=shards) for obj in part]
+
+    def close(self) -> None:
+        """Остановить процессы шардов"""
+        for shard in self._shards:
+            shard.stop()
+
+    # ---------- Repository API ----------
+
+    def getById(self, id: str) -> Optional[T]:
+        shard = self._route(id)
+        return self._call(shard, "getById", id) if shard is not None else None
+
+    def getAll(self) -> List[T]:
+        return self._gather("getAll")
+
+    def iterAll(self) -> Iterator[T]:
+        return iter(self.getAll())
+
+    def page(self, limit: int = 50, after_id: Optional[str] = None) -> Page[T]:
+        self._checkPageLimit(limit)
+        with self._routing_lock:
+            ids = self._id_index.after(after_id, limit + 1)
+        found = self.getMany(ids[:limit])
+        return Page([found[id] for id in ids[:limit]],
+                    ids[limit - 1] if len(ids) > limit else None)
+
+    def add(self, id: str, obj: T) -> None:
+        with self._locked((id,)):
+            before = self.getMany((id,)) if self._subscribers else None
+            shard = self._shard_for(obj)
+            previous = self._route(id)
+            self._call(shard, "add", id, obj)
+            with self._routing_lock:
+                if previous is None:
+                    self._id_index.insert(id, id)
+                self._shard_of[id] = shard
+            # Из прежнего шарда объект удаляется после переключения маршрута
+            if previous is not None and previous != shard:
+                self._call(previous, "delete", id)
+            if before is not None:
+                self._publishWrites({id: obj}, before)
+
+    def update(self, id: str, obj: T) -> None:
+        with self._locked((id,)):
+            if self._route(id) is not None:
+                self.add(id, obj)
+
+    def delete(self, id: str) -> None:
+        with self._locked((id,)):
+            before = self.getMany((id,)) if self._subscribers else None
+            with self._routing_lock:
+                shard = self._shard_of.pop(id, None)
+                if shard is not None:
+                    self._id_index.remove(id)
+            if shard is not None:
+                self._call(shard, "delete", id)
+                if before:
+                    self._publishDeletes(before)
+
+    def modify(self, id: str, mutator: Callable[[T], None]) -> Optional[T]:
+        with self._locked((id,)):
+            return super().modify(id, mutator)
+
+    def getMany(self, ids: Iterable[str]) -> Dict[str, T]:
+        by_shard: Dict[int, List[str]] = {}
+        with self._routing_lock:
+            for id in ids:
+                shard = self._shard_of.get(id)
+                if shard is not None:
+                    by_shard.setdefault(shard, []).append(id)
+        found: Dict[str, T] = {}
+        for part in self._scatter({shard: ("getMany", (part,))
+                                   for shard, part in by_shard.items()}).values():
+            found.update(part)
+        return found
+
+    def addMany(self, items: Dict[str, T]) -> None:
+        with self._locked(items):
+            before = self.getMany(items) if self._subscribers else None
+            by_shard: Dict[int, Dict[str, T]] = {}
+            moved: Dict[int, List[str]] = {}
+            with self._routing_lock:
+                for id, obj in items.items():
+                    shard = self._shard_for(obj)
+                    by_shard.setdefault(shard, {})[id] = obj
+                    previous = self._shard_of.get(id)
+                    if previous is not None and previous != shard:
+                        moved.setdefault(previous, []).append(id)
+            self._scatter({shard: ("addMany", (part,)) for shard, part in by_shard.items()})
+            with self._routing_lock:
+                self._id_index.insertMany([(id, id) for id in items if id not in self._shard_of])
+                for shard, part in by_shard.items():
+                    for id in part:
+                        self._shard_of[id] = shard
+            if moved:
+                self._scatter({shard: ("deleteMany", (ids,)) for shard, ids in moved.items()})
+            if before is not None:
+                self._publishWrites(items, before)
+
+    def updateMany(self, items: Dict[str, T]) -> None:
+        with self._locked(items):
+            with self._routing_lock:
+                existing = {id: obj for id, obj in items.items() if id in self._shard_of}
+            self.addMany(existing)
+
+    def deleteMany(self, ids: Iterable[str]) -> None:
+        ids = list(ids)
+        with self._locked(ids):
+            before = self.getMany(ids) if self._subscribers else None
+            by_shard: Dict[int, List[str]] = {}
+            with self._routing_lock:
+                for id in ids:
+                    shard = self._shard_of.pop(id, None)
+                    if shard is not None:
+                        by_shard.setdefault(shard, []).append(id)
+                self._id_index.removeMany([id for part in by_shard.values() for id in part])
+            self._scatter({shard: ("deleteMany", (part,)) for shard, part in by_shard.items()})
+            if before:
+                self._publishDeletes(before)
+
+    def count(self) -> int:
+        return len(self._shard_of)
+
+    def exists(self, id: str) -> bool:
+        return id in self._shard_of
+
+    def readSnapshot(self, guard: Optional[Callable[[], ContextManager[Any]]] = None) -> RepositorySnapshot[T]:
+        raise NotImplementedError("Sharded repository does not support snapshots")
+
+# ==================== Конкретные репозитории ====================
+
+class ShardedIncidentRepository(ShardedRepository[Incident]):
+    """Инциденты, распределенные по процессам по географическим тайлам"""
+
+    def __init__(self, shards: Optional[int] = None, tile_size: float = 0.05,
+                 mp_context: Optional[str] = None):
+        super().__init__(partial(IncidentRepository, sample_data=False), shards, tile_size, mp_context)
+
+    def findActive(self) -> List[Incident]:
+        """Найти активные инциденты"""
+        return self._gather("findActive")
+
+    def findByLocation(self, location: GeoPoint, radius: float = 1000.0) -> List[Incident]:
+        """Найти инциденты не дальше radius метров от указанной локации (только в шардах области)"""
+        return self._gather("findByLocation", location, radius,
+                            shards=self._shards_near(location, radius))
+
+    def findByType(self, incident_type: IncidentType) -> List[Incident]:
+        """Найти инциденты по типу"""
+        return self._gather("findByType", incident_type)
+
+    def findInRange(self, start: datetime, end: datetime) -> List[Incident]:
+        """Найти инциденты с отметкой времени в диапазоне [start, end]"""
+        parts = self._broadcast("findInRange", start, end)
+        return list(heapq.merge(*parts, key=lambda incident: incident.timestamp))
+
+    def nearest(self, location: GeoPoint, k: int = 1, active_only: bool = False) -> List[Incident]:
+        """k ближайших к location инцидентов: по k от каждого шарда, затем слияние"""
+        parts = self._broadcast("nearest", location, k, active_only)
+        return heapq.nsmallest(k, (incident for part in parts for incident in part),
+                               key=lambda incident: incident.location.distance_to(location))
+
+    def iterActive(self) -> Iterator[Incident]:
+        """Перебрать активные инциденты"""
+        return iter(self.findActive())
+
+    def iterByLocation(self, location: GeoPoint, radius: float = 1000.0) -> Iterator[Incident]:
+        """Перебрать инциденты не дальше radius метров от указанной локации"""
+        return iter(self.findByLocation(location, radius))
+
+    def iterByType(self, incident_type: IncidentType) -> Iterator[Incident]:
+        """Перебрать инциденты по типу"""
+        return iter(self.findByType(incident_type))
+
+    def iterInRange(self, start: datetime, end: datetime) -> Iterator[Incident]:
+        """Перебрать инциденты в диапазоне [start, end] в порядке времени"""
+        return iter(self.findInRange(start, end))
+
+    def countByStatus(self, status: IncidentStatus) -> int:
+        """Количество инцидентов с указанным статусом"""
+        return sum(self._broadcast("countByStatus", status))
+
+    def summarizeRange(self, start: datetime, end: datetime) -> Tuple[int, float]:
+        """Количество инцидентов и средняя тяжесть за период"""
+        total, severity = 0, 0.0
+        for count, average in self._broadcast("summarizeRange", start, end):
+            total += count
+            severity += count * average
+        return total, (severity / total if total else 0.0)
+
+class ShardedTrafficLightRepository(ShardedRepository[TrafficLight]):
+    """Светофоры, распределенные по процессам по географическим тайлам"""
+
+    def __init__(self, shards: Optional[int] = None, tile_size: float = 0.05,
+                 mp_context: Optional[str] = None):
+        super().__init__(partial(TrafficLightRepository, sample_data=False), shards, tile_size, mp_context)
+
+    def findByIntersection(self, intersection_id: str) -> List[TrafficLight]:
+        """Найти светофоры на перекрестке"""
+        return self._gather("findByIntersection", intersection_id)
+
+    def getByStatus(self, status: Status) -> List[TrafficLight]:
+        """Найти светофоры по статусу"""
+        return self._gather("getByStatus", status)
+
+    def nearest(self, location: GeoPoint, k: int = 1) -> List[TrafficLight]:
+        """k ближайших к location светофоров: по k от каждого шарда, затем слияние"""
+        parts = self._broadcast("nearest", location, k)
+        return heapq.nsmallest(k, (light for part in parts for light in part),
+                               key=lambda light: light.location.distance_to(location))
+
+    def countByStatus(self, status: Status) -> int:
+        """Количество светофоров с указанным статусом"""
+        return sum(self._broadcast("countByStatus", status))
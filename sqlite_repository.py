@@ -0,0 +1,377 @@
+from typing import Any, Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
+from datetime import datetime
+import copy
+import heapq
+import math
+import pathlib
+import pickle
+import sqlite3
+import weakref
+import geo
+from model import (
+    TrafficLight, User, Incident, GeoPoint,
+    IncidentType, IncidentStatus, Status
+)
+from repository import Repository, IncidentRepository, Page, T
+
+# ==================== Базовый SQLite-репозиторий ====================
+
+class SQLiteRepository(Repository[T]):
+    """Репозиторий, хранящий объекты в SQLite
+
+    Объект сериализуется целиком в колонку data, а атрибуты, по которым
+    выполняются запросы, дублируются в индексированные колонки COLUMNS.
+    Объекты, полученные из базы, - копии: изменения нужно сохранять через update().
+    """
+
+    TABLE: str = "objects"
+    COLUMNS: Tuple[Tuple[str, str], ...] = ()
+    INDEXES: Tuple[Tuple[str, ...], ...] = ()
+
+    _MAX_PARAMS = 500
+
+    def __init__(self, path: str = ":memory:"):
+        super().__init__()
+        self._path = path
+        # isolation_level=None: каждая запись вне batch() - отдельная транзакция
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._batch_depth = 0
+
+        columns = "".join(f", {name} {sql_type}" for name, sql_type in self.COLUMNS)
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.TABLE} "
+            f"(id TEXT PRIMARY KEY, data BLOB NOT NULL{columns})"
+        )
+        for index_columns in self.INDEXES:
+            name = f"idx_{self.TABLE}_{'_'.join(index_columns)}"
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {name} ON {self.TABLE} ({', '.join(index_columns)})"
+            )
+
+        # SQL-строки строятся один раз: sqlite3 кэширует подготовленные
+        # выражения по тексту запроса, поэтому повторные вызовы их переиспользуют
+        names = ["id", "data"] + [name for name, _ in self.COLUMNS]
+        assignments = ", ".join(f"{name} = ?" for name in names[1:])
+        self._sql_select = f"SELECT data FROM {self.TABLE}"
+        self._sql_get = f"SELECT data FROM {self.TABLE} WHERE id = ?"
+        self._sql_insert = (f"INSERT OR REPLACE INTO {self.TABLE} ({', '.join(names)}) "
+                            f"VALUES ({', '.join('?' for _ in names)})")
+        self._sql_update = f"UPDATE {self.TABLE} SET {assignments} WHERE id = ?"
+        self._sql_delete = f"DELETE FROM {self.TABLE} WHERE id = ?"
+        self._sql_count = f"SELECT COUNT(*) FROM {self.TABLE}"
+        self._sql_exists = f"SELECT 1 FROM {self.TABLE} WHERE id = ?"
+        self._sql_page_first = f"SELECT id, data FROM {self.TABLE} ORDER BY id LIMIT ?"
+        self._sql_page_after = f"SELECT id, data FROM {self.TABLE} WHERE id > ? ORDER BY id LIMIT ?"
+
+    # ---------- Сериализация ----------
+
+    def _columns(self, obj: T) -> Tuple[Any, ...]:
+        """Значения индексированных колонок для объекта (порядок как в COLUMNS)"""
+        return ()
+
+    def _encode(self, obj: T) -> bytes:
+        return pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _decode(self, data: bytes) -> T:
+        return pickle.loads(data)
+
+    def _iterQuery(self, where: str = "", params: Tuple[Any, ...] = ()) -> Iterator[T]:
+        """Выполнить SELECT с условием и декодировать строки по мере чтения"""
+        sql = f"{self._sql_select} WHERE {where}" if where else self._sql_select
+        for row in self._conn.execute(sql, params):
+            yield self._decode(row[0])
+
+    def _query(self, where: str = "", params: Tuple[Any, ...] = ()) -> List[T]:
+        """Выполнить SELECT с условием и декодировать результат"""
+        return list(self._iterQuery(where, params))
+
+    # ---------- Транзакции ----------
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Выполнить несколько записей в одной транзакции"""
+        if self._batch_depth == 0:
+            self._conn.execute("BEGIN")
+        self._batch_depth += 1
+        try:
+            yield
+        except BaseException:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._conn.execute("ROLLBACK")
+            raise
+        self._batch_depth -= 1
+        if self._batch_depth == 0:
+            self._conn.execute("COMMIT")
+
+    def close(self) -> None:
+        """Закрыть соединение с базой"""
+        self._conn.close()
+
+    def __enter__(self) -> "SQLiteRepository[T]":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def readSnapshot(self, guard: Optional[Callable[[], ContextManager[Any]]] = None) -> "SQLiteRepository[T]":
+        """Открыть снимок: копию репозитория на отдельном соединении в читающей транзакции
+
+        В режиме WAL транзакция видит базу на момент первого чтения и не мешает
+        записям через основное соединение. Соединение снимка открыто только для
+        чтения (mode=ro): запись через снимок падает с sqlite3.OperationalError.
+        Подписчики у снимка свои, изначально пустые. Снимок нужно закрыть через
+        close() или with. Базе в памяти (":memory:") снимки недоступны.
+        """
+        if self._path == ":memory:":
+            raise NotImplementedError("Snapshots need a file-backed SQLite database")
+        snapshot = copy.copy(self)
+        snapshot._snapshots = weakref.WeakSet()
+        snapshot._subscribers = []
+        snapshot._batch_depth = 0
+        snapshot._conn = sqlite3.connect(f"{pathlib.Path(self._path).resolve().as_uri()}?mode=ro", uri=True,
+                                         isolation_level=None, check_same_thread=False)
+        snapshot._conn.execute("BEGIN")
+        snapshot._conn.execute(self._sql_count).fetchone()
+        return snapshot
+
+    # ---------- Repository API ----------
+
+    def getById(self, id: str) -> Optional[T]:
+        row = self._conn.execute(self._sql_get, (id,)).fetchone()
+        return self._decode(row[0]) if row else None
+
+    def getAll(self) -> List[T]:
+        return self._query()
+
+    def iterAll(self) -> Iterator[T]:
+        return self._iterQuery()
+
+    def page(self, limit: int = 50, after_id: Optional[str] = None) -> Page[T]:
+        self._checkPageLimit(limit)
+        if after_id is None:
+            rows = self._conn.execute(self._sql_page_first, (limit + 1,)).fetchall()
+        else:
+            rows = self._conn.execute(self._sql_page_after, (after_id, limit + 1)).fetchall()
+        return Page([self._decode(data) for _, data in rows[:limit]],
+                    rows[limit - 1][0] if len(rows) > limit else None)
+
+    def add(self, id: str, obj: T) -> None:
+        before = self.getMany((id,)) if self._subscribers else None
+        self._conn.execute(self._sql_insert, (id, self._encode(obj)) + self._columns(obj))
+        if before is not None:
+            self._publishWrites({id: obj}, before)
+
+    def update(self, id: str, obj: T) -> None:
+        before = self.getMany((id,)) if self._subscribers else None
+        self._conn.execute(self._sql_update, (self._encode(obj),) + self._columns(obj) + (id,))
+        if before:
+            self._publishWrites({id: obj}, before)
+
+    def delete(self, id: str) -> None:
+        before = self.getMany((id,)) if self._subscribers else None
+        self._conn.execute(self._sql_delete, (id,))
+        if before:
+            self._publishDeletes(before)
+
+    def getMany(self, ids: Iterable[str]) -> Dict[str, T]:
+        ids = list(ids)
+        found: Dict[str, T] = {}
+        # Не больше _MAX_PARAMS параметров в одном запросе
+        for start in range(0, len(ids), self._MAX_PARAMS):
+            chunk = ids[start:start + self._MAX_PARAMS]
+            rows = self._conn.execute(
+                f"SELECT id, data FROM {self.TABLE} WHERE id IN ({', '.join('?' for _ in chunk)})",
+                chunk
+            )
+            for id, data in rows:
+                found[id] = self._decode(data)
+        return {id: found[id] for id in ids if id in found}
+
+    def addMany(self, items: Dict[str, T]) -> None:
+        before = self.getMany(items) if self._subscribers else None
+        with self.batch():
+            self._conn.executemany(
+                self._sql_insert,
+                [(id, self._encode(obj)) + self._columns(obj) for id, obj in items.items()]
+            )
+        if before is not None:
+            self._publishWrites(items, before)
+
+    def updateMany(self, items: Dict[str, T]) -> None:
+        before = self.getMany(items) if self._subscribers else None
+        with self.batch():
+            self._conn.executemany(
+                self._sql_update,
+                [(self._encode(obj),) + self._columns(obj) + (id,) for id, obj in items.items()]
+            )
+        if before:
+            self._publishWrites({id: items[id] for id in before}, before)
+
+    def deleteMany(self, ids: Iterable[str]) -> None:
+        ids = list(ids)
+        before = self.getMany(ids) if self._subscribers else None
+        with self.batch():
+            self._conn.executemany(self._sql_delete, [(id,) for id in ids])
+        if before:
+            self._publishDeletes(before)
+
+    def count(self) -> int:
+        return self._conn.execute(self._sql_count).fetchone()[0]
+
+    def exists(self, id: str) -> bool:
+        return self._conn.execute(self._sql_exists, (id,)).fetchone() is not None
+
+# ==================== SQLiteUserRepository ====================
+
+class SQLiteUserRepository(SQLiteRepository[User]):
+    """Пользователи в SQLite"""
+
+    TABLE = "users"
+    COLUMNS = (("role", "TEXT"),)
+    INDEXES = (("role",),)
+
+    def _columns(self, obj: User) -> Tuple[Any, ...]:
+        return (obj.role,)
+
+    def findByUserId(self, user_id: str) -> Optional[User]:
+        """Найти пользователя по ID"""
+        return self.getById(user_id)
+
+    def findByRole(self, role: str) -> List[User]:
+        """Найти пользователей по роли"""
+        return self._query("role = ?", (role,))
+
+# ==================== SQLiteIncidentRepository ====================
+
+def _sql_timestamp(value: datetime) -> str:
+    """Время в формате фиксированной длины, сравнимом как строка"""
+    return value.isoformat(sep=" ", timespec="microseconds")
+
+class SQLiteIncidentRepository(SQLiteRepository[Incident]):
+    """Инциденты в SQLite с фильтрами по статусу, типу, времени и координатам"""
+
+    TABLE = "incidents"
+    COLUMNS = (
+        ("type", "TEXT"),
+        ("status", "TEXT"),
+        ("timestamp", "TEXT"),
+        ("x", "REAL"),
+        ("y", "REAL"),
+        ("severity", "INTEGER"),
+    )
+    INDEXES = (("status",), ("type",), ("timestamp",), ("x", "y"))
+
+    def _columns(self, obj: Incident) -> Tuple[Any, ...]:
+        return (obj.type.value, obj.status.value, _sql_timestamp(obj.timestamp),
+                obj.location.x, obj.location.y, obj.severity)
+
+    def findActive(self) -> List[Incident]:
+        """Найти активные инциденты"""
+        return list(self.iterActive())
+
+    def findByLocation(self, location: GeoPoint, radius: float = 1000.0) -> List[Incident]:
+        """Найти инциденты не дальше radius метров от указанной локации"""
+        return list(self.iterByLocation(location, radius))
+
+    def findByType(self, incident_type: IncidentType) -> List[Incident]:
+        """Найти инциденты по типу"""
+        return list(self.iterByType(incident_type))
+
+    def findInRange(self, start: datetime, end: datetime) -> List[Incident]:
+        """Найти инциденты с отметкой времени в диапазоне [start, end]"""
+        return list(self.iterInRange(start, end))
+
+    def iterActive(self) -> Iterator[Incident]:
+        """Перебрать активные инциденты"""
+        statuses = tuple(status.value for status in IncidentRepository.ACTIVE_STATUSES)
+        return self._iterQuery("status IN (?, ?)", statuses)
+
+    def iterByLocation(self, location: GeoPoint, radius: float = 1000.0) -> Iterator[Incident]:
+        """Перебрать инциденты не дальше radius метров от указанной локации"""
+        lat_min, lon_min, lat_max, lon_max = geo.bounding_box(location, radius)
+        candidates = self._iterQuery(
+            "x BETWEEN ? AND ? AND y BETWEEN ? AND ?", (lat_min, lat_max, lon_min, lon_max)
+        )
+        return (incident for incident in candidates
+                if incident.location.distance_to(location) <= radius)
+
+    def nearest(self, location: GeoPoint, k: int = 1, active_only: bool = False) -> List[Incident]:
+        """k ближайших к location инцидентов в порядке возрастания расстояния
+
+        База упорядочивает строки по расстоянию в локальной проекции вокруг
+        location (geo.LocalProjection): в пределах города она совпадает
+        с расстоянием по большому кругу с точностью до долей процента.
+        """
+        if k <= 0:
+            return []
+        where, params = "1", ()
+        if active_only:
+            where = "status IN (?, ?)"
+            params = tuple(status.value for status in IncidentRepository.ACTIVE_STATUSES)
+        squeeze = math.cos(math.radians(location.x))
+        return self._query(
+            f"{where} ORDER BY (x - ?) * (x - ?) + (y - ?) * (y - ?) * ? LIMIT ?",
+            params + (location.x, location.x, location.y, location.y, squeeze * squeeze, k)
+        )
+
+    def iterByType(self, incident_type: IncidentType) -> Iterator[Incident]:
+        """Перебрать инциденты по типу"""
+        return self._iterQuery("type = ?", (incident_type.value,))
+
+    def iterInRange(self, start: datetime, end: datetime) -> Iterator[Incident]:
+        """Перебрать инциденты в диапазоне [start, end] в порядке времени"""
+        return self._iterQuery("timestamp BETWEEN ? AND ? ORDER BY timestamp",
+                               (_sql_timestamp(start), _sql_timestamp(end)))
+
+    def countByStatus(self, status: IncidentStatus) -> int:
+        """Количество инцидентов с указанным статусом"""
+        return self._conn.execute(
+            f"SELECT COUNT(*) FROM {self.TABLE} WHERE status = ?", (status.value,)
+        ).fetchone()[0]
+
+    def summarizeRange(self, start: datetime, end: datetime) -> Tuple[int, float]:
+        """Количество инцидентов и средняя тяжесть за период"""
+        total, average = self._conn.execute(
+            f"SELECT COUNT(*), AVG(severity) FROM {self.TABLE} WHERE timestamp BETWEEN ? AND ?",
+            (_sql_timestamp(start), _sql_timestamp(end))
+        ).fetchone()
+        return total, average or 0.0
+
+# ==================== SQLiteTrafficLightRepository ====================
+
+class SQLiteTrafficLightRepository(SQLiteRepository[TrafficLight]):
+    """Светофоры в SQLite"""
+
+    TABLE = "traffic_lights"
+    COLUMNS = (("intersection", "TEXT"), ("status", "TEXT"))
+    INDEXES = (("intersection",), ("status",))
+
+    def _columns(self, obj: TrafficLight) -> Tuple[Any, ...]:
+        return (obj.intersectionId or None, obj.getStatusUp().value)
+
+    def findByIntersection(self, intersection_id: str) -> List[TrafficLight]:
+        """Найти светофоры на перекрестке"""
+        return self._query("intersection = ?", (intersection_id,))
+
+    def getByStatus(self, status: Status) -> List[TrafficLight]:
+        """Найти светофоры по статусу"""
+        return self._query("status = ?", (status.value,))
+
+    def nearest(self, location: GeoPoint, k: int = 1) -> List[TrafficLight]:
+        """k ближайших к location светофоров в порядке возрастания расстояния
+
+        Координаты светофоров не вынесены в колонки, поэтому таблица
+        просматривается целиком.
+        """
+        return heapq.nsmallest(k, self._iterQuery(),
+                               key=lambda light: light.location.distance_to(location))
+
+    def countByStatus(self, status: Status) -> int:
+        """Количество светофоров с указанным статусом"""
+        return self._conn.execute(
+            f"SELECT COUNT(*) FROM {self.TABLE} WHERE status = ?", (status.value,)
+        ).fetchone()[0]
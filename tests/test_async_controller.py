@@ -0,0 +1,58 @@
+import asyncio
+from datetime import datetime
+
+from async_controller import AsyncReportController, AsyncTrafficController
+from async_repository import AsyncRepository
+from columnar_repository import ColumnarIncidentRepository
+from model import GeoPoint, Incident, IncidentType, Phase, TrafficLight
+from repository import IncidentRepository
+from sqlite_repository import SQLiteTrafficLightRepository
+from view import DashboardView, ReportView
+
+
+def test_async_optimize_phases_stores_new_phases():
+    repo = SQLiteTrafficLightRepository()
+    repo.addMany({f"L{i}": TrafficLight(f"L{i}", GeoPoint(40.7, -74.0 + i * 1e-3), "J1") for i in range(3)})
+    controller = AsyncTrafficController(AsyncRepository(repo), DashboardView())
+
+    results = asyncio.run(controller.aoptimizePhases("J1"))
+
+    assert set(results) == {"L0", "L1", "L2"}
+    for light_id, result in results.items():
+        stored = repo.getById(light_id)
+        assert stored.currentPhase is Phase.GREEN
+        assert result["duration"] == stored.phaseDuration
+    assert asyncio.run(controller.aoptimizePhases("J9")) == {"error": "No lights found for junction J9"}
+
+
+def _march_incidents(n: int):
+    return {f"INC{i}": Incident(f"INC{i}", IncidentType.ACCIDENT, GeoPoint(40.7, -74.0), 4,
+                                datetime(2026, 3, 10)) for i in range(n)}
+
+
+def test_async_monthly_report_reads_a_snapshot():
+    repo = IncidentRepository(sample_data=False)
+    repo.addMany(_march_incidents(3))
+    opened = []
+    read_snapshot = repo.readSnapshot
+
+    def spy(*args, **kwargs):
+        snapshot = read_snapshot(*args, **kwargs)
+        opened.append(snapshot)
+        return snapshot
+
+    repo.readSnapshot = spy
+    controller = AsyncReportController(AsyncRepository(repo), ReportView())
+    report = asyncio.run(controller.agenerateMonthlyReport(3, 2026))
+
+    assert "Total Incidents: 3" in report.content
+    assert len(opened) == 1
+    assert not repo._snapshots  # снимок закрыт после отчета
+
+
+def test_async_monthly_report_falls_back_without_snapshots():
+    repo = ColumnarIncidentRepository()
+    repo.addMany(_march_incidents(2))
+    controller = AsyncReportController(AsyncRepository(repo), ReportView())
+    report = asyncio.run(controller.agenerateMonthlyReport(3, 2026))
+    assert "Total Incidents: 2" in report.content
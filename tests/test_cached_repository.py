@@ -0,0 +1,129 @@
+import sys
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from cached_repository import CachedRepository
+from concurrent_repository import ConcurrentRepository
+from model import GeoPoint, Incident, IncidentStatus, IncidentType
+from repository import ChangeType, IncidentRepository
+
+
+def _incident(id: str) -> Incident:
+    return Incident(id, IncidentType.OTHER, GeoPoint(40.7, -74.0), 1, datetime(2026, 3, 1))
+
+
+@pytest.fixture
+def fast_switching():
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def test_concurrent_reads_with_evictions_and_flushes(fast_switching):
+    backend = IncidentRepository(sample_data=False)
+    ids = [f"INC{i:04d}" for i in range(400)]
+    backend.addMany({id: _incident(id) for id in ids})
+    cache = CachedRepository(backend, capacity=8, write_back=True, flush_every=10_000)
+    repo = ConcurrentRepository(cache)
+    errors = []
+
+    def reader(worker: int) -> None:
+        try:
+            for round in range(10):
+                for i in range(worker, len(ids), 3):
+                    assert repo.getById(ids[i]) is not None
+                assert len(repo.getMany(ids[worker::7])) == len(ids[worker::7])
+                # find* пробрасывается во внутренний репозиторий со сбросом под блокировкой чтения
+                repo.findActive()
+        except Exception as error:
+            errors.append(error)
+
+    def writer() -> None:
+        for i in range(0, len(ids), 5):
+            repo.add(f"NEW{i:04d}", _incident(f"NEW{i:04d}"))
+
+    threads = [threading.Thread(target=reader, args=(worker,)) for worker in range(6)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(cache._cache) <= 8
+    cache.flush()
+    assert backend.count() == len(ids) + len(range(0, len(ids), 5))
+    assert cache.stats.hits + cache.stats.misses > 0
+
+
+class _SlowIncidentRepository(IncidentRepository):
+    """Запись с задержкой, чтобы два сброса успели пересечься"""
+
+    def __init__(self):
+        super().__init__(sample_data=False)
+        self.writes = 0
+
+    def addMany(self, items):
+        self.writes += 1
+        time.sleep(0.05)
+        super().addMany(items)
+
+
+def test_concurrent_readers_flush_pending_writes_once():
+    backend = _SlowIncidentRepository()
+    cache = CachedRepository(backend, write_back=True, flush_every=10_000)
+    repo = ConcurrentRepository(cache)
+    repo.addMany({id: _incident(id) for id in ("INC0001", "INC0002")})
+
+    threads = [threading.Thread(target=repo.findActive) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert backend.writes == 1
+    assert cache.stats.flushes == 1
+    assert backend.count() == 2
+
+
+def test_modify_missing_object_returns_none():
+    cache = CachedRepository(IncidentRepository(sample_data=False))
+
+    assert cache.modify("MISSING", lambda incident: None) is None
+
+
+def test_modify_keeps_backend_snapshot_intact():
+    backend = IncidentRepository(sample_data=False)
+    cache = CachedRepository(backend)
+    cache.add("INC0001", _incident("INC0001"))
+
+    with backend.readSnapshot() as snapshot:
+        modified = cache.modify("INC0001", lambda incident: setattr(incident, "status", IncidentStatus.RESOLVED))
+
+        assert snapshot.getById("INC0001").status == IncidentStatus.REPORTED
+    assert cache.getById("INC0001") is modified
+    assert backend.getById("INC0001").status == IncidentStatus.RESOLVED
+
+
+@pytest.mark.parametrize("write_back", [False, True])
+def test_modify_publishes_one_event_with_previous_version(write_back):
+    backend = IncidentRepository(sample_data=False)
+    cache = CachedRepository(backend, write_back=write_back)
+    cache.add("INC0001", _incident("INC0001"))
+    cache.flush()
+    events = []
+    cache.subscribe(events.append)
+
+    modified = cache.modify("INC0001", lambda incident: setattr(incident, "status", IncidentStatus.RESOLVED))
+
+    assert [event.type for event in events] == [ChangeType.UPDATED]
+    event = events[0]
+    assert event.before is not event.after
+    assert event.before.status == IncidentStatus.REPORTED
+    assert event.after.status == IncidentStatus.RESOLVED
+    assert cache.getById("INC0001") is modified
+    assert backend.getById("INC0001").status == IncidentStatus.RESOLVED
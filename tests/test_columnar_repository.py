@@ -0,0 +1,64 @@
+from datetime import datetime
+
+from columnar_repository import ColumnarIncidentRepository
+from model import GeoPoint, Incident, IncidentStatus, IncidentType
+
+
+def _incident(id: str) -> Incident:
+    return Incident(id, IncidentType.OTHER, GeoPoint(40.7, -74.0), 1, datetime(2026, 3, 1))
+
+
+def _repo(*ids: str) -> ColumnarIncidentRepository:
+    repo = ColumnarIncidentRepository()
+    repo.deleteMany([incident.incidentId for incident in repo.getAll()])
+    repo.addMany({id: _incident(id) for id in ids})
+    return repo
+
+
+def test_issued_object_writes_status_back():
+    repo = _repo("INC1", "INC2")
+    repo.getById("INC1").updateStatus(IncidentStatus.RESOLVED)
+
+    assert repo.getById("INC1").status == IncidentStatus.RESOLVED
+    assert repo.getById("INC2").status == IncidentStatus.REPORTED
+
+
+def test_object_of_deleted_row_does_not_touch_readded_incident():
+    repo = _repo("INC1", "INC2", "INC3")
+    stale = repo.getById("INC1")
+    repo.delete("INC1")
+    repo.add("INC1", _incident("INC1"))
+
+    stale.updateStatus(IncidentStatus.RESOLVED)
+
+    assert repo.getById("INC1").status == IncidentStatus.REPORTED
+    assert stale._observers == []
+
+
+def test_object_of_replaced_row_is_detached():
+    repo = _repo("INC1", "INC2")
+    stale = repo.getById("INC1")
+    stale_many = repo.getById("INC2")
+    repo.add("INC1", _incident("INC1"))
+    repo.addMany({"INC2": _incident("INC2")})
+    events = []
+    repo.subscribe(events.append)
+
+    stale.updateStatus(IncidentStatus.FALSE_ALARM)
+    stale_many.updateStatus(IncidentStatus.FALSE_ALARM)
+
+    assert repo.getById("INC1").status == IncidentStatus.REPORTED
+    assert repo.getById("INC2").status == IncidentStatus.REPORTED
+    assert events == []
+
+
+def test_rows_moved_by_deletes_keep_their_objects():
+    repo = _repo(*(f"INC{i}" for i in range(20)))
+    issued = repo.getById("INC19")
+    # Удаление переносит последнюю строку на место удаленной, массовое - сжимает колонки
+    repo.delete("INC0")
+    repo.deleteMany([f"INC{i}" for i in range(1, 10)])
+
+    issued.updateStatus(IncidentStatus.CONFIRMED)
+
+    assert repo.getById("INC19").status == IncidentStatus.CONFIRMED
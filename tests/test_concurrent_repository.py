@@ -0,0 +1,77 @@
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+
+from concurrent_repository import ConcurrentRepository
+from model import GeoPoint, Incident, IncidentType
+from repository import IncidentRepository
+from sqlite_repository import SQLiteIncidentRepository
+
+
+def _incident(id: str) -> Incident:
+    return Incident(id, IncidentType.OTHER, GeoPoint(40.7, -74.0), 1, datetime(2026, 3, 1))
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = ConcurrentRepository(SQLiteIncidentRepository(str(tmp_path / "traffic.db")))
+    yield repo
+    repo.close()
+
+
+def test_batch_holds_write_lock_for_whole_block(repo):
+    entered, release = threading.Event(), threading.Event()
+    order = []
+
+    def batched() -> None:
+        with repo.batch():
+            repo.add("INC1", _incident("INC1"))
+            # Чтение и запись этим же потоком внутри блока не ждут сами себя
+            assert repo.getById("INC1") is not None
+            entered.set()
+            release.wait(5)
+            order.append("batch")
+
+    def writer() -> None:
+        repo.add("INC2", _incident("INC2"))
+        order.append("writer")
+
+    first = threading.Thread(target=batched)
+    first.start()
+    assert entered.wait(5)
+    second = threading.Thread(target=writer)
+    second.start()
+    second.join(0.2)
+    assert second.is_alive()
+    release.set()
+    first.join()
+    second.join()
+
+    assert order == ["batch", "writer"]
+    assert repo.count() == 2
+
+
+def test_batch_rolls_back_on_error(repo):
+    with pytest.raises(RuntimeError):
+        with repo.batch():
+            repo.add("INC1", _incident("INC1"))
+            raise RuntimeError("abort")
+
+    assert repo.count() == 0
+    repo.add("INC2", _incident("INC2"))
+    assert repo.count() == 1
+
+
+class _SessionRepository(IncidentRepository):
+    @contextmanager
+    def session(self):
+        yield self
+
+
+def test_other_context_managers_are_not_forwarded():
+    repo = ConcurrentRepository(_SessionRepository(sample_data=False))
+
+    with pytest.raises(TypeError):
+        repo.session()
@@ -0,0 +1,59 @@
+from datetime import datetime
+
+import pytest
+
+from concurrent_repository import ConcurrentRepository
+from controller import IncidentController, TrafficController
+from model import GeoPoint, Incident, IncidentStatus, IncidentType, Phase, TrafficLight
+from repository import TrafficLightRepository
+from sqlite_repository import SQLiteIncidentRepository, SQLiteTrafficLightRepository
+from view import DashboardView, IncidentView
+
+
+def _lights():
+    lights = [TrafficLight(f"L{i}", GeoPoint(40.7, -74.0 + i * 1e-3), "J1") for i in range(3)]
+    lights[2].setConfine(True)
+    return lights
+
+
+@pytest.fixture(params=["memory", "sqlite", "concurrent-sqlite"])
+def light_repo(request):
+    if request.param == "memory":
+        repo = TrafficLightRepository(sample_data=False)
+    else:
+        repo = SQLiteTrafficLightRepository()
+        if request.param == "concurrent-sqlite":
+            repo = ConcurrentRepository(repo)
+    repo.addMany({light.lightId: light for light in _lights()})
+    return repo
+
+
+def test_optimize_phases_stores_new_phases(light_repo):
+    results = TrafficController(light_repo, DashboardView()).optimizePhases("J1")
+
+    assert set(results) == {"L0", "L1"}
+    for light_id, result in results.items():
+        stored = light_repo.getById(light_id)
+        assert stored.currentPhase is Phase.GREEN
+        assert result == {"new_phase": stored.currentPhase.value, "duration": stored.phaseDuration}
+        assert stored.phaseDuration in (30, 45)
+    confined = light_repo.getById("L2")
+    assert (confined.currentPhase, confined.phaseDuration) == (Phase.RED, 0)
+
+
+def test_manual_switch_stores_phase(light_repo):
+    assert TrafficController(light_repo, DashboardView()).manualSwitch("L1", Phase.YELLOW, 5)
+    stored = light_repo.getById("L1")
+    assert (stored.currentPhase, stored.phaseDuration) == (Phase.YELLOW, 5)
+
+
+def test_incident_status_changes_are_stored_in_sqlite():
+    repo = SQLiteIncidentRepository()
+    repo.add("INC1", Incident("INC1", IncidentType.ACCIDENT, GeoPoint(40.7, -74.0), 2, datetime(2026, 3, 1)))
+    controller = IncidentController(repo, IncidentView())
+
+    assert controller.verifyIncident("INC1")
+    assert repo.getById("INC1").status is IncidentStatus.CONFIRMED
+    assert controller.closeIncident("INC1")
+    assert repo.getById("INC1").status is IncidentStatus.RESOLVED
+    assert not controller.verifyIncident("MISSING")
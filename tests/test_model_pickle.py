@@ -0,0 +1,65 @@
+import pickle
+from datetime import datetime
+
+from model import GeoPoint, Incident, IncidentStatus, IncidentType, Phase, SensorData, TrafficLight
+
+
+def _roundtrip(obj):
+    return pickle.loads(pickle.dumps(obj))
+
+
+def test_geopoint_roundtrip():
+    point = _roundtrip(GeoPoint(40.7, -74.0))
+
+    assert point == GeoPoint(40.7, -74.0)
+    assert not hasattr(point, "__dict__")
+
+
+def test_sensor_data_roundtrip():
+    reading = _roundtrip(SensorData(1.5, datetime(2026, 3, 1, 8), "S1"))
+
+    assert (reading.value, reading.timestamp, reading.sensor_id) == (1.5, datetime(2026, 3, 1, 8), "S1")
+
+
+def test_incident_roundtrip_drops_observers():
+    incident = Incident("INC1", IncidentType.ACCIDENT, GeoPoint(40.7, -74.0), 3, datetime(2026, 3, 1))
+    incident.subscribe(lambda obj: None)
+    incident.updateStatus(IncidentStatus.CONFIRMED)
+
+    restored = _roundtrip(incident)
+
+    assert "_observers" not in incident.__getstate__()
+    assert not hasattr(restored, "_observers")
+    assert restored.incidentId == "INC1"
+    assert restored.status == IncidentStatus.CONFIRMED
+    assert restored.location == GeoPoint(40.7, -74.0)
+    # Подписка после загрузки создает новый список наблюдателей
+    seen = []
+    restored.subscribe(seen.append)
+    restored.updateStatus(IncidentStatus.RESOLVED)
+    assert seen == [restored]
+
+
+def test_traffic_light_roundtrip():
+    light = TrafficLight("TL1", GeoPoint(40.7, -74.0), "J1")
+    light.isOnline = True
+    light.setPhaseUpdate(Phase.GREEN, 30)
+
+    restored = _roundtrip(light)
+
+    assert (restored.lightId, restored.intersectionId) == ("TL1", "J1")
+    assert (restored.currentPhase, restored.phaseDuration, restored.isOnline) == (Phase.GREEN, 30, True)
+
+
+def test_old_dict_state_loads_and_skips_unknown_attributes():
+    # Состояние объекта, сохраненного до перехода на __slots__
+    state = {"incidentId": "INC1", "type": IncidentType.OTHER, "location": GeoPoint(40.7, -74.0),
+             "severity": 2, "timestamp": datetime(2026, 3, 1), "status": IncidentStatus.REPORTED,
+             "_observers": [print], "legacy_field": 1}
+    incident = Incident.__new__(Incident)
+    incident.__setstate__(state)
+
+    assert incident.severity == 2
+    assert incident.status == IncidentStatus.REPORTED
+    assert not hasattr(incident, "_observers")
+    assert not hasattr(incident, "legacy_field")
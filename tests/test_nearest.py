@@ -0,0 +1,139 @@
+import random
+from datetime import datetime
+
+import pytest
+
+import geo
+from index import KDTreeIndex
+from model import GeoPoint, Incident, IncidentStatus, IncidentType
+from repository import IncidentRepository
+
+
+def _brute(points, query, k):
+    return sorted((geo.distance(query, point), id) for id, point in points.items())[:k]
+
+
+def _check(index, points, query, k):
+    found = index.nearest(query, k)
+    expected = _brute(points, query, k)
+    assert len(found) == len(expected)
+    assert [d for d, _ in found] == pytest.approx([d for d, _ in expected], rel=1e-6, abs=1e-3)
+    for distance, id in found:
+        assert distance == pytest.approx(geo.distance(query, points[id]), rel=1e-6, abs=1e-3)
+    assert len({id for _, id in found}) == len(found)
+
+
+@pytest.fixture
+def points():
+    rng = random.Random(3)
+    return {f"P{i:04d}": GeoPoint(rng.uniform(40.0, 41.5), rng.uniform(-75.0, -73.0)) for i in range(2000)}
+
+
+def _index(points):
+    index = KDTreeIndex()
+    for id, point in points.items():
+        index.insert(id, point)
+    return index
+
+
+@pytest.mark.parametrize("k", [1, 5, 37])
+def test_matches_brute_force(points, k):
+    index = _index(points)
+    rng = random.Random(k)
+    for _ in range(25):
+        _check(index, points, GeoPoint(rng.uniform(39.5, 42.0), rng.uniform(-75.5, -72.5)), k)
+
+
+def test_ties_return_distinct_ids_at_equal_distance():
+    points = {id: GeoPoint(40.7, -74.0) for id in ("A", "B", "C", "D")}
+    points["FAR"] = GeoPoint(40.8, -74.0)
+    index = _index(points)
+
+    two = index.nearest(GeoPoint(40.71, -74.0), 2)
+    assert {id for _, id in two} < {"A", "B", "C", "D"}
+    assert two[0][0] == pytest.approx(two[1][0])
+    assert {id for _, id in index.nearest(GeoPoint(40.71, -74.0), 4)} == {"A", "B", "C", "D"}
+
+
+def test_k_larger_than_size_returns_everything(points):
+    small = dict(list(points.items())[:10])
+    index = _index(small)
+
+    found = index.nearest(GeoPoint(40.7, -74.0), 50)
+    assert sorted(id for _, id in found) == sorted(small)
+    assert [d for d, _ in found] == sorted(d for d, _ in found)
+    assert index.nearest(GeoPoint(40.7, -74.0), 0) == []
+    assert KDTreeIndex().nearest(GeoPoint(40.7, -74.0), 3) == []
+
+
+def test_query_right_after_insert_and_remove(points):
+    index = _index(points)
+    query = GeoPoint(40.7, -74.0)
+    index.nearest(query, 1)  # строит дерево
+
+    index.insert("NEW", GeoPoint(40.70001, -74.0))
+    assert index.nearest(query, 1)[0][1] == "NEW"
+
+    index.remove("NEW")
+    nearest_id = index.nearest(query, 1)[0][1]
+    assert nearest_id != "NEW"
+
+    index.remove(nearest_id)
+    remaining = {id: point for id, point in points.items() if id != nearest_id}
+    _check(index, remaining, query, 5)
+
+    # Перемещение точки дерева: старое место больше не находится
+    moved = next(iter(remaining))
+    index.insert(moved, GeoPoint(10.0, 10.0))
+    remaining[moved] = GeoPoint(10.0, 10.0)
+    _check(index, remaining, query, 5)
+    assert index.nearest(GeoPoint(10.0, 10.0), 1)[0][1] == moved
+
+
+def test_many_changes_trigger_rebuild(points):
+    index = _index(points)
+    index.nearest(GeoPoint(40.7, -74.0), 1)
+    ids = list(points)
+    for id in ids[:600]:
+        index.remove(id)
+        del points[id]
+    for i in range(400):
+        points[f"N{i}"] = GeoPoint(40.0 + i / 400, -74.0)
+        index.insert(f"N{i}", points[f"N{i}"])
+
+    _check(index, points, GeoPoint(40.5, -74.0), 10)
+    assert not index._state.pending and not index._state.removed
+    assert len(index) == len(points)
+
+
+def test_antimeridian():
+    points = {"EAST": GeoPoint(0.0, 179.95), "WEST": GeoPoint(0.0, -179.95), "MID": GeoPoint(0.0, 178.5)}
+    index = _index(points)
+
+    found = index.nearest(GeoPoint(0.0, -179.99), 2)
+    assert [id for _, id in found] == ["WEST", "EAST"]
+    _check(index, points, GeoPoint(0.0, 180.0), 3)
+
+
+def test_near_poles():
+    rng = random.Random(5)
+    points = {f"N{i}": GeoPoint(rng.uniform(89.0, 90.0), rng.uniform(-180.0, 180.0)) for i in range(300)}
+    points.update({f"S{i}": GeoPoint(rng.uniform(-90.0, -89.0), rng.uniform(-180.0, 180.0)) for i in range(300)})
+    index = _index(points)
+
+    for query in (GeoPoint(90.0, 0.0), GeoPoint(89.9, 120.0), GeoPoint(-90.0, 45.0), GeoPoint(-89.5, -170.0)):
+        _check(index, points, query, 7)
+
+
+def test_repository_nearest_filters_active():
+    repo = IncidentRepository(sample_data=False)
+    for i, status in enumerate([IncidentStatus.RESOLVED, IncidentStatus.REPORTED, IncidentStatus.CONFIRMED]):
+        incident = Incident(f"INC{i}", IncidentType.OTHER, GeoPoint(40.7 + i * 0.01, -74.0), 1, datetime(2026, 3, 1))
+        incident.status = status
+        repo.add(incident.incidentId, incident)
+
+    assert [i.incidentId for i in repo.nearest(GeoPoint(40.7, -74.0), 2)] == ["INC0", "INC1"]
+    assert [i.incidentId for i in repo.nearest(GeoPoint(40.7, -74.0), 2, active_only=True)] == ["INC1", "INC2"]
+
+    repo.delete("INC1")
+    assert [i.incidentId for i in repo.nearest(GeoPoint(40.7, -74.0), 5, active_only=True)] == ["INC2"]
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from columnar_repository import ColumnarIncidentRepository
+from concurrent_repository import ConcurrentRepository
+from controller import IncidentController, Request
+from model import GeoPoint, Incident, IncidentStatus, IncidentType
+from repository import IncidentRepository
+from sqlite_repository import SQLiteIncidentRepository
+from tiered_repository import TieredIncidentRepository
+from view import IncidentView
+
+IDS = [f"INC{i:03d}" for i in range(23)]
+
+
+def _incidents():
+    incidents = {}
+    for i, id in enumerate(IDS):
+        incident = Incident(id, IncidentType.OTHER, GeoPoint(40.7, -74.0 + i * 1e-3), 1, datetime(2026, 3, 1))
+        if i % 2:
+            incident.status = IncidentStatus.RESOLVED
+        incidents[id] = incident
+    return incidents
+
+
+def _tiered():
+    repo = TieredIncidentRepository(timedelta(0), segment_size=4, sample_data=False)
+    repo.addMany(_incidents())
+    repo.migrateCold()
+    assert repo.coldCount
+    return repo
+
+
+def _filled(repo):
+    # Без тестовых инцидентов, которые часть backend'ов добавляет при создании
+    repo.deleteMany([incident.incidentId for incident in repo.getAll()])
+    repo.addMany(_incidents())
+    return repo
+
+
+BACKENDS = {
+    "memory": lambda: _filled(IncidentRepository(sample_data=False)),
+    "sqlite": lambda: _filled(SQLiteIncidentRepository()),
+    "columnar": lambda: _filled(ColumnarIncidentRepository()),
+    "tiered": _tiered,
+    "concurrent": lambda: ConcurrentRepository(_filled(IncidentRepository(sample_data=False))),
+}
+
+
+@pytest.fixture(params=sorted(BACKENDS))
+def repo(request):
+    return BACKENDS[request.param]()
+
+
+@pytest.mark.parametrize("limit", [1, 5, 23, 100])
+def test_cursor_walk_returns_every_incident_once(repo, limit):
+    seen, after_id = [], None
+    while True:
+        page = repo.page(limit, after_id)
+        assert len(page.items) <= limit
+        seen.extend(incident.incidentId for incident in page.items)
+        if page.next_after_id is None:
+            break
+        assert page.next_after_id == seen[-1]
+        after_id = page.next_after_id
+    assert seen == IDS
+
+
+@pytest.mark.parametrize("limit", [0, -1])
+def test_non_positive_limit_is_rejected(repo, limit):
+    with pytest.raises(ValueError):
+        repo.page(limit)
+
+
+def test_list_request_rejects_non_positive_limit():
+    controller = IncidentController(_filled(IncidentRepository(sample_data=False)), IncidentView())
+    with pytest.raises(ValueError):
+        controller.handleRequest(Request("GET", "/incidents", {"limit": "0"}))
+    page = controller.handleRequest(Request("GET", "/incidents", {"limit": "2", "after_id": "INC020"}))
+    assert [incident.incidentId for incident in page.items] == ["INC021", "INC022"]
+    assert page.next_after_id is None
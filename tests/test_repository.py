@@ -0,0 +1,275 @@
+import random
+from datetime import datetime
+
+import pytest
+
+from model import GeoPoint, Incident, IncidentStatus, IncidentType, Phase, Status, TrafficLight
+from repository import ChangeType, IncidentRepository, TrafficLightRepository
+
+
+def _incident(id: str, severity: int = 1, location: GeoPoint = GeoPoint(40.7, -74.0),
+              timestamp: datetime = datetime(2026, 3, 1)) -> Incident:
+    return Incident(id, IncidentType.OTHER, location, severity, timestamp)
+
+
+@pytest.fixture
+def incidents():
+    return IncidentRepository(sample_data=False)
+
+
+# ==================== События изменений ====================
+
+def _kinds(events):
+    return [(event.type, event.id) for event in events]
+
+
+def test_single_writes_publish_events(incidents):
+    events = []
+    incidents.subscribe(events.append)
+    first = _incident("INC1")
+    incidents.add("INC1", first)
+    second = _incident("INC1", severity=4)
+    incidents.update("INC1", second)
+    incidents.update("MISSING", _incident("MISSING"))
+    incidents.delete("INC1")
+    incidents.delete("INC1")
+
+    assert _kinds(events) == [(ChangeType.ADDED, "INC1"), (ChangeType.UPDATED, "INC1"),
+                              (ChangeType.DELETED, "INC1")]
+    assert (events[0].before, events[0].after) == (None, first)
+    assert (events[1].before, events[1].after) == (first, second)
+    assert (events[2].before, events[2].after) == (second, None)
+
+
+def test_bulk_writes_publish_one_event_per_object(incidents):
+    incidents.add("INC1", _incident("INC1"))
+    events = []
+    incidents.subscribe(events.append)
+
+    incidents.addMany({"INC1": _incident("INC1", 2), "INC2": _incident("INC2")})
+    incidents.updateMany({"INC2": _incident("INC2", 3), "MISSING": _incident("MISSING")})
+    incidents.deleteMany(["INC1", "INC2", "MISSING"])
+
+    assert _kinds(events) == [(ChangeType.UPDATED, "INC1"), (ChangeType.ADDED, "INC2"),
+                              (ChangeType.UPDATED, "INC2"),
+                              (ChangeType.DELETED, "INC1"), (ChangeType.DELETED, "INC2")]
+    assert events[0].before.severity == 1 and events[0].after.severity == 2
+    assert events[2].before.severity == 1 and events[2].after.severity == 3
+
+
+def test_modify_and_self_updates_publish_events(incidents):
+    incidents.add("INC1", _incident("INC1"))
+    events = []
+    incidents.subscribe(events.append)
+
+    incidents.modify("INC1", lambda incident: setattr(incident, "severity", 5))
+    stored = incidents.getById("INC1")
+    stored.updateStatus(IncidentStatus.CONFIRMED)
+
+    assert _kinds(events) == [(ChangeType.UPDATED, "INC1"), (ChangeType.UPDATED, "INC1")]
+    assert events[0].before.severity == 1 and events[0].after.severity == 5
+    # Объект изменил себя сам: прежней версии нет
+    assert events[1].before is None and events[1].after is stored
+
+
+def test_unsubscribe_stops_events(incidents):
+    events = []
+    incidents.subscribe(events.append)
+    incidents.add("INC1", _incident("INC1"))
+    incidents.unsubscribe(events.append)
+    incidents.unsubscribe(events.append)
+    incidents.add("INC2", _incident("INC2"))
+
+    assert _kinds(events) == [(ChangeType.ADDED, "INC1")]
+    assert not incidents._subscribers
+
+
+def test_failing_subscriber_does_not_starve_others(incidents):
+    seen = []
+
+    def failing(event):
+        raise RuntimeError("consumer failed")
+
+    incidents.subscribe(failing)
+    incidents.subscribe(seen.append)
+
+    with pytest.raises(RuntimeError):
+        incidents.add("INC1", _incident("INC1"))
+
+    # Запись выполнена, остальные подписчики событие получили
+    assert incidents.getById("INC1") is not None
+    assert incidents.findActive()[0].incidentId == "INC1"
+    assert _kinds(seen) == [(ChangeType.ADDED, "INC1")]
+
+
+def test_failing_subscriber_does_not_cut_bulk_events_short(incidents):
+    seen = []
+
+    def failing(event):
+        raise RuntimeError("consumer failed")
+
+    incidents.subscribe(failing)
+    incidents.subscribe(seen.append)
+
+    with pytest.raises(RuntimeError):
+        incidents.addMany({"INC1": _incident("INC1"), "INC2": _incident("INC2")})
+    with pytest.raises(RuntimeError):
+        incidents.deleteMany(["INC1", "INC2"])
+
+    assert _kinds(seen) == [(ChangeType.ADDED, "INC1"), (ChangeType.ADDED, "INC2"),
+                            (ChangeType.DELETED, "INC1"), (ChangeType.DELETED, "INC2")]
+    assert incidents.count() == 0
+
+
+# ==================== Пакетные операции ====================
+
+def _brute_check(repo, stored):
+    """Индексы репозитория совпадают с перебором хранимых объектов"""
+    center, radius = GeoPoint(40.7, -74.0), 3000.0
+    start, end = datetime(2026, 3, 5), datetime(2026, 3, 15)
+    assert repo.count() == len(stored)
+    for status in IncidentStatus:
+        assert repo.countByStatus(status) == sum(i.status == status for i in stored.values())
+    assert sorted(i.incidentId for i in repo.findActive()) == sorted(
+        id for id, i in stored.items() if i.status in IncidentRepository.ACTIVE_STATUSES)
+    for incident_type in IncidentType:
+        assert sorted(i.incidentId for i in repo.findByType(incident_type)) == sorted(
+            id for id, i in stored.items() if i.type == incident_type)
+    assert sorted(i.incidentId for i in repo.findByLocation(center, radius)) == sorted(
+        id for id, i in stored.items() if i.location.distance_to(center) <= radius)
+    in_range = repo.findInRange(start, end)
+    assert [i.timestamp for i in in_range] == sorted(i.timestamp for i in in_range)
+    assert sorted(i.incidentId for i in in_range) == sorted(
+        id for id, i in stored.items() if start <= i.timestamp <= end)
+
+
+def _random_incident(id: str, rng) -> Incident:
+    incident = Incident(id, rng.choice(list(IncidentType)),
+                        GeoPoint(40.7 + rng.uniform(-0.05, 0.05), -74.0 + rng.uniform(-0.05, 0.05)),
+                        rng.randint(1, 5), datetime(2026, 3, 1) + (datetime(2026, 3, 20) - datetime(2026, 3, 1)) * rng.random())
+    incident.status = rng.choice(list(IncidentStatus))
+    return incident
+
+
+def test_bulk_operations_keep_indexes_consistent(incidents):
+    rng = random.Random(11)
+    stored = {f"INC{i:03d}": _random_incident(f"INC{i:03d}", rng) for i in range(300)}
+    incidents.addMany(stored)
+    _brute_check(incidents, stored)
+
+    ids = list(stored)
+    changes = {id: _random_incident(id, rng) for id in rng.sample(ids, 120)}
+    changes["MISSING"] = _random_incident("MISSING", rng)
+    incidents.updateMany(changes)
+    stored.update({id: obj for id, obj in changes.items() if id != "MISSING"})
+    _brute_check(incidents, stored)
+
+    removed = rng.sample(ids, 80) + ["MISSING"]
+    incidents.deleteMany(removed)
+    for id in removed:
+        stored.pop(id, None)
+    _brute_check(incidents, stored)
+
+    # addMany поверх существующих объектов переиндексирует их
+    replaced = {id: _random_incident(id, rng) for id in rng.sample(list(stored), 50)}
+    replaced.update({f"NEW{i}": _random_incident(f"NEW{i}", rng) for i in range(20)})
+    incidents.addMany(replaced)
+    stored.update(replaced)
+    _brute_check(incidents, stored)
+
+    wanted = rng.sample(list(stored), 30) + ["MISSING", removed[0]]
+    assert incidents.getMany(wanted) == {id: stored[id] for id in wanted if id in stored}
+    assert [i.incidentId for i in incidents.page(limit=1000).items] == sorted(stored)
+
+
+def test_replaced_objects_no_longer_update_indexes(incidents):
+    old = _incident("INC1")
+    incidents.addMany({"INC1": old})
+    incidents.updateMany({"INC1": _incident("INC1", severity=2)})
+
+    old.updateStatus(IncidentStatus.RESOLVED)
+    assert incidents.countByStatus(IncidentStatus.RESOLVED) == 0
+    assert [i.incidentId for i in incidents.findActive()] == ["INC1"]
+
+
+# ==================== Светофоры ====================
+
+def _light(id: str, intersection: str = "J1", phase: Phase = Phase.RED) -> TrafficLight:
+    light = TrafficLight(id, GeoPoint(40.7, -74.0), intersection)
+    light.currentPhase = phase
+    return light
+
+
+@pytest.fixture
+def lights():
+    return TrafficLightRepository(sample_data=False)
+
+
+def _at(lights, intersection):
+    return sorted(light.lightId for light in lights.findByIntersection(intersection))
+
+
+def test_intersection_index_follows_update_and_modify(lights):
+    lights.addMany({"TL1": _light("TL1", "J1"), "TL2": _light("TL2", "J1"), "TL3": _light("TL3", "")})
+    assert _at(lights, "J1") == ["TL1", "TL2"]
+    assert _at(lights, "") == []
+
+    lights.update("TL1", _light("TL1", "J2"))
+    assert (_at(lights, "J1"), _at(lights, "J2")) == (["TL2"], ["TL1"])
+
+    lights.modify("TL2", lambda light: setattr(light, "intersectionId", "J2"))
+    assert (_at(lights, "J1"), _at(lights, "J2")) == ([], ["TL1", "TL2"])
+
+    lights.modify("TL3", lambda light: setattr(light, "intersectionId", "J3"))
+    assert _at(lights, "J3") == ["TL3"]
+
+    lights.delete("TL1")
+    lights.deleteMany(["TL3"])
+    assert (_at(lights, "J2"), _at(lights, "J3")) == (["TL2"], [])
+
+
+def test_intersection_index_with_modify_under_subscribers(lights):
+    # С подписчиком modify меняет копию: индекс должен перейти на нее
+    lights.subscribe(lambda event: None)
+    lights.add("TL1", _light("TL1", "J1"))
+    lights.modify("TL1", lambda light: setattr(light, "intersectionId", "J2"))
+
+    assert (_at(lights, "J1"), _at(lights, "J2")) == ([], ["TL1"])
+
+
+def _by_status(lights, status):
+    return sorted(light.lightId for light in lights.getByStatus(status))
+
+
+def test_status_buckets_follow_observer_changes(lights):
+    lights.addMany({"TL1": _light("TL1"), "TL2": _light("TL2", phase=Phase.OFF)})
+    first = lights.getById("TL1")
+    status = first.getStatusUp()
+    assert status == Status.OPERATIONAL
+    assert _by_status(lights, status) == ["TL1"]
+    assert _by_status(lights, Status.OFFLINE) == ["TL2"]
+
+    lights.getById("TL2").setPhaseUpdate(Phase.GREEN, 30)
+    assert _by_status(lights, status) == ["TL1", "TL2"]
+    lights.getById("TL2").setPhaseUpdate(Phase.OFF, 0)
+    assert _by_status(lights, Status.OFFLINE) == ["TL2"]
+
+    first.setConfine(True)
+    confined = first.getStatusUp()
+    assert confined != status
+    assert _by_status(lights, confined) == ["TL1"]
+    assert "TL1" not in _by_status(lights, status)
+    assert lights.countByStatus(confined) == 1
+
+    first.setConfine(False)
+    assert _by_status(lights, status) == ["TL1"]
+    assert lights.countByStatus(confined) == 0
+
+    # Замененный объект больше не двигает светофор по корзинам
+    lights.update("TL1", _light("TL1"))
+    first.setConfine(True)
+    assert _by_status(lights, status) == ["TL1"]
+
+    lights.delete("TL1")
+    assert "TL1" not in _by_status(lights, status)
+    assert sum(lights.countByStatus(s) for s in Status) == 1
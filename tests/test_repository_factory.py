@@ -0,0 +1,42 @@
+import pytest
+
+from cached_repository import CachedRepository
+from repository import RepositoryFactory
+
+
+@pytest.fixture(autouse=True)
+def factory():
+    RepositoryFactory.reset()
+    RepositoryFactory.configure({})
+    yield RepositoryFactory
+    RepositoryFactory.reset()
+
+
+def test_backend_options_select_distinct_instances(factory):
+    factory.configure({"incident": {"backend": "tiered", "cold_after": 60}})
+    short = factory.get_repository("incident")
+    factory.configure({"incident": {"backend": "tiered", "cold_after": 7200}})
+    long = factory.get_repository("incident")
+
+    assert short is not long
+    assert short._cold_after.total_seconds() == 60
+    assert long._cold_after.total_seconds() == 7200
+
+
+def test_write_back_selects_distinct_cache_over_shared_backend(factory):
+    factory.configure({"incident": {"cache": 100}})
+    through = factory.get_repository("incident")
+    factory.configure({"incident": {"cache": 100, "write_back": True}})
+    back = factory.get_repository("incident")
+
+    assert isinstance(through, CachedRepository) and isinstance(back, CachedRepository)
+    assert through is not back
+    assert not through._write_back and back._write_back
+    assert through.repository is back.repository
+
+
+def test_default_options_reuse_instance(factory):
+    first = factory.get_repository("incident")
+    factory.configure({"incident": {"backend": "memory", "concurrent": False, "cache": 0}})
+
+    assert factory.get_repository("incident") is first
@@ -0,0 +1,149 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from model import GeoPoint, Incident, IncidentStatus, IncidentType
+from repository import IncidentRepository
+from retention import RetentionPolicy, RetentionSweeper, drop_false_alarms, drop_resolved
+
+NOW = datetime(2026, 6, 1, 12)
+
+
+def _incident(id: str, age: timedelta, status: IncidentStatus = IncidentStatus.REPORTED) -> Incident:
+    incident = Incident(id, IncidentType.OTHER, GeoPoint(40.7, -74.0), 1, NOW - age)
+    incident.status = status
+    return incident
+
+
+class _Clock:
+    def __init__(self, now: datetime):
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+def _repo(*incidents: Incident) -> IncidentRepository:
+    repo = IncidentRepository(sample_data=False)
+    repo.addMany({incident.incidentId: incident for incident in incidents})
+    return repo
+
+
+def test_policies_remove_only_matching_expired_objects():
+    repo = _repo(
+        _incident("OLD_ALARM", timedelta(days=8), IncidentStatus.FALSE_ALARM),
+        _incident("NEW_ALARM", timedelta(days=2), IncidentStatus.FALSE_ALARM),
+        _incident("OLD_RESOLVED", timedelta(days=100), IncidentStatus.RESOLVED),
+        _incident("NEW_RESOLVED", timedelta(days=10), IncidentStatus.RESOLVED),
+        _incident("OLD_ACTIVE", timedelta(days=200)),
+    )
+    clock = _Clock(NOW)
+    sweeper = RetentionSweeper(repo, [drop_false_alarms(), drop_resolved()], clock=clock)
+
+    assert sweeper.sweep() == 2
+    assert sorted(i.incidentId for i in repo.getAll()) == ["NEW_ALARM", "NEW_RESOLVED", "OLD_ACTIVE"]
+    assert sweeper.removed == 2
+
+    clock.now = NOW + timedelta(days=6)
+    assert sweeper.sweep() == 1
+    assert not repo.exists("NEW_ALARM")
+
+    clock.now = NOW + timedelta(days=81)
+    assert sweeper.sweep() == 1
+    assert [i.incidentId for i in repo.getAll()] == ["OLD_ACTIVE"]
+
+    # Сроки удаленных объектов по другим правилам снимаются лениво, когда наступят
+    clock.now = NOW + timedelta(days=100)
+    assert sweeper.sweep() == 0
+    assert sweeper.pending() == 0
+
+
+def test_status_change_after_deadline_is_picked_up_from_events():
+    repo = _repo(_incident("INC1", timedelta(days=30)))
+    sweeper = RetentionSweeper(repo, [drop_resolved(timedelta(days=7))], clock=_Clock(NOW))
+
+    # Срок наступил, но инцидент не решен: перестает отслеживаться
+    assert sweeper.sweep() == 0
+    assert sweeper.pending() == 0
+
+    repo.modify("INC1", lambda incident: incident.updateStatus(IncidentStatus.RESOLVED))
+    assert sweeper.pending() == 1
+    assert sweeper.sweep() == 1
+    assert not repo.exists("INC1")
+
+
+def test_moved_deadline_is_rescheduled():
+    repo = _repo(_incident("INC1", timedelta(days=10), IncidentStatus.FALSE_ALARM))
+    clock = _Clock(NOW)
+    sweeper = RetentionSweeper(repo, [drop_false_alarms()], clock=clock)
+
+    # Отметка времени сдвинута вперед после постановки в кучу
+    repo.update("INC1", _incident("INC1", timedelta(days=1), IncidentStatus.FALSE_ALARM))
+    assert sweeper.sweep() == 0
+    assert sweeper.pending() == 1
+
+    clock.now = NOW + timedelta(days=6, hours=1)
+    assert sweeper.sweep() == 1
+
+
+def test_custom_policy_and_id_of():
+    repo = _repo(_incident("INC1", timedelta(hours=3)), _incident("INC2", timedelta(hours=1)))
+    policy = RetentionPolicy("short", timedelta(hours=2), lambda incident: incident.severity == 1)
+    sweeper = RetentionSweeper(repo, [policy], clock=_Clock(NOW), id_of=lambda incident: incident.incidentId)
+
+    assert sweeper.sweep() == 1
+    assert [i.incidentId for i in repo.getAll()] == ["INC2"]
+
+
+def test_background_sweeper_start_and_stop():
+    repo = _repo()
+    sweeper = RetentionSweeper(repo, [drop_false_alarms()], interval=0.01, clock=_Clock(NOW))
+    sweeper.start()
+    sweeper.start()  # повторный запуск ничего не делает
+    try:
+        repo.add("INC1", _incident("INC1", timedelta(days=8), IncidentStatus.FALSE_ALARM))
+        for _ in range(500):
+            if not repo.exists("INC1"):
+                break
+            threading.Event().wait(0.01)
+        assert not repo.exists("INC1")
+    finally:
+        sweeper.stop()
+
+    assert sweeper._thread is None
+    assert not repo._subscribers
+    repo.add("INC2", _incident("INC2", timedelta(days=8), IncidentStatus.FALSE_ALARM))
+    assert sweeper.pending() == 0
+
+
+class _FlakyRepository(IncidentRepository):
+    def __init__(self):
+        super().__init__(sample_data=False)
+        self.failures = 1
+
+    def deleteMany(self, ids):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk full")
+        super().deleteMany(ids)
+
+
+def test_background_sweeper_logs_errors_and_keeps_running(caplog):
+    repo = _FlakyRepository()
+    repo.add("INC1", _incident("INC1", timedelta(days=8), IncidentStatus.FALSE_ALARM))
+    sweeper = RetentionSweeper(repo, [drop_false_alarms()], interval=0.01, clock=_Clock(NOW))
+
+    with caplog.at_level(logging.ERROR, logger="retention"):
+        sweeper.start()
+        try:
+            repo.add("INC2", _incident("INC2", timedelta(days=8), IncidentStatus.FALSE_ALARM))
+            for _ in range(500):
+                if not repo.exists("INC2"):
+                    break
+                threading.Event().wait(0.01)
+        finally:
+            sweeper.stop()
+
+    assert "Retention sweep failed" in caplog.text
+    assert not repo.exists("INC2")
+    assert sweeper._thread is None
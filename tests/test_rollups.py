@@ -0,0 +1,130 @@
+import math
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from model import SensorData
+from rollups import RollupStore
+
+T0 = datetime(2026, 3, 1)
+EPOCH = datetime(1970, 1, 1)
+MINUTE = timedelta(minutes=1)
+
+
+def _readings(span: timedelta, seed: int, gap_seconds=(1, 90)):
+    rng = random.Random(seed)
+    at, end, readings = T0, T0 + span, []
+    while at < end:
+        readings.append((at, rng.uniform(-50.0, 50.0)))
+        at += timedelta(seconds=rng.randint(*gap_seconds), microseconds=rng.randint(0, 999_999))
+    return readings
+
+
+def _floor(moment: datetime, step: timedelta) -> datetime:
+    """Интервалы сверток отсчитываются от эпохи"""
+    return EPOCH + ((moment - EPOCH) // step) * step
+
+
+def _store(readings, retention=(None, None, None)):
+    store = RollupStore(retention=retention)
+    store.appendMany(SensorData(value, at, "S1") for at, value in readings)
+    return store
+
+
+def _brute_aggregate(readings, lo: datetime, hi: datetime):
+    values = [value for at, value in readings if lo <= at < hi]
+    return len(values), sum(values), min(values, default=math.nan), max(values, default=math.nan)
+
+
+def _brute_buckets(readings, lo: datetime, hi: datetime, step: timedelta):
+    groups = {}
+    for at, value in readings:
+        if lo <= at < hi:
+            groups.setdefault(_floor(at, step), []).append(value)
+    return sorted(groups.items())
+
+
+def _assert_buckets(buckets, expected):
+    assert [start.astype(datetime) for start in buckets.starts] == [start for start, _ in expected]
+    assert buckets.count.tolist() == [len(values) for _, values in expected]
+    np.testing.assert_allclose(buckets.sum, [sum(values) for _, values in expected], atol=1e-6)
+    assert buckets.min.tolist() == [min(values) for _, values in expected]
+    assert buckets.max.tolist() == [max(values) for _, values in expected]
+
+
+def test_aggregate_matches_brute_force():
+    readings = _readings(timedelta(days=2), seed=1)
+    store = _store(readings)
+    rng = random.Random(2)
+    for _ in range(200):
+        a, b = sorted(T0 + timedelta(seconds=rng.uniform(-600, 2 * 86400 + 600)) for _ in range(2))
+        aggregate = store.aggregate("S1", a, b)
+        count, total, low, high = _brute_aggregate(readings, _floor(a, MINUTE), _floor(b, MINUTE))
+        assert aggregate.count == count
+        assert aggregate.sum == pytest.approx(total, abs=1e-6)
+        if count:
+            assert (aggregate.min, aggregate.max) == (low, high)
+        else:
+            assert math.isnan(aggregate.min) and math.isnan(aggregate.mean)
+
+
+@pytest.mark.parametrize("step", [timedelta(minutes=1), timedelta(minutes=15), timedelta(hours=1),
+                                  timedelta(minutes=7), timedelta(minutes=45), timedelta(hours=3)])
+def test_buckets_match_brute_force(step):
+    readings = _readings(timedelta(days=2), seed=3)
+    store = _store(readings)
+    rng = random.Random(4)
+    for _ in range(30):
+        a, b = sorted(T0 + timedelta(seconds=rng.uniform(0, 2 * 86400 + 600)) for _ in range(2))
+        buckets = store.buckets("S1", a, b, step)
+        assert buckets.step == step
+        _assert_buckets(buckets, _brute_buckets(readings, _floor(a, step), _floor(b, MINUTE), step))
+
+
+def test_buckets_reject_steps_off_the_finest_grid():
+    store = _store(_readings(timedelta(hours=1), seed=5))
+    for step in (timedelta(seconds=90), timedelta(0), timedelta(minutes=-1)):
+        with pytest.raises(ValueError):
+            store.buckets("S1", T0, T0 + timedelta(hours=1), step)
+
+
+def test_unknown_sensor_is_empty():
+    store = RollupStore()
+    assert store.aggregate("NONE", T0, T0 + timedelta(days=1)).count == 0
+    assert len(store.buckets("NONE", T0, T0 + timedelta(days=1))) == 0
+
+
+def test_retention_at_each_level():
+    retention = (timedelta(hours=2), timedelta(days=1), None)
+    readings = _readings(timedelta(days=3), seed=6, gap_seconds=(5, 40))
+    store = _store(readings, retention)
+    levels = store.rollup("S1").levels
+    end = readings[-1][0]
+
+    # 1 минута: хранится около двух последних часов
+    minute_from = _floor(end - timedelta(hours=1), MINUTE)
+    _assert_buckets(store.buckets("S1", minute_from, end, MINUTE),
+                    _brute_buckets(readings, minute_from, _floor(end, MINUTE), MINUTE))
+    assert len(store.buckets("S1", T0, end - timedelta(hours=3), MINUTE)) == 0
+    assert levels[0].expired_before is not None
+
+    # 15 минут: хранятся последние сутки
+    quarter = timedelta(minutes=15)
+    quarter_from = _floor(end - timedelta(hours=20), quarter)
+    quarter_to = _floor(end - timedelta(hours=3), quarter)
+    _assert_buckets(store.buckets("S1", quarter_from, quarter_to, quarter),
+                    _brute_buckets(readings, quarter_from, quarter_to, quarter))
+    assert len(store.buckets("S1", T0, T0 + timedelta(hours=12), quarter)) == 0
+
+    # 1 час: бессрочно, весь период
+    hour = timedelta(hours=1)
+    _assert_buckets(store.buckets("S1", T0, end, hour), _brute_buckets(readings, T0, _floor(end, MINUTE), hour))
+
+    # Сводка по старому периоду без мелких данных расширяется до часовых границ
+    a, b = T0 + timedelta(hours=5, minutes=20), T0 + timedelta(hours=9, minutes=40)
+    aggregate = store.aggregate("S1", a, b)
+    count, total, _, _ = _brute_aggregate(readings, _floor(a, hour), _floor(b, hour) + hour)
+    assert aggregate.count == count
+    assert aggregate.sum == pytest.approx(total, abs=1e-6)
@@ -0,0 +1,36 @@
+import logging
+import threading
+from datetime import datetime
+
+from model import SensorData
+from sensor_poller import SensorPoller
+
+
+class _FakeSensor:
+    def __init__(self, sensorId: str):
+        self.sensorId = sensorId
+
+    def readData(self) -> SensorData:
+        return SensorData(1.0, datetime.now(), self.sensorId)
+
+
+def test_background_poll_survives_failing_cycle(caplog):
+    poller = SensorPoller([_FakeSensor("S1")], timeout=0.5)
+    batches = []
+    done = threading.Event()
+
+    def on_batch(batch):
+        batches.append(batch)
+        if len(batches) == 1:
+            raise RuntimeError("consumer failed")
+        done.set()
+
+    with caplog.at_level(logging.ERROR, logger="sensor_poller"):
+        poller.start(interval=0.01, on_batch=on_batch)
+        try:
+            assert done.wait(5)
+        finally:
+            poller.close()
+
+    assert len(batches) >= 2
+    assert "Sensor poll cycle failed" in caplog.text
@@ -0,0 +1,83 @@
+import random
+import threading
+from datetime import datetime
+
+import pytest
+
+from model import GeoPoint, Incident, IncidentType
+from sharded_repository import ShardedIncidentRepository
+
+
+def _incident(id: str, rng: random.Random) -> Incident:
+    return Incident(id, IncidentType.OTHER, GeoPoint(40.5 + rng.random(), -74.5 + rng.random()),
+                    1, datetime(2026, 3, 1))
+
+
+@pytest.fixture
+def repo():
+    repo = ShardedIncidentRepository(shards=3, tile_size=0.05)
+    yield repo
+    repo.close()
+
+
+def test_concurrent_writes_keep_routing_consistent(repo):
+    def writer(worker: int) -> None:
+        rng = random.Random(worker)
+        # Все потоки пишут одни и те же ID, перенося их между шардами
+        ids = [f"INC{i:03d}" for i in range(120)]
+        for i, id in enumerate(ids):
+            repo.add(id, _incident(id, rng))
+            if i % 3 == 0:
+                # Перенос в другой тайл и, скорее всего, в другой шард
+                repo.update(id, _incident(id, rng))
+            if i % 5 == 0:
+                repo.delete(ids[i // 2])
+        repo.addMany({id: _incident(id, rng) for id in ids[:40]})
+        repo.deleteMany(ids[100:110])
+
+    threads = [threading.Thread(target=writer, args=(worker,)) for worker in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stored = {incident.incidentId: incident for incident in repo.getAll()}
+    assert len(stored) == repo.count()
+    assert all(repo.exists(id) for id in stored)
+    for id, incident in stored.items():
+        assert repo.getById(id).location == incident.location
+
+    seen, after_id = [], None
+    while True:
+        page = repo.page(50, after_id)
+        seen.extend(incident.incidentId for incident in page.items)
+        if page.next_after_id is None:
+            break
+        after_id = page.next_after_id
+    assert seen == sorted(stored)
+
+
+def test_single_row_writes_to_other_shards_do_not_wait(repo):
+    rng = random.Random(7)
+    incidents = [_incident(f"INC{i:03d}", rng) for i in range(50)]
+    first = incidents[0]
+    other = next(incident for incident in incidents
+                 if repo._shard_for(incident) != repo._shard_for(first))
+    busy = repo._shards[repo._shard_for(first)]
+
+    # Шард первого объекта занят: запись в него ждет канал
+    busy.lock.acquire()
+    blocked = threading.Thread(target=repo.add, args=(first.incidentId, first))
+    blocked.start()
+    try:
+        blocked.join(0.2)
+        assert blocked.is_alive()
+        done = threading.Thread(target=repo.add, args=(other.incidentId, other))
+        done.start()
+        done.join(5)
+        assert not done.is_alive()
+        assert repo.exists(other.incidentId)
+    finally:
+        busy.lock.release()
+        blocked.join()
+    assert repo.getById(first.incidentId).location == first.location
@@ -0,0 +1,107 @@
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from cached_repository import CachedRepository
+from concurrent_repository import ConcurrentRepository
+from log_repository import LogIncidentRepository
+from model import GeoPoint, Incident, IncidentStatus, IncidentType
+from repository import IncidentRepository
+from sqlite_repository import SQLiteIncidentRepository
+
+
+def _incident(id: str, severity: int = 1) -> Incident:
+    return Incident(id, IncidentType.ACCIDENT, GeoPoint(40.7, -74.0), severity, datetime(2026, 3, 1, 12))
+
+
+@pytest.fixture(params=["memory", "log", "sqlite", "concurrent", "cached"])
+def repo(request, tmp_path):
+    backends = {
+        "memory": lambda: IncidentRepository(sample_data=False),
+        "log": lambda: LogIncidentRepository(str(tmp_path / "log"), sample_data=False),
+        "sqlite": lambda: SQLiteIncidentRepository(str(tmp_path / "traffic.db")),
+        "concurrent": lambda: ConcurrentRepository(IncidentRepository(sample_data=False)),
+        "cached": lambda: CachedRepository(IncidentRepository(sample_data=False), write_back=True),
+    }
+    repo = backends[request.param]()
+    repo.addMany({id: _incident(id) for id in ("INC1", "INC2", "INC3")})
+    yield repo
+    close = getattr(repo, "close", None)
+    if close is not None:
+        close()
+
+
+def test_snapshot_ignores_later_writes(repo):
+    with repo.readSnapshot() as snapshot:
+        repo.add("INC4", _incident("INC4"))
+        repo.update("INC1", _incident("INC1", severity=5))
+        repo.delete("INC2")
+        resolved = _incident("INC3")
+        resolved.updateStatus(IncidentStatus.RESOLVED)
+        repo.update("INC3", resolved)
+
+        assert snapshot.count() == 3
+        assert sorted(i.incidentId for i in snapshot.getAll()) == ["INC1", "INC2", "INC3"]
+        assert snapshot.getById("INC1").severity == 1
+        assert snapshot.getById("INC2") is not None
+        assert snapshot.getById("INC4") is None
+        assert sorted(i.incidentId for i in snapshot.findActive()) == ["INC1", "INC2", "INC3"]
+
+    assert repo.count() == 3
+    assert repo.getById("INC1").severity == 5
+    assert repo.getById("INC2") is None
+
+
+def test_closed_snapshot_stops_keeping_versions(repo):
+    snapshot = repo.readSnapshot()
+    snapshot.close()
+    repo.update("INC1", _incident("INC1", severity=5))
+
+    inner = getattr(repo, "repository", repo)
+    assert not getattr(inner, "_snapshots", ())
+
+
+@pytest.mark.parametrize("write_back", [False, True])
+def test_cached_modify_does_not_leak_into_snapshot(repo, write_back):
+    cache = CachedRepository(repo, write_back=write_back)
+    # Объект попадает в кэш до снимка: кэш и backend могут делить экземпляр
+    assert cache.getById("INC1").status == IncidentStatus.REPORTED
+
+    with cache.readSnapshot() as snapshot:
+        cache.modify("INC1", lambda incident: setattr(incident, "status", IncidentStatus.RESOLVED))
+        cache.modify("INC2", lambda incident: setattr(incident, "severity", 5))
+
+        assert snapshot.getById("INC1").status == IncidentStatus.REPORTED
+        assert snapshot.getById("INC2").severity == 1
+        assert sorted(i.incidentId for i in snapshot.findActive()) == ["INC1", "INC2", "INC3"]
+
+    assert cache.getById("INC1").status == IncidentStatus.RESOLVED
+    assert repo.getById("INC2").severity == 5
+
+
+def test_sqlite_snapshot_is_read_only_and_has_own_subscribers(tmp_path):
+    repo = SQLiteIncidentRepository(str(tmp_path / "traffic.db"))
+    repo.addMany({id: _incident(id) for id in ("INC1", "INC2")})
+    events = []
+    repo.subscribe(events.append)
+    try:
+        with repo.readSnapshot() as snapshot:
+            assert snapshot._subscribers == []
+            with pytest.raises(sqlite3.OperationalError):
+                snapshot.add("INC3", _incident("INC3"))
+            with pytest.raises(sqlite3.OperationalError):
+                snapshot.deleteMany(["INC1"])
+            with pytest.raises(sqlite3.OperationalError):
+                snapshot.modify("INC2", lambda incident: incident.updateStatus(IncidentStatus.RESOLVED))
+
+            snapshot.subscribe(lambda event: None)
+            assert len(repo._subscribers) == 1
+            repo.delete("INC1")
+            assert snapshot.count() == 2
+
+        assert events and all(event.id == "INC1" for event in events)
+        assert repo.count() == 1
+        assert repo.getById("INC2").status == IncidentStatus.REPORTED
+    finally:
+        repo.close()
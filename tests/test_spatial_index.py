@@ -0,0 +1,81 @@
+import random
+from datetime import datetime
+
+import pytest
+
+import geo
+from index import SpatialGridIndex
+from model import GeoPoint, Incident, IncidentType
+from repository import IncidentRepository
+
+
+def _brute(points, center, radius):
+    return {id for id, point in points.items() if geo.distance(center, point) <= radius}
+
+
+@pytest.fixture
+def points():
+    rng = random.Random(5)
+    return {f"P{i:04d}": GeoPoint(rng.uniform(40.6, 40.9), rng.uniform(-74.1, -73.8)) for i in range(1500)}
+
+
+@pytest.mark.parametrize("cell_size", [0.001, 0.01, 0.05])
+@pytest.mark.parametrize("radius", [50.0, 1000.0, 5000.0, 200_000.0])
+def test_query_matches_brute_force(points, cell_size, radius):
+    index = SpatialGridIndex(cell_size)
+    for id, point in points.items():
+        index.insert(id, point)
+    rng = random.Random(11)
+
+    for _ in range(20):
+        center = GeoPoint(rng.uniform(40.6, 40.9), rng.uniform(-74.1, -73.8))
+        assert set(index.query(center, radius)) == _brute(points, center, radius)
+
+
+def test_query_across_cell_boundaries():
+    index = SpatialGridIndex(0.01)
+    # Точки по разные стороны границы ячейки 40.70 / -74.00
+    points = {"A": GeoPoint(40.6999, -74.0001), "B": GeoPoint(40.7001, -73.9999),
+              "C": GeoPoint(40.6999, -73.9999), "D": GeoPoint(40.7001, -74.0001)}
+    for id, point in points.items():
+        index.insert(id, point)
+
+    assert set(index.query(GeoPoint(40.7, -74.0), 100.0)) == set(points)
+    assert set(index.query(points["A"], 10.0)) == {"A"}
+
+
+def test_insert_moves_and_remove_forgets(points):
+    index = SpatialGridIndex(0.01)
+    for id, point in points.items():
+        index.insert(id, point)
+    rng = random.Random(17)
+    moved = dict(points)
+
+    for id in rng.sample(sorted(points), 300):
+        moved[id] = GeoPoint(rng.uniform(40.6, 40.9), rng.uniform(-74.1, -73.8))
+        index.insert(id, moved[id])
+    for id in rng.sample(sorted(points), 300):
+        moved.pop(id, None)
+        index.remove(id)
+    index.remove("MISSING")
+
+    assert len(index) == len(moved)
+    for _ in range(20):
+        center = GeoPoint(rng.uniform(40.6, 40.9), rng.uniform(-74.1, -73.8))
+        assert set(index.query(center, 2000.0)) == _brute(moved, center, 2000.0)
+
+
+def test_non_positive_cell_size_is_rejected():
+    with pytest.raises(ValueError):
+        SpatialGridIndex(0)
+
+
+def test_find_by_location_radius_is_in_meters(points):
+    repo = IncidentRepository(sample_data=False)
+    repo.addMany({id: Incident(id, IncidentType.OTHER, point, 1, datetime(2026, 3, 1))
+                  for id, point in points.items()})
+    center = GeoPoint(40.75, -73.95)
+
+    # Радиус по умолчанию - 1000 метров, а не 0.01 градуса
+    assert {incident.incidentId for incident in repo.findByLocation(center)} == _brute(points, center, 1000.0)
+    assert {incident.incidentId for incident in repo.findByLocation(center, 300.0)} == _brute(points, center, 300.0)
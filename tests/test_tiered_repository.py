@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from concurrent_repository import ConcurrentRepository
+from controller import ReportController
+from model import GeoPoint, Incident, IncidentStatus, IncidentType
+from retention import RetentionSweeper, drop_false_alarms
+from tiered_repository import TieredIncidentRepository
+from view import ReportView
+
+NOW = datetime(2026, 4, 15)
+
+
+def _incident(n: int, status: IncidentStatus = IncidentStatus.RESOLVED, day: int = 1) -> Incident:
+    incident = Incident(f"INC{n:04d}", IncidentType.ACCIDENT, GeoPoint(40.7 + n * 1e-3, -74.0),
+                        severity=3, timestamp=datetime(2026, 3, day, 12))
+    incident.status = status
+    return incident
+
+
+@pytest.fixture
+def repo() -> TieredIncidentRepository:
+    repo = TieredIncidentRepository(timedelta(0), segment_size=4, clock=lambda: NOW, sample_data=False)
+    repo.addMany({incident.incidentId: incident for incident in (_incident(n, day=n + 1) for n in range(10))})
+    repo.migrateCold()
+    return repo
+
+
+def test_migrated_incidents_are_queried_from_cold_tier(repo):
+    assert repo.coldCount == 10
+    assert repo.count() == 10
+    assert repo.summarizeRange(datetime(2026, 3, 1), datetime(2026, 3, 31)) == (10, 3.0)
+    assert [incident.incidentId for incident in repo.findInRange(datetime(2026, 3, 3), datetime(2026, 3, 5, 23))] \
+        == ["INC0002", "INC0003", "INC0004"]
+    assert repo.getById("INC0007").status is IncidentStatus.RESOLVED
+
+
+def test_snapshot_includes_cold_tier(repo):
+    with repo.readSnapshot() as snapshot:
+        assert snapshot.summarizeRange(datetime(2026, 3, 1), datetime(2026, 3, 31)) == (10, 3.0)
+        assert snapshot.count() == 10
+        assert len(snapshot.getAll()) == 10
+        assert snapshot.getById("INC0003") is not None
+
+
+def test_snapshot_is_isolated_from_later_tier_changes(repo):
+    repo.add("INC0099", _incident(99, IncidentStatus.REPORTED, day=20))
+    snapshot = repo.readSnapshot()
+    try:
+        repo.delete("INC0000")                                   # удаление из холодного уровня
+        repo.modify("INC0001", lambda incident: incident.updateStatus(IncidentStatus.CONFIRMED))
+        repo.modify("INC0099", lambda incident: incident.updateStatus(IncidentStatus.RESOLVED))
+        repo.migrateCold()                                       # INC0099 уходит в холодный уровень
+        repo.add("INC0100", _incident(100, day=21))
+
+        assert snapshot.count() == 11
+        assert snapshot.getById("INC0000") is not None
+        assert snapshot.getById("INC0001").status is IncidentStatus.RESOLVED
+        assert snapshot.getById("INC0099").status is IncidentStatus.REPORTED
+        assert snapshot.getById("INC0100") is None
+        assert [incident.incidentId for incident in snapshot.findActive()] == ["INC0099"]
+        found = snapshot.findInRange(datetime(2026, 3, 1), datetime(2026, 3, 31))
+        assert sorted(incident.incidentId for incident in found) == sorted(
+            [f"INC{n:04d}" for n in range(10)] + ["INC0099"])
+        assert snapshot.summarizeRange(datetime(2026, 3, 1), datetime(2026, 3, 31)) == (11, 3.0)
+    finally:
+        snapshot.close()
+    assert repo.count() == 11
+    assert repo.getById("INC0000") is None
+
+
+def test_monthly_report_after_migration(repo):
+    report = ReportController(repo, ReportView()).generateMonthlyReport(3, 2026)
+    assert "Total Incidents: 10" in report.content
+    assert "Average Severity: 3.0/5" in report.content
+
+
+def test_sweeper_migrates_closed_incidents_without_writes():
+    now = [NOW]
+    repo = TieredIncidentRepository(timedelta(hours=1), clock=lambda: now[0], sample_data=False)
+    repo.addMany({incident.incidentId: incident for incident in (_incident(n) for n in range(3))})
+    repo.add("INC0099", _incident(99, IncidentStatus.REPORTED))
+    sweeper = RetentionSweeper(ConcurrentRepository(repo), [drop_false_alarms()], clock=lambda: now[0])
+
+    sweeper.sweep()
+    assert repo.coldCount == 0
+
+    now[0] = NOW + timedelta(hours=2)
+    sweeper.sweep()
+    assert repo.coldCount == 3
+    assert repo.count() == 4
+    assert [incident.incidentId for incident in repo.findActive()] == ["INC0099"]
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from model import SensorData
+from timeseries import SensorDataStore, SensorSeries
+
+T0 = datetime(2026, 3, 1, 8)
+
+
+def _at(seconds: int) -> np.datetime64:
+    return np.datetime64(T0 + timedelta(seconds=seconds), "us")
+
+
+def test_series_append_many_rejects_batch_without_writing():
+    series = SensorSeries(8)
+    series.append(T0 + timedelta(seconds=10), 1.0)
+
+    with pytest.raises(ValueError):
+        series.appendMany(np.array([_at(11), _at(12), _at(5)]), [2.0, 3.0, 4.0])
+
+    assert len(series) == 1
+    assert series.latest() == (T0 + timedelta(seconds=10), 1.0)
+
+
+def test_store_append_columns_rejects_batch_without_writing():
+    store = SensorDataStore(8)
+    store.appendColumns(["S1"], np.array([_at(10)]), np.array([1.0]))
+
+    with pytest.raises(ValueError):
+        store.appendColumns(["S2", "S1", "S1"], np.array([_at(1), _at(11), _at(9)]),
+                            np.array([5.0, 2.0, 3.0]))
+
+    assert len(store.last("S1")[0]) == 1
+    assert "S2" not in store
+
+
+def test_store_append_many_rejects_batch_without_writing():
+    store = SensorDataStore(8)
+    store.append(SensorData(1.0, T0 + timedelta(seconds=10), "S2"))
+
+    with pytest.raises(ValueError):
+        store.appendMany([SensorData(1.0, T0, "S1"), SensorData(2.0, T0, "S2")])
+
+    assert "S1" not in store
+    assert len(store.last("S2")[0]) == 1
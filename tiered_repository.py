@@ -0,0 +1,471 @@
+from typing import Any, Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Tuple
+from datetime import datetime, timedelta
+import copy
+import heapq
+import itertools
+import zlib
+import numpy as np
+import geo
+from model import Incident, IncidentType, IncidentStatus, GeoPoint
+from repository import IncidentRepository, IncidentSnapshot, Page
+from columnar_repository import _TYPES, _STATUSES, _TYPE_CODES, _STATUS_CODES
+
+# ==================== Холодное хранилище ====================
+
+_COLUMNS = (("x", np.float64), ("y", np.float64), ("severity", np.int8),
+            ("type", np.int8), ("status", np.int8), ("timestamp", "datetime64[us]"))
+
+class _Segment:
+    """Сжатый блок строк: каждая колонка - отдельный zlib-блок"""
+
+    def __init__(self, ids: List[str], columns: Dict[str, np.ndarray]):
+        self.ids = ids
+        self.alive = np.ones(len(ids), dtype=bool)
+        self.t_min = columns["timestamp"].min()
+        self.t_max = columns["timestamp"].max()
+        self.bbox = (columns["x"].min(), columns["y"].min(), columns["x"].max(), columns["y"].max())
+        self._packed = {name: zlib.compress(columns[name].tobytes(), 6) for name, _ in _COLUMNS}
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        return {name: np.frombuffer(zlib.decompress(self._packed[name]), dtype=dtype)
+                for name, dtype in _COLUMNS}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(len(block) for block in self._packed.values()) + self.alive.nbytes
+
+    def frozen(self) -> "_Segment":
+        """Копия с общими сжатыми колонками и собственными отметками удаления"""
+        segment = copy.copy(self)
+        segment.alive = self.alive.copy()
+        return segment
+
+class ColdIncidentStore:
+    """Сжатое колоночное хранилище закрытых инцидентов
+
+    Инциденты складываются сегментами по segment_size строк (неполным бывает
+    только последний, поэтому позиция строки - одно число); колонки
+    сегмента сжаты zlib и распаковываются только на время запроса.
+    Запросы по времени и области пропускают сегменты по их границам.
+    Удаление только помечает строку, объекты выдаются копиями.
+    """
+
+    def __init__(self, segment_size: int = 4096):
+        self._segment_size = segment_size
+        self._segments: List[_Segment] = []
+        self._row_of: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def __contains__(self, id: str) -> bool:
+        return id in self._row_of
+
+    @property
+    def nbytes(self) -> int:
+        """Размер сжатых колонок в байтах"""
+        return sum(segment.nbytes for segment in self._segments)
+
+    def addMany(self, incidents: List[Incident]) -> None:
+        """Сложить инциденты в новые сегменты, дополнив последний неполный"""
+        pending: List[Tuple[str, Tuple[Any, ...]]] = []
+        if self._segments and len(self._segments[-1].ids) < self._segment_size:
+            last = self._segments.pop()
+            columns = last.columns()
+            for row in np.flatnonzero(last.alive):
+                pending.append((last.ids[row], tuple(columns[name][row] for name, _ in _COLUMNS)))
+        for incident in incidents:
+            pending.append((incident.incidentId, (
+                incident.location.x, incident.location.y, incident.severity,
+                _TYPE_CODES[incident.type], _STATUS_CODES[incident.status],
+                np.datetime64(incident.timestamp, "us")
+            )))
+        for start in range(0, len(pending), self._segment_size):
+            chunk = pending[start:start + self._segment_size]
+            values = list(zip(*(row for _, row in chunk)))
+            columns = {name: np.array(values[i], dtype=dtype)
+                       for i, (name, dtype) in enumerate(_COLUMNS)}
+            first = len(self._segments) * self._segment_size
+            self._segments.append(_Segment([id for id, _ in chunk], columns))
+            for row, (id, _) in enumerate(chunk, first):
+                self._row_of[id] = row
+
+    def frozen(self) -> "ColdIncidentStore":
+        """Неизменяемая копия для снимков
+
+        Сжатые блоки сегментов не меняются (addMany пересобирает последний
+        сегмент заново), поэтому копируются только отметки удаления и карта
+        позиций строк, без распаковки колонок.
+        """
+        store = ColdIncidentStore(self._segment_size)
+        store._segments = [segment.frozen() for segment in self._segments]
+        store._row_of = dict(self._row_of)
+        return store
+
+    def remove(self, id: str) -> None:
+        """Пометить инцидент удаленным"""
+        position = self._row_of.pop(id, None)
+        if position is not None:
+            segment, row = divmod(position, self._segment_size)
+            self._segments[segment].alive[row] = False
+
+    def get(self, id: str) -> Optional[Incident]:
+        position = self._row_of.get(id)
+        if position is None:
+            return None
+        segment = self._segments[position // self._segment_size]
+        return self._materialize(segment, segment.columns(), position % self._segment_size)
+
+    def getMany(self, ids: Iterable[str]) -> Dict[str, Incident]:
+        by_segment: Dict[int, List[Tuple[str, int]]] = {}
+        for id in ids:
+            position = self._row_of.get(id)
+            if position is not None:
+                segment, row = divmod(position, self._segment_size)
+                by_segment.setdefault(segment, []).append((id, row))
+        found = {}
+        for index, rows in by_segment.items():
+            segment = self._segments[index]
+            columns = segment.columns()
+            for id, row in rows:
+                found[id] = self._materialize(segment, columns, row)
+        return found
+
+    def _materialize(self, segment: _Segment, columns: Dict[str, np.ndarray], row: int) -> Incident:
+        incident = Incident(
+            incidentId=segment.ids[row],
+            type=_TYPES[columns["type"][row]],
+            location=GeoPoint(float(columns["x"][row]), float(columns["y"][row])),
+            severity=int(columns["severity"][row]),
+            timestamp=columns["timestamp"][row].item()
+        )
+        incident.status = _STATUSES[columns["status"][row]]
+        return incident
+
+    def _select(self, row_filter: Callable[[Dict[str, np.ndarray]], np.ndarray],
+                segment_filter: Callable[[_Segment], bool] = lambda segment: True
+                ) -> Iterator[Tuple[_Segment, Dict[str, np.ndarray], np.ndarray]]:
+        """Сегменты, прошедшие segment_filter, и номера их живых строк, прошедших row_filter"""
+        for segment in self._segments:
+            if not segment_filter(segment) or not segment.alive.any():
+                continue
+            columns = segment.columns()
+            rows = np.flatnonzero(row_filter(columns) & segment.alive)
+            if len(rows):
+                yield segment, columns, rows
+
+    def _iter(self, selected: Iterable[Tuple[_Segment, Dict[str, np.ndarray], np.ndarray]]) -> Iterator[Incident]:
+        for segment, columns, rows in selected:
+            for row in rows:
+                yield self._materialize(segment, columns, int(row))
+
+    def iterAll(self) -> Iterator[Incident]:
+        return self._iter(self._select(lambda columns: True))
+
+    def iterByLocation(self, location: GeoPoint, radius: float) -> Iterator[Incident]:
+        def near(segment: _Segment) -> bool:
+            return geo.min_distance_to_box(location, *segment.bbox) <= radius
+
+        def within(columns: Dict[str, np.ndarray]) -> np.ndarray:
+            return geo.distances(location, columns["x"], columns["y"]) <= radius
+        return self._iter(self._select(within, near))
+
+    def nearest(self, location: GeoPoint, k: int) -> List[Tuple[float, Incident]]:
+        """k ближайших инцидентов с расстояниями; сегменты дальше k-го найденного пропускаются"""
+        def gap(segment: _Segment) -> float:
+            return geo.min_distance_to_box(location, *segment.bbox)
+
+        if k <= 0:
+            return []
+        best: List[Tuple[float, int, _Segment, int]] = []  # max-куча: (-метры, номер, сегмент, строка)
+        order = itertools.count()
+        for segment in sorted(self._segments, key=gap):
+            if len(best) == k and gap(segment) >= -best[0][0]:
+                break
+            rows = np.flatnonzero(segment.alive)
+            if not len(rows):
+                continue
+            columns = segment.columns()
+            meters = geo.distances(location, columns["x"][rows], columns["y"][rows])
+            if len(rows) > k:
+                top = np.argpartition(meters, k - 1)[:k]
+                rows, meters = rows[top], meters[top]
+            for row, distance in zip(rows, meters):
+                entry = (-float(distance), next(order), segment, int(row))
+                if len(best) < k:
+                    heapq.heappush(best, entry)
+                elif entry[0] > best[0][0]:
+                    heapq.heapreplace(best, entry)
+        columns_of: Dict[int, Dict[str, np.ndarray]] = {}
+        found = []
+        for negated, _, segment, row in sorted(best, reverse=True):
+            columns = columns_of.get(id(segment))
+            if columns is None:
+                columns = columns_of[id(segment)] = segment.columns()
+            found.append((-negated, self._materialize(segment, columns, row)))
+        return found
+
+    def iterByType(self, incident_type: IncidentType) -> Iterator[Incident]:
+        code = _TYPE_CODES[incident_type]
+        return self._iter(self._select(lambda columns: columns["type"] == code))
+
+    def iterInRange(self, start: datetime, end: datetime) -> Iterator[Incident]:
+        """Инциденты в диапазоне [start, end] в порядке времени"""
+        lo, hi = np.datetime64(start, "us"), np.datetime64(end, "us")
+        parts = []
+        for segment, columns, rows in self._select(
+                lambda columns: (columns["timestamp"] >= lo) & (columns["timestamp"] <= hi),
+                lambda segment: segment.t_max >= lo and segment.t_min <= hi):
+            rows = rows[np.argsort(columns["timestamp"][rows], kind="stable")]
+            parts.append(self._iter([(segment, columns, rows)]))
+        return heapq.merge(*parts, key=lambda incident: incident.timestamp)
+
+    def countByStatus(self, status: IncidentStatus) -> int:
+        code = _STATUS_CODES[status]
+        return sum(len(rows) for _, _, rows in self._select(lambda columns: columns["status"] == code))
+
+    def summarizeRange(self, start: datetime, end: datetime) -> Tuple[int, int]:
+        """Количество инцидентов и сумма тяжести за период"""
+        lo, hi = np.datetime64(start, "us"), np.datetime64(end, "us")
+        total, severity = 0, 0
+        for _, columns, rows in self._select(
+                lambda columns: (columns["timestamp"] >= lo) & (columns["timestamp"] <= hi),
+                lambda segment: segment.t_max >= lo and segment.t_min <= hi):
+            total += len(rows)
+            severity += int(columns["severity"][rows].sum(dtype=np.int64))
+        return total, severity
+
+# ==================== Снимок обоих уровней ====================
+
+class TieredIncidentSnapshot(IncidentSnapshot):
+    """Снимок горячего уровня (copy-on-write, как у IncidentSnapshot) и копии холодного
+
+    Инцидент, перенесенный в холодный уровень после снимка, снимок видит
+    в сохраненной горячей версии; инцидент, бывший холодным на момент
+    снимка, читается из копии холодного уровня.
+    """
+
+    def __init__(self, repository: "TieredIncidentRepository",
+                 guard: Optional[Callable[[], ContextManager[Any]]] = None):
+        super().__init__(repository, guard)
+        self._cold = repository._cold.frozen()
+
+    def close(self) -> None:
+        super().close()
+        self._cold = ColdIncidentStore()
+
+    def _resolve(self, id: str) -> Optional[Incident]:
+        if id in self._cold:
+            return self._cold.get(id)
+        return super()._resolve(id)
+
+    def _collect(self, ids: Callable[[], Iterable[str]]) -> List[Incident]:
+        # Только горячий уровень на момент снимка: холодный запросы добавляют сами
+        return [incident for incident in super()._collect(ids) if incident.incidentId not in self._cold]
+
+    def getAll(self) -> List[Incident]:
+        return super().getAll() + list(self._cold.iterAll())
+
+    def count(self) -> int:
+        return super().count() + len(self._cold)
+
+    def findInRange(self, start: datetime, end: datetime) -> List[Incident]:
+        return list(heapq.merge(super().findInRange(start, end), self._cold.iterInRange(start, end),
+                                key=lambda incident: incident.timestamp))
+
+    def summarizeRange(self, start: datetime, end: datetime) -> Tuple[int, float]:
+        hot = super().findInRange(start, end)
+        cold_total, cold_severity = self._cold.summarizeRange(start, end)
+        total = len(hot) + cold_total
+        severity = sum(incident.severity for incident in hot) + cold_severity
+        return total, (severity / total if total else 0.0)
+
+# ==================== Репозиторий с горячим и холодным уровнями ====================
+
+class TieredIncidentRepository(IncidentRepository):
+    """Инциденты в двух уровнях: активные в памяти, закрытые - в сжатых колонках
+
+    Инцидент со статусом RESOLVED или FALSE_ALARM переносится в холодное
+    хранилище через cold_after после закрытия. Перенос выполняется при
+    очередной записи в репозиторий, при каждой очистке RetentionSweeper
+    или явным вызовом migrateCold(); без записей и очистки закрытые
+    инциденты остаются в памяти и после срока.
+    Все запросы, кроме findActive, объединяют оба уровня. Холодные
+    инциденты выдаются копиями: изменение через update() или modify()
+    возвращает инцидент в память.
+    """
+
+    CLOSED_STATUSES = (IncidentStatus.RESOLVED, IncidentStatus.FALSE_ALARM)
+    SNAPSHOT_CLASS = TieredIncidentSnapshot
+
+    def __init__(self, cold_after: timedelta = timedelta(hours=1), segment_size: int = 4096,
+                 clock: Callable[[], datetime] = datetime.now, **kwargs: Any):
+        self._cold = ColdIncidentStore(segment_size)
+        self._cold_after = cold_after
+        self._clock = clock
+        # Очередь переноса: (срок, ID); _due_at отсекает устаревшие записи очереди
+        self._closing: List[Tuple[datetime, str]] = []
+        self._due_at: Dict[str, datetime] = {}
+        super().__init__(**kwargs)
+
+    # ---------- Перенос в холодный уровень ----------
+
+    def _schedule(self, incident: Incident) -> None:
+        id = incident.incidentId
+        if incident.status not in self.CLOSED_STATUSES:
+            self._due_at.pop(id, None)
+        elif id not in self._due_at:
+            due = self._clock() + self._cold_after
+            self._due_at[id] = due
+            heapq.heappush(self._closing, (due, id))
+
+    def _maybeMigrate(self) -> None:
+        if self._closing and self._closing[0][0] <= self._clock():
+            self.migrateCold()
+
+    def migrateCold(self, now: Optional[datetime] = None) -> int:
+        """Перенести в холодный уровень закрытые инциденты, срок которых наступил"""
+        now = now or self._clock()
+        due: Dict[str, Incident] = {}
+        while self._closing and self._closing[0][0] <= now:
+            deadline, id = heapq.heappop(self._closing)
+            if self._due_at.get(id) != deadline:
+                continue
+            del self._due_at[id]
+            incident = self._storage.get(id)
+            if incident is not None and incident.status in self.CLOSED_STATUSES:
+                due[id] = incident
+        if due:
+            self._preserve(due)
+            self._unindexMany(due)
+            for id in due:
+                del self._storage[id]
+            self._cold.addMany(list(due.values()))
+        return len(due)
+
+    @property
+    def coldCount(self) -> int:
+        """Количество инцидентов в холодном уровне"""
+        return len(self._cold)
+
+    # ---------- Repository API ----------
+
+    def getById(self, id: str) -> Optional[Incident]:
+        incident = self._storage.get(id)
+        return incident if incident is not None else self._cold.get(id)
+
+    def getAll(self) -> List[Incident]:
+        return list(self.iterAll())
+
+    def iterAll(self) -> Iterator[Incident]:
+        return itertools.chain(self._storage.values(), self._cold.iterAll())
+
+    def page(self, limit: int = 50, after_id: Optional[str] = None) -> Page[Incident]:
+        self._checkPageLimit(limit)
+        ids = self._id_index.after(after_id, limit + 1)
+        found = self.getMany(ids[:limit])
+        return Page([found[id] for id in ids[:limit]],
+                    ids[limit - 1] if len(ids) > limit else None)
+
+    def getMany(self, ids: Iterable[str]) -> Dict[str, Incident]:
+        ids = list(ids)
+        found = super().getMany(ids)
+        found.update(self._cold.getMany(id for id in ids if id not in found))
+        return found
+
+    def add(self, id: str, obj: Incident) -> None:
+        # Холодная версия убирается после записи, чтобы событие получило ее как before
+        super().add(id, obj)
+        self._cold.remove(id)
+        self._maybeMigrate()
+
+    def update(self, id: str, obj: Incident) -> None:
+        if id in self._cold:
+            self.add(id, obj)
+        else:
+            super().update(id, obj)
+            self._maybeMigrate()
+
+    def delete(self, id: str) -> None:
+        if id in self._cold:
+            before = self._cold.getMany((id,)) if self._subscribers else {}
+            self._cold.remove(id)
+            self._id_index.remove(id)
+            self._publishDeletes(before)
+        else:
+            super().delete(id)
+
+    def addMany(self, items: Dict[str, Incident]) -> None:
+        super().addMany(items)
+        for id in items:
+            self._cold.remove(id)
+        self._maybeMigrate()
+
+    def updateMany(self, items: Dict[str, Incident]) -> None:
+        cold = {id: obj for id, obj in items.items() if id in self._cold}
+        super().updateMany({id: obj for id, obj in items.items() if id not in cold})
+        self.addMany(cold)
+
+    def deleteMany(self, ids: Iterable[str]) -> None:
+        ids = list(ids)
+        cold = [id for id in ids if id in self._cold]
+        before = self._cold.getMany(cold) if self._subscribers else {}
+        for id in cold:
+            self._cold.remove(id)
+        self._id_index.removeMany(cold)
+        self._publishDeletes(before)
+        super().deleteMany(ids)
+
+    def count(self) -> int:
+        return len(self._storage) + len(self._cold)
+
+    def exists(self, id: str) -> bool:
+        return id in self._storage or id in self._cold
+
+    # ---------- Запросы ----------
+
+    def iterByLocation(self, location: GeoPoint, radius: float = 1000.0) -> Iterator[Incident]:
+        return itertools.chain(super().iterByLocation(location, radius),
+                               self._cold.iterByLocation(location, radius))
+
+    def iterByType(self, incident_type: IncidentType) -> Iterator[Incident]:
+        return itertools.chain(super().iterByType(incident_type),
+                               self._cold.iterByType(incident_type))
+
+    def iterInRange(self, start: datetime, end: datetime) -> Iterator[Incident]:
+        return heapq.merge(super().iterInRange(start, end), self._cold.iterInRange(start, end),
+                           key=lambda incident: incident.timestamp)
+
+    def nearest(self, location: GeoPoint, k: int = 1, active_only: bool = False) -> List[Incident]:
+        # Холодные инциденты закрыты, поэтому для active_only достаточно горячего уровня
+        hot = super().nearest(location, k, active_only)
+        if active_only or not len(self._cold):
+            return hot
+        candidates = [(incident.location.distance_to(location), incident) for incident in hot]
+        candidates.extend(self._cold.nearest(location, k))
+        return [incident for _, incident in heapq.nsmallest(k, candidates, key=lambda pair: pair[0])]
+
+    def countByStatus(self, status: IncidentStatus) -> int:
+        return super().countByStatus(status) + self._cold.countByStatus(status)
+
+    def summarizeRange(self, start: datetime, end: datetime) -> Tuple[int, float]:
+        total, severity = 0, 0
+        for incident in super().iterInRange(start, end):
+            total += 1
+            severity += incident.severity
+        cold_total, cold_severity = self._cold.summarizeRange(start, end)
+        total += cold_total
+        severity += cold_severity
+        return total, (severity / total if total else 0.0)
+
+    # ---------- Индексы ----------
+
+    def _indexMany(self, items: Dict[str, Incident]) -> None:
+        super()._indexMany(items)
+        for obj in items.values():
+            self._schedule(obj)
+
+    def _on_incident_changed(self, incident: Incident) -> None:
+        super()._on_incident_changed(incident)
+        if self._storage.get(incident.incidentId) is incident:
+            self._schedule(incident)
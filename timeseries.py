@@ -0,0 +1,237 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from datetime import datetime
+import threading
+import numpy as np
+from model import SensorData
+
+# ==================== Ряд одного датчика ====================
+
+Timestamp = Union[datetime, np.datetime64]
+Window = Tuple[np.ndarray, np.ndarray]
+
+_EMPTY: Window = (np.empty(0, dtype="datetime64[us]"), np.empty(0, dtype=np.float64))
+_EMPTY[0].flags.writeable = False
+_EMPTY[1].flags.writeable = False
+
+_EPOCH = datetime(1970, 1, 1)
+
+def _as_datetime64(timestamp: Timestamp) -> np.datetime64:
+    return np.datetime64(timestamp, "us")
+
+def _as_micros(timestamp: Timestamp) -> int:
+    """Микросекунды от эпохи (для наивного datetime - без перевода через NumPy)"""
+    if isinstance(timestamp, datetime):
+        delta = timestamp - _EPOCH
+        return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+    return int(_as_datetime64(timestamp).astype(np.int64))
+
+def _check_order(micros: np.ndarray, latest: Optional[int]) -> None:
+    """Проверить, что пакет упорядочен по времени и не раньше последней записи ряда"""
+    if len(micros) and (np.any(micros[1:] < micros[:-1]) or (
+            latest is not None and micros[0] < latest)):
+        raise ValueError("Readings must be appended in time order")
+
+class SensorSeries:
+    """Кольцевой буфер пар (время, значение) фиксированной емкости
+
+    Каждая запись хранится дважды: в позиции i и i + capacity. Поэтому
+    последние n <= capacity записей всегда лежат в массивах подряд, и окна
+    выдаются срезами без копирования, а добавление - две записи в массив
+    без сдвигов и выделения памяти. Окна - представления буфера: последующие
+    добавления перезаписывают их содержимое, для хранения окно нужно
+    скопировать. Записи добавляются в порядке времени; один писатель
+    и любое число читателей.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        # Время хранится в микросекундах; наружу - представлением datetime64[us]
+        self._micros = np.zeros(2 * capacity, dtype=np.int64)
+        self._timestamps = self._micros.view("datetime64[us]")
+        self._values = np.zeros(2 * capacity, dtype=np.float64)
+        # Поэлементная запись через memoryview в разы дешевле, чем через индексацию ndarray
+        self._micros_view = memoryview(self._micros)
+        self._values_view = memoryview(self._values)
+        self._next = 0   # позиция следующей записи в [0, capacity)
+        self._size = 0
+        self._latest: Optional[int] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, timestamp: Timestamp, value: float) -> None:
+        """Добавить запись; вытесняет самую старую, если буфер заполнен"""
+        self._appendMicros(_as_micros(timestamp), float(value))
+
+    def _appendMicros(self, micros: int, value: float) -> None:
+        latest = self._latest
+        if latest is not None and micros < latest:
+            raise ValueError("Readings must be appended in time order")
+        position = self._next
+        capacity = self.capacity
+        self._micros_view[position] = self._micros_view[position + capacity] = micros
+        self._values_view[position] = self._values_view[position + capacity] = value
+        self._next = position + 1 if position + 1 < capacity else 0
+        if self._size < capacity:
+            self._size += 1
+        self._latest = micros
+
+    def appendMany(self, timestamps: np.ndarray, values: np.ndarray) -> None:
+        """Добавить пакет записей, упорядоченных по времени, одним присваиванием на массив"""
+        micros = np.asarray(timestamps, dtype="datetime64[us]").astype(np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        if len(micros) != len(values):
+            raise ValueError("timestamps and values must have the same length")
+        if not len(micros):
+            return
+        _check_order(micros, self._latest)
+        latest = int(micros[-1])
+        count = len(micros)
+        if count > self.capacity:
+            micros, values = micros[-self.capacity:], values[-self.capacity:]
+            self._next = (self._next + count - self.capacity) % self.capacity
+            count = self.capacity
+        positions = (self._next + np.arange(count)) % self.capacity
+        for target in (positions, positions + self.capacity):
+            self._micros[target] = micros
+            self._values[target] = values
+        self._next = (self._next + count) % self.capacity
+        self._size = min(self._size + count, self.capacity)
+        self._latest = latest
+
+    def _span(self, n: int) -> slice:
+        """Срез массивов с последними n записями"""
+        end = self._next + self.capacity
+        return slice(end - n, end)
+
+    def last(self, n: Optional[int] = None) -> Window:
+        """Последние n записей (все, если n=None) как представления (времена, значения)"""
+        n = self._size if n is None else max(0, min(n, self._size))
+        span = self._span(n)
+        return self._timestamps[span], self._values[span]
+
+    def between(self, start: Timestamp, end: Timestamp) -> Window:
+        """Записи с временем в [start, end] как представления (времена, значения)"""
+        span = self._span(self._size)
+        micros = self._micros[span]
+        lo = np.searchsorted(micros, _as_micros(start), side="left")
+        hi = np.searchsorted(micros, _as_micros(end), side="right")
+        return self._timestamps[span][lo:hi], self._values[span][lo:hi]
+
+    def latest(self) -> Optional[Tuple[datetime, float]]:
+        """Последняя запись или None, если ряд пуст"""
+        if not self._size:
+            return None
+        position = self._next + self.capacity - 1
+        return self._timestamps[position].item(), float(self._values[position])
+
+# ==================== Хранилище рядов ====================
+
+class SensorDataStore:
+    """Временные ряды показаний датчиков: по кольцевому буферу на sensorId
+
+    Память выделяется при первом показании датчика: 32 байта на запись
+    емкости (два экземпляра пары время/значение).
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.capacity = capacity
+        self._series: Dict[str, SensorSeries] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def __contains__(self, sensor_id: str) -> bool:
+        return sensor_id in self._series
+
+    def sensorIds(self) -> List[str]:
+        """ID датчиков, по которым есть показания"""
+        return list(self._series)
+
+    def series(self, sensor_id: str) -> Optional[SensorSeries]:
+        """Ряд датчика или None"""
+        return self._series.get(sensor_id)
+
+    def _seriesFor(self, sensor_id: str) -> SensorSeries:
+        series = self._series.get(sensor_id)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(sensor_id, SensorSeries(self.capacity))
+        return series
+
+    # ---------- Запись ----------
+
+    def append(self, reading: SensorData) -> None:
+        """Сохранить одно показание"""
+        self._seriesFor(reading.sensor_id).append(reading.timestamp, reading.value)
+
+    def appendMany(self, readings: Iterable[SensorData]) -> None:
+        """Сохранить показания, сгруппировав их по датчикам
+
+        Пакет проверяется целиком до записи: при нарушении порядка времени
+        не сохраняется ни одно показание.
+        """
+        grouped: Dict[str, Tuple[List[datetime], List[float]]] = {}
+        for reading in readings:
+            timestamps, values = grouped.setdefault(reading.sensor_id, ([], []))
+            timestamps.append(reading.timestamp)
+            values.append(reading.value)
+        batches = {sensor_id: np.array(timestamps, dtype="datetime64[us]")
+                   for sensor_id, (timestamps, _) in grouped.items()}
+        for sensor_id, timestamps in batches.items():
+            series = self._series.get(sensor_id)
+            _check_order(timestamps.astype(np.int64), series._latest if series is not None else None)
+        for sensor_id, timestamps in batches.items():
+            self._seriesFor(sensor_id).appendMany(timestamps, grouped[sensor_id][1])
+
+    def appendColumns(self, sensor_ids: Sequence[str], timestamps: np.ndarray, values: np.ndarray) -> None:
+        """Сохранить пакет показаний в колонках: sensor_ids[i], timestamps[i], values[i]
+
+        Рассчитан на пакеты опроса, где у датчика одно-два показания: строки
+        добавляются по одной, без группировки по датчикам. Как и appendMany,
+        пакет сначала проверяется целиком.
+        """
+        micros = np.asarray(timestamps, dtype="datetime64[us]").astype(np.int64).tolist()
+        values = np.asarray(values, dtype=np.float64).tolist()
+        if not len(sensor_ids) == len(micros) == len(values):
+            raise ValueError("sensor_ids, timestamps and values must have the same length")
+        latest: Dict[str, Optional[int]] = {}
+        for sensor_id, at in zip(sensor_ids, micros):
+            if sensor_id in latest:
+                previous = latest[sensor_id]
+            else:
+                series = self._series.get(sensor_id)
+                previous = series._latest if series is not None else None
+            if previous is not None and at < previous:
+                raise ValueError("Readings must be appended in time order")
+            latest[sensor_id] = at
+        for sensor_id, at, value in zip(sensor_ids, micros, values):
+            self._seriesFor(sensor_id)._appendMicros(at, value)
+
+    # ---------- Чтение ----------
+
+    def last(self, sensor_id: str, n: Optional[int] = None) -> Window:
+        """Последние n показаний датчика как представления (времена, значения)"""
+        series = self._series.get(sensor_id)
+        return series.last(n) if series is not None else _EMPTY
+
+    def between(self, sensor_id: str, start: Timestamp, end: Timestamp) -> Window:
+        """Показания датчика с временем в [start, end] как представления (времена, значения)"""
+        series = self._series.get(sensor_id)
+        return series.between(start, end) if series is not None else _EMPTY
+
+    def latest(self, sensor_id: str) -> Optional[SensorData]:
+        """Последнее показание датчика или None"""
+        series = self._series.get(sensor_id)
+        latest = series.latest() if series is not None else None
+        if latest is None:
+            return None
+        timestamp, value = latest
+        return SensorData(value=value, timestamp=timestamp, sensor_id=sensor_id)
+
+    def iterSeries(self) -> Iterator[Tuple[str, SensorSeries]]:
+        """Перебрать пары (sensorId, ряд)"""
+        return iter(list(self._series.items()))
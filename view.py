@@ -186,6 +186,12 @@ class IncidentView(IView):
     def displayAlert(self, message: str) -> None:
         """Display an alert message"""
         print(f"ALERT: {message}")
+    
+    def displayPage(self, incident_ids: List[str], next_cursor: Optional[str]) -> None:
+        """Display one page of the incident list"""
+        self.incidentList = list(incident_ids)
+        more = f", next page after {next_cursor}" if next_cursor else ""
+        print(f"Showing {len(incident_ids)} incidents{more}")
 
 class ReportView(IView):
     """View for displaying traffic reports and statistics"""